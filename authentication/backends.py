@@ -0,0 +1,103 @@
+"""
+Backend d'authentification gardant en cache la ligne de l'utilisateur connecté.
+
+À chaque requête authentifiée, ``AuthenticationMiddleware`` charge l'utilisateur
+de la session : :class:`CachedModelBackend` le conserve dans le cache partagé
+pendant ``AUTH_USER_CACHE_TIMEOUT`` secondes. Toute modification de l'utilisateur
+(profil, mot de passe, dernière connexion) ou sa suppression invalide l'entrée
+(:mod:`authentication.signals`) ; la vérification de l'empreinte de session reste
+faite par Django sur l'utilisateur en cache, de sorte qu'un changement de mot de
+passe déconnecte toujours les autres sessions.
+
+:meth:`CachedModelBackend.aauthenticate` vérifie le mot de passe dans le pool de
+hachage (:mod:`authentication.hashers`) plutôt que dans le thread de la requête.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+from . import hashers
+
+KEY_PREFIX = "auth:user"
+
+
+def cache_key(user_id):
+    """Clé de cache d'un utilisateur."""
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def invalidate(user_id):
+    """Retire un utilisateur du cache.
+
+    L'entrée est retirée immédiatement puis à nouveau après validation de la
+    transaction : un utilisateur relu par une requête concurrente avant la
+    validation n'est pas conservé.
+
+    Args:
+        user_id (int): Identifiant de l'utilisateur
+    """
+    key = cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` dont le chargement de l'utilisateur de la session passe
+    par le cache."""
+
+    def get_user(self, user_id):
+        """Retourne l'utilisateur actif d'identifiant ``user_id``, ou ``None``.
+
+        Args:
+            user_id: Identifiant enregistré dans la session
+
+        Returns:
+            User: L'utilisateur, depuis le cache si possible
+        """
+        key = cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        """Authentifie un utilisateur, le mot de passe étant vérifié dans le pool
+        de hachage.
+
+        Une empreinte d'un autre algorithme ou d'un autre coût que ceux des
+        réglages est recalculée et enregistrée.
+
+        Args:
+            request: La requête HTTP
+            username (str): Nom d'utilisateur
+            password (str): Mot de passe en clair
+
+        Returns:
+            User: L'utilisateur authentifié, ou ``None``
+        """
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget(
+                **{UserModel.USERNAME_FIELD: username}
+            )
+        except UserModel.DoesNotExist:
+            # Même durée que pour un utilisateur existant (énumération des comptes)
+            await hashers.amake_password(password)
+            return None
+        correct, must_update = await hashers.averify_password(password, user.password)
+        if not correct or not self.user_can_authenticate(user):
+            return None
+        if must_update:
+            user.password = await hashers.amake_password(password)
+            await user.asave(update_fields=["password"])
+        return user
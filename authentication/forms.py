@@ -1,13 +1,71 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
 from django import forms
 
+from .backends import CachedModelBackend
+from .hashers import amake_password
+
+
+class LoginForm(AuthenticationForm):
+    """Formulaire de connexion dont le mot de passe est vérifié dans le pool de
+    hachage (voir ``ais_valid``)."""
+
+    _authenticated = False
+
+    async def ais_valid(self):
+        """Authentifie l'utilisateur hors du thread de la requête, puis valide le
+        formulaire.
+
+        Returns:
+            bool: True si le formulaire est valide et l'utilisateur authentifié
+        """
+        username = self.data.get("username")
+        password = self.data.get("password")
+        if self.is_bound and username and password:
+            self.user_cache = await CachedModelBackend().aauthenticate(
+                self.request, username=username, password=password
+            )
+            if self.user_cache is None:
+                user_login_failed.send(
+                    sender=__name__,
+                    credentials={"username": username},
+                    request=self.request,
+                )
+            else:
+                self.user_cache.backend = (
+                    f"{CachedModelBackend.__module__}.{CachedModelBackend.__name__}"
+                )
+            self._authenticated = True
+        return self.is_valid()
+
+    def clean(self):
+        """Valide l'authentification déjà faite par ``ais_valid``."""
+        if not self._authenticated:
+            return super().clean()
+        if self.user_cache is None:
+            raise self.get_invalid_login_error()
+        self.confirm_login_allowed(self.user_cache)
+        return self.cleaned_data
+
 
 class SignupForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = get_user_model()
         fields = ["username", "email", "password1", "password2"]
 
+    async def asave(self):
+        """Enregistre le nouvel utilisateur, son mot de passe étant haché dans le
+        pool de hachage.
+
+        Returns:
+            User: L'utilisateur créé
+        """
+        user = forms.ModelForm.save(self, commit=False)
+        user.password = await amake_password(self.cleaned_data["password1"])
+        await user.asave()
+        return user
+
 
 class UserUpdateForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,129 @@
+"""
+Hachage des mots de passe : algorithmes et coûts réglables, calcul hors des
+threads de requête.
+
+Les hacheurs de ce module lisent leur coût dans les réglages (``PBKDF2_ITERATIONS``,
+``SCRYPT_*``, ``ARGON2_*``) ; l'algorithme préféré est choisi par
+``PASSWORD_HASHER``. Une empreinte produite avec un autre algorithme ou un autre
+coût est recalculée à la connexion suivante de l'utilisateur.
+
+Sous ASGI, les vues synchrones partagent un même thread : un hachage de plusieurs
+centaines de millisecondes y retarderait toutes les autres pages. Les vues de
+connexion et d'inscription calculent donc les empreintes avec
+:func:`amake_password` et :func:`averify_password`, dans un pool borné de
+``PASSWORD_HASHING_WORKERS`` threads (les bibliothèques de hachage libèrent le
+GIL pendant le calcul).
+"""
+
+import asyncio
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.checks import Error, Tags, register
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256, ``PBKDF2_ITERATIONS`` itérations."""
+
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """scrypt, coût ``SCRYPT_WORK_FACTOR`` (N), ``SCRYPT_BLOCK_SIZE`` (r) et
+    ``SCRYPT_PARALLELISM`` (p)."""
+
+    @property
+    def work_factor(self):
+        return settings.SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.SCRYPT_PARALLELISM
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id (paquet ``argon2-cffi``), coût ``ARGON2_TIME_COST``,
+    ``ARGON2_MEMORY_COST`` (Kio) et ``ARGON2_PARALLELISM``."""
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+@register(Tags.security)
+def check_preferred_hasher(app_configs, **kwargs):
+    """Vérifie que la bibliothèque du hacheur préféré est installée."""
+    preferred = settings.PASSWORD_HASHERS[0]
+    argon2 = f"{__name__}.Argon2PasswordHasher"
+    if preferred == argon2 and not importlib.util.find_spec("argon2"):
+        return [
+            Error(
+                "PASSWORD_HASHER=argon2 nécessite le paquet argon2-cffi.",
+                hint="Installez argon2-cffi ou choisissez pbkdf2 ou scrypt.",
+                id="authentication.E001",
+            )
+        ]
+    return []
+
+
+def get_executor():
+    """Retourne le pool de threads de hachage, créé au premier usage."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_WORKERS,
+                thread_name_prefix="password-hashing",
+            )
+        return _executor
+
+
+async def _run(function, *args):
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(), function, *args
+    )
+
+
+async def amake_password(password):
+    """Calcule l'empreinte d'un mot de passe dans le pool de hachage.
+
+    Args:
+        password (str): Mot de passe en clair
+
+    Returns:
+        str: Empreinte avec l'algorithme et le coût préférés
+    """
+    return await _run(hashers.make_password, password)
+
+
+async def averify_password(password, encoded):
+    """Vérifie un mot de passe dans le pool de hachage.
+
+    Args:
+        password (str): Mot de passe en clair
+        encoded (str): Empreinte enregistrée
+
+    Returns:
+        tuple: ``(correct, à recalculer)``, comme ``verify_password`` de Django
+    """
+    return await _run(hashers.verify_password, password, encoded)
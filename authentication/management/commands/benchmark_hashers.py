@@ -0,0 +1,92 @@
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import verify_password
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from review.benchmarks import measure, summarize
+
+PASSWORD = "Mot-de-passe-de-test-42"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le coût de la vérification d'un mot de passe (une connexion) pour "
+        "chaque algorithme, avec les coûts des réglages : durée, connexions par "
+        "seconde et par cœur, et débit du pool de hachage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Threads du pool (par défaut PASSWORD_HASHING_WORKERS).",
+        )
+        parser.add_argument("--json", action="store_true", help="Sortie JSON.")
+
+    def handle(self, *args, **options):
+        workers = options["workers"] or settings.PASSWORD_HASHING_WORKERS
+        results = {}
+        # Hacheurs de l'application déclarés dans PASSWORD_HASHERS (réglages)
+        paths = [
+            path
+            for path in settings.PASSWORD_HASHERS
+            if path.startswith("authentication.hashers.")
+        ]
+        for path in paths:
+            hasher = import_string(path)()
+            name = hasher.algorithm
+            if name == "argon2" and not importlib.util.find_spec("argon2"):
+                results[name] = {"skipped": "paquet argon2-cffi absent"}
+                continue
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+            durations = measure(
+                lambda: verify_password(PASSWORD, encoded), options["repeat"]
+            )
+            stats = summarize(durations)
+            results[name] = {
+                "preferred": settings.PASSWORD_HASHERS[0] == path,
+                "cost": self.cost(hasher),
+                **stats,
+                "logins_per_second_per_core": round(1000 / stats["mean_ms"], 1),
+                "pool": self.run_pool(encoded, workers, options["repeat"]),
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2, ensure_ascii=False))
+            return
+        self.stdout.write(f"{os.cpu_count()} cœurs, pool de {workers} threads")
+        for name, stats in results.items():
+            self.stdout.write(f"{name} : {stats}")
+
+    def cost(self, hasher):
+        attributes = (
+            "iterations",
+            "work_factor",
+            "block_size",
+            "time_cost",
+            "memory_cost",
+            "parallelism",
+        )
+        return {
+            attribute: getattr(hasher, attribute)
+            for attribute in attributes
+            if hasattr(hasher, attribute)
+        }
+
+    def run_pool(self, encoded, workers, repeat):
+        """Débit de connexions du pool de hachage, ``workers`` threads occupés."""
+        count = workers * repeat
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as executor:
+            list(
+                executor.map(lambda _: verify_password(PASSWORD, encoded), range(count))
+            )
+        elapsed = time.perf_counter() - start
+        return {"workers": workers, "logins_per_second": round(count / elapsed, 1)}
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0004_username_lower_index"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="user",
+            name="profile_picture_variants",
+        ),
+    ]
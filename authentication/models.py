@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class User(AbstractUser):
@@ -9,6 +10,7 @@ class User(AbstractUser):
 
     Attributes:
         profile_picture (ImageField): Photo de profil optionnelle de l'utilisateur
+        updated_at (datetime): Date et heure de dernière modification du profil
 
     Note:
         Hérite de tous les champs standard de AbstractUser (username, email, password, etc.)
@@ -17,6 +19,13 @@ class User(AbstractUser):
     profile_picture = models.ImageField(
         upload_to="profile_pictures", null=True, blank=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Recherche par préfixe insensible à la casse (page d'abonnement)
+            models.Index(Lower("username"), name="auth_user_username_lower_idx"),
+        ]
 
     def __str__(self):
         """Représentation textuelle de l'utilisateur (son nom d'utilisateur)"""
@@ -0,0 +1,17 @@
+"""
+Récepteurs de signaux de l'application authentication : invalidation du cache
+des utilisateurs connectés (:mod:`authentication.backends`).
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import backends
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Retire du cache un utilisateur modifié (profil, mot de passe…) ou supprimé."""
+    backends.invalidate(instance.pk)
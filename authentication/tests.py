@@ -1,3 +1,117 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .models import User
+
+
+class CachedUserTests(TestCase):
+    """Vérifie le chargement de la session et de l'utilisateur depuis le cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur", password="secret-1")
+        self.client.force_login(self.user)
+
+    def test_no_queries_once_cached(self):
+        url = reverse("update_user")
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, "lecteur")
+
+    def test_update_invalidates_user(self):
+        url = reverse("update_user")
+        self.client.get(url)
+        self.client.post(url, {"username": "lectrice", "email": ""})
+        self.assertContains(self.client.get(url), "lectrice")
+
+    def test_password_change_logs_out_other_sessions(self):
+        other = self.client_class()
+        other.force_login(self.user)
+        other.get(reverse("update_user"))
+
+        self.user.set_password("secret-2")
+        self.user.save()
+        response = other.get(reverse("home"))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('home')}")
+
+    def test_inactive_user_is_rejected(self):
+        self.client.get(reverse("update_user"))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.clear()
+        self.assertEqual(self.client.get(reverse("home")).status_code, 302)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookie_sessions(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("update_user"))
+        with self.assertNumQueries(0):
+            self.client.get(reverse("update_user"))
+
+
+@override_settings(PBKDF2_ITERATIONS=1000)
+class PasswordHashingTests(TestCase):
+    """Vérifie la connexion et l'inscription avec hachage dans le pool."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur", password="secret-1")
+
+    def login(self, password, **params):
+        return self.client.post(
+            reverse("login") + (f"?next={params['next']}" if params else ""),
+            {"username": "lecteur", "password": password},
+        )
+
+    def test_login(self):
+        self.assertRedirects(self.login("secret-1"), reverse("home"))
+        self.assertEqual(self.client.session["_auth_user_id"], str(self.user.pk))
+        self.assertRedirects(self.client.get(reverse("login")), reverse("home"))
+
+    def test_login_next(self):
+        response = self.login("secret-1", next=reverse("user_posts"))
+        self.assertRedirects(response, reverse("user_posts"))
+        response = self.client.get(reverse("login"), {"next": "https://exemple.org/"})
+        self.assertRedirects(response, reverse("home"))
+
+    def test_wrong_password(self):
+        response = self.login("secret-2")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].non_field_errors())
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+    def test_rehash_on_login(self):
+        with self.settings(PBKDF2_ITERATIONS=2000):
+            self.login("secret-1")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+        self.client.logout()
+        with self.settings(
+            PASSWORD_HASHERS=[
+                "authentication.hashers.ScryptPasswordHasher",
+                "authentication.hashers.PBKDF2PasswordHasher",
+            ]
+        ):
+            self.login("secret-1")
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith("scrypt$"))
+            self.assertTrue(self.user.check_password("secret-1"))
+
+    def test_signup(self):
+        response = self.client.post(
+            reverse("signup"),
+            {
+                "username": "nouvelle",
+                "email": "",
+                "password1": "Mot-de-passe-42",
+                "password2": "Mot-de-passe-42",
+            },
+        )
+        self.assertRedirects(response, reverse("home"))
+        user = User.objects.get(username="nouvelle")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(user.check_password("Mot-de-passe-42"))
+        self.assertEqual(self.client.session["_auth_user_id"], str(user.pk))
@@ -1,16 +1,68 @@
-from django.contrib.auth import login
-from django.shortcuts import render, redirect
-from .forms import SignupForm, UserUpdateForm
+from asgiref.sync import sync_to_async
+from django.contrib.auth import alogin
+from django.shortcuts import render, redirect, resolve_url
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.cache import never_cache
+from django.views.decorators.debug import sensitive_post_parameters
+from .forms import LoginForm, SignupForm, UserUpdateForm
 from django.conf import settings
 
 
-def signup(request):
+def _next_url(request):
+    """Page demandée avant la connexion (paramètre ``next``), si elle est sûre."""
+    url = request.POST.get("next", request.GET.get("next"))
+    if url_has_allowed_host_and_scheme(
+        url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
+        return url
+    return resolve_url(settings.LOGIN_REDIRECT_URL)
+
+
+@sensitive_post_parameters()
+@never_cache
+async def login_page(request):
+    """Vue asynchrone de connexion.
+
+    Le mot de passe est vérifié dans le pool de hachage
+    (:mod:`authentication.hashers`) : une vague de connexions n'occupe pas le
+    thread partagé des vues synchrones.
+
+    Args:
+        request: La requête HTTP
+
+    Returns:
+        HttpResponse: Page de connexion, ou redirection une fois connecté
+    """
+    request.user = await request.auser()
+    if request.user.is_authenticated:
+        return redirect(_next_url(request))
+    form = LoginForm(request)
+    if request.method == "POST":
+        form = LoginForm(request, data=request.POST)
+        if await form.ais_valid():
+            await alogin(request, form.get_user())
+            return redirect(_next_url(request))
+    return render(request, "authentication/login.html", context={"form": form})
+
+
+@sensitive_post_parameters()
+async def signup(request):
+    """Vue asynchrone d'inscription, le mot de passe étant haché dans le pool de
+    hachage.
+
+    Args:
+        request: La requête HTTP
+
+    Returns:
+        HttpResponse: Page d'inscription, ou redirection vers le flux
+    """
+    request.user = await request.auser()
     form = SignupForm()
     if request.method == "POST":
         form = SignupForm(request.POST)
-        if form.is_valid():
-            user = form.save()
-            login(request, user)
+        if await sync_to_async(form.is_valid)():
+            user = await form.asave()
+            await alogin(request, user)
             return redirect(settings.LOGIN_REDIRECT_URL)
     return render(request, "authentication/signup.html", context={"form": form})
 
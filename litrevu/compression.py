@@ -0,0 +1,221 @@
+"""
+Compression des réponses dynamiques, négociée avec l'en-tête ``Accept-Encoding``.
+
+:class:`CompressionMiddleware` remplace ``GZipMiddleware`` : il propose brotli
+lorsque le paquet ``brotli`` est installé, puis gzip, et ne compresse que les
+contenus textuels. Les réponses en flux (page d'accueil envoyée au fil du rendu)
+sont compressées morceau par morceau, chaque morceau étant transmis dès qu'il
+est compressé ; les flux d'événements (``text/event-stream``, flux en direct) ne
+sont jamais compressés, afin que chaque événement parte aussitôt émis.
+
+Comme avec ``GZipMiddleware``, l'en-tête de chaque réponse gzip, en flux ou non,
+porte un nom de fichier de longueur aléatoire (jusqu'à ``MAX_RANDOM_BYTES``
+octets) : la taille de la réponse ne trahit plus exactement le contenu compressé
+(atténuation des attaques BREACH contre le jeton CSRF des pages). Le format
+brotli n'offre pas de champ équivalent : ses réponses ne sont pas complétées.
+
+Les fichiers statiques, servis avant ce middleware, ont leurs propres variantes
+précompressées (:mod:`litrevu.staticfiles`).
+"""
+
+import gzip
+import secrets
+import zlib
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+# En deçà, la compression ne fait rien gagner
+MIN_SIZE = 200
+# Qualité brotli adaptée aux réponses dynamiques (11 : fichiers statiques)
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+# Longueur maximale du remplissage aléatoire des réponses gzip
+MAX_RANDOM_BYTES = 100
+
+
+def parse_accept_encoding(accept_encoding):
+    """Valeur ``q`` de chaque codage d'un en-tête ``Accept-Encoding``.
+
+    Un codage sans paramètre ``q`` vaut 1 ; une valeur ``q`` invalide fait
+    ignorer le codage.
+
+    Args:
+        accept_encoding (str): Valeur de l'en-tête
+
+    Returns:
+        dict: Valeur ``q`` (0 à 1) par codage, en minuscules
+    """
+    qualities = {}
+    for value in accept_encoding.split(","):
+        coding, *params = value.split(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params:
+            name, _, param_value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = min(max(float(param_value), 0.0), 1.0)
+                except ValueError:
+                    quality = None
+        if coding and quality is not None:
+            qualities[coding] = quality
+    return qualities
+
+
+def negotiate(accept_encoding, available=None):
+    """Encodage à utiliser pour un en-tête ``Accept-Encoding``.
+
+    L'encodage de plus grande valeur ``q`` est retenu, et à valeur égale le
+    premier de ``available`` ; une valeur nulle refuse l'encodage. ``*``
+    désigne les codages que l'en-tête ne cite pas.
+
+    Args:
+        accept_encoding (str): Valeur de l'en-tête
+        available (iterable): Encodages proposés, par ordre de préférence (par
+            défaut ``"br"`` si le paquet ``brotli`` est installé, puis ``"gzip"``)
+
+    Returns:
+        str: Encodage retenu, ou None (contenu non compressé)
+    """
+    if available is None:
+        available = ("br", "gzip") if brotli is not None else ("gzip",)
+    qualities = parse_accept_encoding(accept_encoding)
+    chosen, best = None, 0.0
+    for encoding in available:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best:
+            chosen, best = encoding, quality
+    return chosen
+
+
+def compress(data, encoding):
+    """Compresse un contenu complet.
+
+    Le contenu gzip est complété par quelques octets aléatoires, comme par
+    ``GZipMiddleware`` (atténuation des attaques BREACH).
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return compress_string(data, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+def _pad_gzip_header(data):
+    """Ajoute à un en-tête gzip (10 premiers octets) un nom de fichier de
+    longueur aléatoire, comme ``compress_string``."""
+    header = bytearray(data[:10])
+    header[3] |= gzip.FNAME
+    filename = b"a" * secrets.randbelow(MAX_RANDOM_BYTES) + b"\x00"
+    return bytes(header) + filename + data[10:]
+
+
+class _StreamCompressor:
+    """Compresse un flux morceau par morceau, chaque morceau étant vidé.
+
+    En gzip, l'en-tête, émis avec le premier morceau, est complété d'un nom de
+    fichier aléatoire (voir :func:`compress`).
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self._started = False
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits=31 : en-tête et somme de contrôle gzip
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def _output(self, data):
+        if self.encoding == "gzip" and not self._started:
+            data = _pad_gzip_header(data)
+        self._started = True
+        return data
+
+    def chunk(self, data):
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._output(
+            self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        )
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._output(self._compressor.flush())
+
+
+def compress_stream(chunks, encoding):
+    """Compresse un itérateur de morceaux d'une réponse en flux."""
+    compressor = _StreamCompressor(encoding)
+    for data in chunks:
+        if data:
+            yield compressor.chunk(data)
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    """Version asynchrone de :func:`compress_stream`."""
+    compressor = _StreamCompressor(encoding)
+    async for data in chunks:
+        if data:
+            yield compressor.chunk(data)
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compresse les réponses textuelles (brotli ou gzip).
+
+    À placer après les middlewares qui servent les fichiers statiques et avant
+    ceux qui modifient le contenu des réponses.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if (
+            response.has_header("Content-Encoding")
+            or content_type in UNCOMPRESSED_TYPES
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+            or (not response.streaming and len(response.content) < MIN_SIZE)
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            # Référence fixée : streaming_content peut être remplacé ensuite
+            content = response.streaming_content
+            if response.is_async:
+                response.streaming_content = acompress_stream(content, encoding)
+            else:
+                response.streaming_content = compress_stream(content, encoding)
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # Empreinte forte rendue faible (RFC 9110, 8.8.1), comme GZipMiddleware
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,294 @@
+"""
+Mesures de performance des requêtes, agrégées par vue (nom d'URL).
+
+:class:`PerformanceMiddleware` mesure pour chaque requête la durée totale, le
+nombre et la durée des requêtes SQL (enveloppe d'exécution installée sur chaque
+connexion), la durée du rendu des gabarits (moteur :class:`TimedDjangoTemplates`)
+et la taille de la réponse. Les mesures sont ajoutées à la réponse (en-tête
+``Server-Timing``, lisible dans les outils de développement du navigateur) et
+cumulées par vue dans :data:`registry` : histogramme des durées et totaux.
+
+La vue :func:`perf_report` (``/_perf/``, réservée aux membres de l'équipe) exporte
+les agrégats en JSON ou au format texte de Prometheus (``?format=prometheus``).
+Les agrégats sont propres à chaque processus serveur.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse
+from django.template.backends.django import DjangoTemplates
+
+# Bornes supérieures des classes de l'histogramme des durées, en millisecondes
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+UNRESOLVED = "<non résolue>"
+
+_current = ContextVar("perf_stats", default=None)
+
+
+class RequestStats:
+    """Mesures de la requête en cours."""
+
+    __slots__ = ("queries", "sql_time", "template_time", "_rendering")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self._rendering = False
+
+
+def _record_query(execute, sql, params, many, context):
+    """Enveloppe d'exécution SQL : compte les requêtes de la requête HTTP en cours."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_time += time.perf_counter() - start
+
+
+def _instrument(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Installe l'enveloppe de mesure sur chaque nouvelle connexion, y compris
+    celles des threads de l'ORM asynchrone."""
+    _instrument(connection)
+
+
+class _TimedTemplate:
+    """Gabarit dont le rendu est chronométré (rendus imbriqués non recomptés)."""
+
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None or stats._rendering:
+            return self._template.render(context, request)
+        stats._rendering = True
+        start = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - start
+            stats._rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Moteur de gabarits Django mesurant la durée des rendus."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+class ViewStats:
+    """Agrégats des requêtes d'une vue."""
+
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.response_bytes = 0
+
+    def add(self, duration, stats, size):
+        self.count += 1
+        index = 0
+        while index < len(BUCKETS_MS) and duration * 1000 > BUCKETS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.duration += duration
+        self.queries += stats.queries
+        self.sql_time += stats.sql_time
+        self.template_time += stats.template_time
+        self.response_bytes += size
+
+    def cumulative(self):
+        """Effectifs cumulés par borne (``+Inf`` en dernier), comme Prometheus."""
+        total, counts = 0, []
+        for count in self.buckets:
+            total += count
+            counts.append(total)
+        return counts
+
+    def quantile(self, rank):
+        """Borne supérieure de la classe contenant le quantile ``rank`` (0-1), en ms."""
+        target = rank * self.count
+        for bound, count in zip((*BUCKETS_MS, None), self.cumulative()):
+            if count >= target:
+                return bound
+        return None
+
+    def as_dict(self):
+        count = self.count or 1
+        return {
+            "count": self.count,
+            "mean_ms": round(self.duration * 1000 / count, 3),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "histogram_ms": dict(
+                zip([*map(str, BUCKETS_MS), "+Inf"], self.cumulative())
+            ),
+            "queries_mean": round(self.queries / count, 2),
+            "sql_ms_mean": round(self.sql_time * 1000 / count, 3),
+            "template_ms_mean": round(self.template_time * 1000 / count, 3),
+            "response_bytes_mean": round(self.response_bytes / count),
+        }
+
+
+class Registry:
+    """Agrégats de toutes les vues du processus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, duration, stats, size):
+        with self._lock:
+            self._views.setdefault(view, ViewStats()).add(duration, stats, size)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                view: stats.as_dict() for view, stats in sorted(self._views.items())
+            }
+
+    def as_prometheus(self):
+        """Export au format texte de Prometheus (durées en secondes)."""
+        name = "litrevu_request_duration_seconds"
+        lines = [
+            f"# HELP {name} Durée des requêtes par vue.",
+            f"# TYPE {name} histogram",
+        ]
+        totals = {
+            "litrevu_db_queries_total": ("Requêtes SQL par vue.", "queries"),
+            "litrevu_db_seconds_total": ("Durée des requêtes SQL.", "sql_time"),
+            "litrevu_template_seconds_total": ("Durée des rendus.", "template_time"),
+            "litrevu_response_bytes_total": ("Taille des réponses.", "response_bytes"),
+        }
+        with self._lock:
+            views = sorted(self._views.items())
+            for view, stats in views:
+                label = _label(view)
+                bounds = [*(str(bound / 1000) for bound in BUCKETS_MS), "+Inf"]
+                for bound, count in zip(bounds, stats.cumulative()):
+                    lines.append(
+                        f'{name}_bucket{{view="{label}",le="{bound}"}} {count}'
+                    )
+                lines.append(f'{name}_sum{{view="{label}"}} {stats.duration}')
+                lines.append(f'{name}_count{{view="{label}"}} {stats.count}')
+            for metric, (help_text, attribute) in totals.items():
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                for view, stats in views:
+                    value = getattr(stats, attribute)
+                    lines.append(f'{metric}{{view="{_label(view)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = Registry()
+
+
+def _server_timing(duration, stats):
+    return (
+        f"total;dur={duration * 1000:.1f}, "
+        f'db;dur={stats.sql_time * 1000:.1f};desc="SQL ({stats.queries})", '
+        f"tpl;dur={stats.template_time * 1000:.1f}"
+    )
+
+
+class PerformanceMiddleware:
+    """Mesure chaque requête, enrichit la réponse (``Server-Timing``) et cumule
+    les mesures par vue. À placer en tête de ``MIDDLEWARE``, après les
+    middlewares qui répondent sans atteindre les vues (fichiers statiques)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connexions ouvertes avant le chargement du middleware (vérifications…)
+        for connection in connections.all(initialized_only=True):
+            _instrument(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, start = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats, start = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - start)
+
+    def finish(self, request, response, stats, duration):
+        match = getattr(request, "resolver_match", None)
+        view = match.url_name or match.view_name if match else UNRESOLVED
+        # Réponses en flux : taille inconnue, durée jusqu'au premier octet
+        size = 0 if response.streaming else len(response.content)
+        registry.record(view, duration, stats, size)
+        if settings.PERF_SERVER_TIMING:
+            response["Server-Timing"] = _server_timing(duration, stats)
+        return response
+
+
+@staff_member_required
+def perf_report(request):
+    """Agrégats de performance du processus, par vue.
+
+    Paramètre de la requête : ``format`` (``json`` par défaut, ou ``prometheus``).
+
+    Args:
+        request: La requête HTTP
+
+    Returns:
+        HttpResponse: Agrégats en JSON ou au format texte de Prometheus
+    """
+    if request.GET.get("format") == "prometheus":
+        return HttpResponse(
+            registry.as_prometheus(), content_type="text/plain; version=0.0.4"
+        )
+    return JsonResponse(registry.as_dict(), json_dumps_params={"indent": 2})
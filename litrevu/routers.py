@@ -0,0 +1,132 @@
+"""
+Routage des lectures vers les bases répliquées (réplicas en lecture seule).
+
+Seules les vues marquées par :func:`replica_read` lisent sur un réplica, et
+uniquement pour les requêtes GET/HEAD : la décision est prise par
+:class:`ReplicaMiddleware` et transmise au routeur par une variable de contexte.
+Toutes les écritures, et toutes les lectures des autres vues, vont à la base
+principale (``default``).
+
+Après une requête d'écriture (POST…), un cookie maintient le navigateur sur la
+base principale pendant ``REPLICA_STICKY_SECONDS`` secondes : la page affichée
+après la redirection (par exemple l'accueil après la création d'un ticket)
+contient bien ce qui vient d'être écrit, même si les réplicas sont en retard.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+PRIMARY = "default"
+STICKY_COOKIE = "primary_db"
+SAFE_METHODS = ("GET", "HEAD")
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replica_read(view):
+    """Marque une vue (fonction ou classe) comme lisible sur un réplica."""
+    view.replica_read = True
+    return view
+
+
+def _is_replica_read(view):
+    view_class = getattr(view, "view_class", None)
+    return getattr(view, "replica_read", False) or getattr(
+        view_class, "replica_read", False
+    )
+
+
+@contextmanager
+def reading_from_replicas():
+    """Envoie les lectures du bloc vers les réplicas (s'il y en a)."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Routeur : lectures sur un réplica tiré au hasard lorsque le contexte le
+    permet, tout le reste sur la base principale."""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and _use_replica.get():
+            return random.choice(replicas)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les réplicas contiennent les mêmes données que la base principale
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas reçoivent le schéma par réplication
+        return db == PRIMARY
+
+
+class ReplicaMiddleware:
+    """Active la lecture sur réplica pour les requêtes GET des vues marquées et
+    pose le cookie de maintien sur la base principale après une écriture."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.enter(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                _use_replica.reset(token)
+        return self.leave(request, response)
+
+    async def __acall__(self, request):
+        token = self.enter(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                _use_replica.reset(token)
+        return self.leave(request, response)
+
+    def enter(self, request):
+        """Active les réplicas si la requête le permet ; retourne le jeton."""
+        if (
+            not settings.DATABASE_REPLICAS
+            or request.method not in SAFE_METHODS
+            or STICKY_COOKIE in request.COOKIES
+        ):
+            return None
+        try:
+            view = resolve(request.path_info).func
+        except Resolver404:
+            return None
+        return _use_replica.set(True) if _is_replica_read(view) else None
+
+    def leave(self, request, response):
+        """Pose le cookie de maintien sur la base principale après une écriture."""
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -54,6 +54,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "litrevu.staticfiles.StaticFilesMiddleware",
+    "litrevu.compression.CompressionMiddleware",
+    "litrevu.perf.PerformanceMiddleware",
+    "litrevu.routers.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -66,7 +70,8 @@ ROOT_URLCONF = "litrevu.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # Moteur Django standard, avec mesure de la durée des rendus (litrevu.perf)
+        "BACKEND": "litrevu.perf.TimedDjangoTemplates",
         "DIRS": [
             BASE_DIR.joinpath("templates"),
         ],
@@ -88,14 +93,163 @@ WSGI_APPLICATION = "litrevu.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Moteur choisi par la variable d'environnement DB_ENGINE : "sqlite" (par défaut)
+# ou "postgresql" (paquet psycopg requis, avec psycopg[pool] pour le pool)
+
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+
+# Connexions persistantes (secondes) désactivées par défaut : sous ASGI, chaque
+# requête synchrone s'exécute dans un thread du pool d'asgiref et une connexion
+# conservée y resterait ouverte sans jamais être recyclée. Sous un serveur WSGI
+# à workers synchrones, une valeur positive économise l'ouverture d'une
+# connexion par requête, au prix d'une connexion maintenue par worker.
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", 0))
+
+if DB_ENGINE == "postgresql":
+    # Pool de connexions natif de Django 5.1 (psycopg_pool) ; sans pool, les
+    # connexions sont conservées entre les requêtes pendant DB_CONN_MAX_AGE
+    # secondes. Le pool et les connexions persistantes sont exclusifs.
+    DB_POOL = os.getenv("DB_POOL", "1") == "1"
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("DB_NAME", "litrevu"),
+            "USER": os.getenv("DB_USER", ""),
+            "PASSWORD": os.getenv("DB_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", ""),
+            "PORT": os.getenv("DB_PORT", ""),
+            "CONN_MAX_AGE": 0 if DB_POOL else DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": (
+                {
+                    "pool": {
+                        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+                        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+                        "timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+                    }
+                }
+                if DB_POOL
+                else {}
+            ),
+        }
+    }
+else:
+    # SQLite en mode WAL : les lectures ne sont plus bloquées par les écritures.
+    # synchronous=NORMAL suffit en WAL (pas de corruption en cas de coupure),
+    # mmap_size et cache_size (en Kio si négatif) réduisent les lectures disque.
+    # Les transactions d'écriture prennent le verrou dès leur début (IMMEDIATE)
+    # et attendent jusqu'à DB_TIMEOUT secondes un verrou occupé.
+    DB_SQLITE_MMAP_SIZE = int(os.getenv("DB_SQLITE_MMAP_SIZE", 128 * 1024 * 1024))
+    DB_SQLITE_CACHE_KIB = int(os.getenv("DB_SQLITE_CACHE_KIB", 20_000))
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "OPTIONS": {
+                "timeout": int(os.getenv("DB_TIMEOUT", 20)),
+                "transaction_mode": "IMMEDIATE",
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    f"PRAGMA mmap_size={DB_SQLITE_MMAP_SIZE};"
+                    f"PRAGMA cache_size={-DB_SQLITE_CACHE_KIB};"
+                    "PRAGMA temp_store=MEMORY;"
+                ),
+            },
+        }
     }
-}
 
 
+# Réplicas en lecture (variable DB_REPLICAS, valeurs séparées par des virgules) :
+# chemins de fichiers SQLite, ou hôtes PostgreSQL. Chaque réplica reprend la
+# configuration de la base principale. Les pages marquées par
+# litrevu.routers.replica_read y lisent en GET ; après une écriture, le
+# navigateur reste sur la base principale pendant REPLICA_STICKY_SECONDS secondes.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+    filter(None, (value.strip() for value in os.getenv("DB_REPLICAS", "").split(","))),
+    start=1,
+):
+    alias = f"replica{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST" if DB_ENGINE == "postgresql" else "NAME": replica,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["litrevu.routers.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+
+# Diffusion en direct du flux (review.live) : courtier "local" (un seul
+# processus serveur) ou "database" (plusieurs processus : lecture périodique de
+# la table du flux toutes les LIVE_POLL_INTERVAL secondes). Un commentaire est
+# envoyé toutes les LIVE_HEARTBEAT secondes pour maintenir la connexion ouverte.
+# La connexion restant ouverte, le flux n'est proposé que sous un serveur ASGI,
+# sauf si LIVE_FEED_ENABLED vaut 1 (toujours) ou 0 (jamais).
+LIVE_FEED_ENABLED = (
+    os.getenv("LIVE_FEED_ENABLED") == "1" if os.getenv("LIVE_FEED_ENABLED") else None
+)
+LIVE_BROKER = os.getenv("LIVE_BROKER", "local")
+LIVE_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", 2))
+# Courtier "database" : les entrées des LIVE_POLL_WINDOW dernières secondes sont
+# relues à chaque lecture, pour ne pas manquer une transaction validée tardivement
+LIVE_POLL_WINDOW = float(os.getenv("LIVE_POLL_WINDOW", 60))
+LIVE_HEARTBEAT = float(os.getenv("LIVE_HEARTBEAT", 15))
+
+# Page d'accueil : FEED_PAGE_SIZE éléments par page. Avec FEED_STREAMING=1, la
+# page est envoyée au fil du rendu (les cartes par lots de FEED_STREAM_CHUNK_SIZE) :
+# le premier octet part avant le chargement des éléments (serveur ASGI requis)
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", 20))
+FEED_STREAMING = os.getenv("FEED_STREAMING", "0") == "1"
+FEED_STREAM_CHUNK_SIZE = int(os.getenv("FEED_STREAM_CHUNK_SIZE", 10))
+
+# Mesures de performance (litrevu.perf) : en-tête Server-Timing sur les réponses,
+# désactivé par défaut car il révèle à tout client le nombre et la durée des
+# requêtes SQL (à n'activer qu'en développement ou derrière un accès restreint)
+PERF_SERVER_TIMING = os.getenv("PERF_SERVER_TIMING", "0") == "1"
+
+# Sessions (variable SESSION_BACKEND) : "cached_db" (par défaut : lues dans le
+# cache, écrites dans le cache et la base), "cache" (cache seul : un cache partagé
+# et persistant est alors nécessaire), "signed_cookies" (données signées dans le
+# cookie, aucune lecture serveur) ou "db" (base seule, réglage par défaut de Django)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "cached_db")
+SESSION_ENGINE = f"django.contrib.sessions.backends.{SESSION_BACKEND}"
+
+# Utilisateur connecté chargé depuis le cache (authentication.backends), pendant
+# AUTH_USER_CACHE_TIMEOUT secondes au plus ; invalidé à chaque modification
+AUTHENTICATION_BACKENDS = ["authentication.backends.CachedModelBackend"]
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 300))
+
+# Hachage des mots de passe (authentication.hashers) : algorithme préféré
+# PASSWORD_HASHER, "pbkdf2" (par défaut), "scrypt" ou "argon2" (paquet
+# argon2-cffi requis), et coût de chaque algorithme. Les empreintes d'un autre
+# algorithme ou d'un autre coût sont recalculées à la connexion suivante. Les
+# vues de connexion et d'inscription hachent dans un pool de
+# PASSWORD_HASHING_WORKERS threads.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+_PASSWORD_HASHERS = {
+    "pbkdf2": "authentication.hashers.PBKDF2PasswordHasher",
+    "scrypt": "authentication.hashers.ScryptPasswordHasher",
+    "argon2": "authentication.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", 870_000))
+SCRYPT_WORK_FACTOR = int(os.getenv("SCRYPT_WORK_FACTOR", 2**14))
+SCRYPT_BLOCK_SIZE = int(os.getenv("SCRYPT_BLOCK_SIZE", 8))
+SCRYPT_PARALLELISM = int(os.getenv("SCRYPT_PARALLELISM", 5))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 2))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 102_400))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 8))
+PASSWORD_HASHING_WORKERS = int(
+    os.getenv("PASSWORD_HASHING_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -133,6 +287,19 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR.joinpath("static/")]
 
+# Construction (python manage.py collectstatic) : noms empreintés et variantes
+# précompressées (gzip, brotli si le paquet est installé) dans STATIC_ROOT, servis
+# par litrevu.staticfiles.StaticFilesMiddleware. Les noms empreintés sont mis en
+# cache un an par les navigateurs, les autres STATIC_MAX_AGE secondes.
+STATIC_ROOT = os.getenv("STATIC_ROOT", BASE_DIR / "staticfiles")
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", 60))
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "litrevu.staticfiles.CompressedManifestStaticFilesStorage"
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -146,3 +313,37 @@ LOGOUT_REDIRECT_URL = "login"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR.joinpath("media")
+
+# Images de tickets : écriture au fil de l'eau dans un fichier temporaire borné
+# (review.uploads), puis refus des fichiers ou des images trop grands
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+IMAGE_UPLOAD_MAX_PIXELS = int(os.getenv("IMAGE_UPLOAD_MAX_PIXELS", 40_000_000))
+
+# Une image partagée libérée moins de IMAGE_RELEASE_GRACE secondes après avoir été
+# réutilisée est conservée (le ticket qui la réutilise n'est peut-être pas encore
+# validé) ; la commande clean_images supprime ensuite les fichiers orphelins
+IMAGE_RELEASE_GRACE = float(os.getenv("IMAGE_RELEASE_GRACE", 600))
+
+# Nombre de processus du pool de traitement des images (0 : traitement immédiat)
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", "2"))
+
+# Cache (fragments des cartes du flux, versions des objets affichés) : mémoire
+# locale par défaut ; un cache partagé (fichiers, Redis…) est nécessaire lorsque
+# plusieurs processus servent l'application
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "litrevu"),
+    }
+}
+CARD_CACHE_TIMEOUT = int(os.getenv("CARD_CACHE_TIMEOUT", 24 * 60 * 60))
+
+# Graphe d'abonnements : taille du cache propre à chaque processus (utilisateurs)
+# et durée de conservation dans le cache partagé
+FOLLOW_CACHE_LOCAL_SIZE = int(os.getenv("FOLLOW_CACHE_LOCAL_SIZE", 10_000))
+FOLLOW_CACHE_TIMEOUT = int(os.getenv("FOLLOW_CACHE_TIMEOUT", 24 * 60 * 60))
+
+# Nombre maximal de noms d'utilisateur par abonnement en masse (page d'abonnement)
+BULK_FOLLOW_MAX = int(os.getenv("BULK_FOLLOW_MAX", 1000))
@@ -0,0 +1,229 @@
+"""
+Fichiers statiques : noms empreintés, variantes précompressées et service direct.
+
+:class:`CompressedManifestStaticFilesStorage` est le stockage de ``collectstatic`` :
+chaque fichier est copié sous un nom contenant l'empreinte de son contenu
+(``styles.3f2a….css``, références des feuilles de style réécrites), puis les
+fichiers texte reçoivent des variantes précompressées ``.gz`` et, si le paquet
+``brotli`` est installé, ``.br``.
+
+:class:`StaticFilesMiddleware` sert ces fichiers depuis ``STATIC_ROOT`` avant tout
+autre traitement de la requête (sessions, authentification, résolution d'URL) :
+la variante adaptée à l'en-tête ``Accept-Encoding`` est envoyée, avec un cache
+d'un an (``immutable``) pour les noms empreintés et de ``STATIC_MAX_AGE`` secondes
+pour les autres. L'index des fichiers est construit au démarrage : les fichiers
+collectés ensuite ne sont servis qu'après redémarrage.
+"""
+
+import gzip
+import json
+import mimetypes
+import os
+import posixpath
+from email.utils import formatdate
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .compression import negotiate
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".map", ".svg", ".txt", ".json", ".html")
+# Une variante n'est conservée que si elle fait gagner au moins 5 %
+MIN_COMPRESSION_RATIO = 0.95
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Encodages proposés, par ordre de préférence : (en-tête, suffixe du fichier)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress_file(path):
+    """Écrit les variantes compressées d'un fichier à côté de celui-ci.
+
+    Args:
+        path (str): Chemin du fichier
+
+    Returns:
+        list: Chemins des variantes écrites
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    compressors = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        compressors.append((".br", lambda data: brotli.compress(data, quality=11)))
+    written = []
+    for suffix, compress in compressors:
+        compressed = compress(data)
+        if len(compressed) <= len(data) * MIN_COMPRESSION_RATIO:
+            with open(path + suffix, "wb") as file:
+                file.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Stockage des fichiers statiques à noms empreintés et variantes compressées.
+
+    Tant que ``collectstatic`` n'a pas été exécuté (développement, tests), les
+    fichiers sont référencés sous leur nom d'origine.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name, hashed_name in self.hashed_files.items():
+            for stored in {name, hashed_name}:
+                if stored.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(stored):
+                    compress_file(self.path(stored))
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+
+class StaticFile:
+    """Fichier statique servi, avec ses variantes compressées."""
+
+    __slots__ = (
+        "path",
+        "size",
+        "content_type",
+        "etag",
+        "last_modified",
+        "cache_control",
+        "variants",
+    )
+
+    def __init__(self, path, immutable=False):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/") or self.content_type in (
+            "application/javascript",
+            "application/json",
+        ):
+            self.content_type += "; charset=utf-8"
+        self.etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.cache_control = (
+            f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+            if immutable
+            else f"public, max-age={settings.STATIC_MAX_AGE}"
+        )
+        self.variants = {
+            encoding: (path + suffix, os.path.getsize(path + suffix))
+            for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+        }
+
+    def negotiate(self, accept_encoding):
+        """Variante à envoyer : ``(chemin, taille, encodage ou None)``."""
+        encoding = negotiate(
+            accept_encoding,
+            [encoding for encoding, _ in ENCODINGS if encoding in self.variants],
+        )
+        if encoding is None:
+            return self.path, self.size, None
+        return (*self.variants[encoding], encoding)
+
+
+def build_index(root, prefix):
+    """Indexe les fichiers collectés dans ``root`` par chemin d'URL.
+
+    Les noms empreintés (valeurs du manifeste de ``collectstatic``) sont servis
+    avec un cache permanent.
+
+    Args:
+        root (str): Répertoire des fichiers collectés (``STATIC_ROOT``)
+        prefix (str): Préfixe d'URL des fichiers (``STATIC_URL``)
+
+    Returns:
+        dict: :class:`StaticFile` par chemin d'URL
+    """
+    if not root or not os.path.isdir(root):
+        return {}
+    hashed = set()
+    manifest = os.path.join(root, ManifestStaticFilesStorage.manifest_name)
+    if os.path.exists(manifest):
+        with open(manifest, encoding="utf-8") as file:
+            hashed = set(json.load(file).get("paths", {}).values())
+    skipped = tuple(suffix for encoding, suffix in ENCODINGS)
+    index = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            if name.endswith(skipped) or path == manifest:
+                continue
+            relative = os.path.relpath(path, root).replace(os.sep, "/")
+            index[prefix + relative] = StaticFile(path, immutable=relative in hashed)
+    return index
+
+
+class StaticFilesMiddleware:
+    """Sert les fichiers collectés de ``STATIC_ROOT`` sans atteindre les vues.
+
+    À placer juste après ``SecurityMiddleware``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        prefix = posixpath.join("/", settings.STATIC_URL, "")
+        self.files = build_index(settings.STATIC_ROOT, prefix)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        """Réponse pour un fichier statique indexé, ou None."""
+        if request.method not in ("GET", "HEAD"):
+            return None
+        static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return None
+        headers = {
+            "Cache-Control": static_file.cache_control,
+            "ETag": static_file.etag,
+            "Last-Modified": static_file.last_modified,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and static_file.etag in parse_etags(if_none_match):
+            return HttpResponseNotModified(headers=headers)
+
+        path, size, encoding = static_file.negotiate(
+            request.headers.get("Accept-Encoding", "")
+        )
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        if request.method == "HEAD":
+            response = HttpResponse(
+                content_type=static_file.content_type, headers=headers
+            )
+            response["Content-Length"] = size
+            return response
+        return FileResponse(
+            open(path, "rb"),
+            content_type=static_file.content_type,
+            headers=headers,
+            filename=os.path.basename(static_file.path),
+        )
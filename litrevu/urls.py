@@ -17,7 +17,6 @@ Including another URLconf
 
 from django.contrib import admin
 from django.contrib.auth.views import (
-    LoginView,
     LogoutView,
     PasswordChangeView,
     PasswordChangeDoneView,
@@ -25,19 +24,14 @@ from django.contrib.auth.views import (
 from django.conf import settings
 from django.urls import path
 from django.conf.urls.static import static
+import litrevu.perf
 import review.views
 import authentication.views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path(
-        "",
-        LoginView.as_view(
-            template_name="authentication/login.html",
-            redirect_authenticated_user=True,
-        ),
-        name="login",
-    ),
+    path("_perf/", litrevu.perf.perf_report, name="perf"),
+    path("", authentication.views.login_page, name="login"),
     path("update-user/", authentication.views.update_user, name="update_user"),
     path(
         "logout/",
@@ -47,6 +41,7 @@ urlpatterns = [
         name="logout",
     ),
     path("home/", review.views.home, name="home"),
+    path("home/stream/", review.views.feed_stream, name="feed_stream"),
     path("signup/", authentication.views.signup, name="signup"),
     path(
         "password-change/",
@@ -68,7 +63,7 @@ urlpatterns = [
     ),
     path(
         "ticket/detail/<int:pk>/",
-        review.views.TicketDetailView.as_view(),
+        review.views.ticket_detail,
         name="detail_ticket",
     ),
     path(
@@ -93,7 +88,7 @@ urlpatterns = [
     ),
     path(
         "review/detail/<int:pk>/",
-        review.views.ReviewDetailView.as_view(),
+        review.views.review_detail,
         name="detail_review",
     ),
     path(
@@ -107,12 +102,15 @@ urlpatterns = [
         name="delete_review",
     ),
     path("follow/", review.views.FollowUsersView.as_view(), name="follow_users"),
+    path("follow/bulk/", review.views.BulkFollowView.as_view(), name="bulk_follow"),
+    path("follow/search/", review.views.search_users, name="search_users"),
     path(
         "unfollow/<int:user_id>/",
         review.views.UnfollowUserView.as_view(),
         name="unfollow_user",
     ),
     path("user_posts/", review.views.user_posts, name="user_posts"),
+    path("search/", review.views.search, name="search"),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,116 @@
+"""
+Outils communs aux commandes de mesure de performance (``benchmark_*``).
+
+Les mesures s'exécutent dans une base de données jetable, créée comme la base de
+test de Django, afin de ne jamais modifier la base de développement.
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def throwaway_database(verbosity=0, name=None, options=None):
+    """Crée une base de données temporaire migrée, détruite en sortie de bloc.
+
+    Args:
+        verbosity (int): Verbosité de la création et de la destruction
+        name (str): Nom de la base (par défaut celui de la base de test ; sous
+            SQLite, une base en mémoire, partagée entre les threads du processus)
+        options (dict): Options de connexion remplaçant celles des réglages
+    """
+    settings_dict = connection.settings_dict
+    old_name, old_test_name = settings_dict["NAME"], settings_dict["TEST"]["NAME"]
+    old_options = settings_dict["OPTIONS"]
+    if name is not None:
+        settings_dict["TEST"]["NAME"] = name
+    if options is not None:
+        settings_dict["OPTIONS"] = options
+    connection.close()
+    connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        settings_dict["TEST"]["NAME"] = old_test_name
+        settings_dict["OPTIONS"] = old_options
+
+
+def measure(function, repeat):
+    """Exécute une fonction plusieurs fois et retourne les durées en millisecondes.
+
+    Args:
+        function (callable): Fonction à mesurer, appelée sans argument
+        repeat (int): Nombre d'exécutions
+
+    Returns:
+        list: Durée de chaque exécution, en millisecondes
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def percentile(durations, rank):
+    """Retourne le percentile ``rank`` (0-100) d'une liste de durées."""
+    if len(durations) == 1:
+        return durations[0]
+    return statistics.quantiles(durations, n=100, method="inclusive")[rank - 1]
+
+
+def summarize(durations):
+    """Résume une liste de durées (médiane, p95, p99, moyenne) en millisecondes."""
+    return {
+        "count": len(durations),
+        "mean_ms": round(statistics.fmean(durations), 3),
+        "p50_ms": round(statistics.median(durations), 3),
+        "p95_ms": round(percentile(durations, 95), 3),
+        "p99_ms": round(percentile(durations, 99), 3),
+    }
+
+
+def add_dataset_arguments(parser, users=200):
+    """Ajoute les options du jeu de données synthétique (voir ``seed_dataset``).
+
+    Args:
+        parser: Analyseur d'arguments de la commande
+        users (int): Nombre d'utilisateurs par défaut
+    """
+    parser.add_argument("--users", type=int, default=users)
+    parser.add_argument("--tickets", type=int, default=5, help="par utilisateur")
+    parser.add_argument("--reviews", type=int, default=3, help="par utilisateur")
+    parser.add_argument(
+        "--follows", type=int, default=20, help="abonnements moyens par utilisateur"
+    )
+    parser.add_argument(
+        "--days", type=int, default=180, help="période couverte par les dates"
+    )
+    parser.add_argument(
+        "--images", type=float, default=0.3, help="proportion de tickets illustrés"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="graine aléatoire")
+
+
+def dataset_arguments(options):
+    """Arguments de ``seed_dataset`` tirés des options de la commande.
+
+    Returns:
+        dict: Arguments nommés de ``seed_dataset``
+    """
+    return {
+        "users": options["users"],
+        "tickets_per_user": options["tickets"],
+        "reviews_per_user": options["reviews"],
+        "follows_per_user": options["follows"],
+        "seed": options["seed"],
+        "days": options["days"],
+        "image_ratio": options["images"],
+    }
@@ -0,0 +1,99 @@
+"""
+Versions des cartes (tickets, critiques) dont le rendu HTML est mis en cache.
+
+Une carte affiche plusieurs objets : l'élément lui-même, son auteur et, pour une
+critique, le ticket auquel elle répond et l'auteur de ce ticket. Chacun de ces
+objets possède dans le cache une version, remplacée à chaque modification (voir
+:mod:`review.signals`). La clé d'un fragment mis en cache (balise ``cardcache``)
+combine les versions de tous les objets affichés : une carte modifiée change de
+clé et l'ancien fragment, qui n'est plus jamais lu, finit par expirer.
+"""
+
+import uuid
+
+from django.core.cache import cache
+
+from .models import Review, Ticket
+
+KEY_PREFIX = "card-version"
+
+
+def version_key(model, pk):
+    """Clé de cache de la version d'un objet affiché dans une carte."""
+    return f"{KEY_PREFIX}:{model._meta.label_lower}:{pk}"
+
+
+def invalidate(model, pk):
+    """Attribue une nouvelle version à un objet : les cartes qui l'affichent
+    seront rendues à nouveau.
+
+    Args:
+        model (type): Modèle de l'objet modifié (ticket, critique, utilisateur)
+        pk (int): Clé primaire de l'objet modifié
+    """
+    cache.set(version_key(model, pk), uuid.uuid4().hex, None)
+
+
+def dependencies(item):
+    """Retourne les clés de version des objets affichés par la carte d'un élément.
+
+    Le ticket d'une critique n'est pris en compte que s'il a été chargé avec
+    elle (``select_related``), afin de ne déclencher aucune requête.
+    """
+    user_model = type(item)._meta.get_field("user").related_model
+    keys = [version_key(type(item), item.pk), version_key(user_model, item.user_id)]
+    if isinstance(item, Review) and item.ticket_id:
+        keys.append(version_key(Ticket, item.ticket_id))
+        if Review.ticket.is_cached(item):
+            keys.append(version_key(user_model, item.ticket.user_id))
+    return keys
+
+
+def _missing_versions(keys, versions):
+    """Nouvelles versions des objets qui n'en ont pas encore dans le cache."""
+    return {
+        key: uuid.uuid4().hex
+        for item_keys in keys
+        for key in item_keys
+        if key not in versions
+    }
+
+
+def _annotate(items, keys, versions):
+    for item, item_keys in zip(items, keys):
+        item.card_version = ".".join(versions[key] for key in item_keys)
+    return items
+
+
+def with_versions(items):
+    """Renseigne l'attribut ``card_version`` de chaque élément à afficher.
+
+    Les versions de tous les éléments sont lues en une seule requête au cache ;
+    les objets sans version connue en reçoivent une nouvelle.
+
+    Args:
+        items (iterable): Tickets et critiques à afficher
+
+    Returns:
+        list: Éléments annotés de leur version de carte
+    """
+    items = list(items)
+    keys = [dependencies(item) for item in items]
+    versions = cache.get_many({key for item_keys in keys for key in item_keys})
+    missing = _missing_versions(keys, versions)
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return _annotate(items, keys, versions)
+
+
+async def awith_versions(items):
+    """Version asynchrone de :func:`with_versions` (API asynchrone du cache)."""
+    items = list(items)
+    keys = [dependencies(item) for item in items]
+    versions = await cache.aget_many({key for item_keys in keys for key in item_keys})
+    missing = _missing_versions(keys, versions)
+    if missing:
+        await cache.aset_many(missing, None)
+        versions.update(missing)
+    return _annotate(items, keys, versions)
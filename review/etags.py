@@ -0,0 +1,143 @@
+"""
+Empreintes (ETag) des pages de lecture, pour les requêtes GET conditionnelles.
+
+Chaque empreinte est obtenue par une seule requête d'agrégat sur les dates de
+modification (``updated_at``) et le nombre des objets affichés par la page :
+lorsque le navigateur présente une empreinte identique (``If-None-Match``), la
+vue répond ``304 Not Modified`` sans exécuter ses requêtes ni rendre le gabarit.
+
+Les vues concernées sont asynchrones : les empreintes sont calculées avec l'ORM
+asynchrone, avant l'appel de la vue.
+
+L'empreinte inclut aussi l'utilisateur connecté (son nom est affiché dans les
+pages) et le jeton CSRF du formulaire de déconnexion. Aucune empreinte n'est
+produite lorsque des messages sont en attente : ils doivent être affichés.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+
+from authentication.models import User
+from .models import FeedEntry, Review, Ticket
+
+
+async def _etag(request, *stamps):
+    """Combine les marqueurs d'une page avec ceux de l'utilisateur connecté."""
+    user = await request.auser()
+    if len(messages.get_messages(request)):
+        return None
+    parts = (
+        user.pk,
+        user.updated_at,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        *stamps,
+    )
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _per_user(queryset, aggregate):
+    """Sous-requête d'agrégat sur les lignes d'un utilisateur (``user`` externe)."""
+    return Subquery(
+        queryset.filter(user=OuterRef("pk"))
+        .order_by()
+        .values("user")
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+async def home_etag(request):
+    """Empreinte d'une page du flux : nombre d'entrées et dernière modification."""
+    user = await request.auser()
+    stamp = await FeedEntry.objects.filter(owner=user).aaggregate(
+        count=Count("pk"), updated_at=Max("updated_at")
+    )
+    return await _etag(
+        request, request.GET.get("cursor"), settings.FEED_PAGE_SIZE, *stamp.values()
+    )
+
+
+async def user_posts_etag(request):
+    """Empreinte des posts de l'utilisateur, tickets des critiques compris."""
+    user = await request.auser()
+    stamp = await (
+        User.objects.filter(pk=user.pk)
+        .annotate(
+            tickets=_per_user(Ticket.objects, Count("pk")),
+            tickets_updated_at=_per_user(Ticket.objects, Max("updated_at")),
+            reviews=_per_user(Review.objects, Count("pk")),
+            reviews_updated_at=_per_user(Review.objects, Max("updated_at")),
+            answered_updated_at=_per_user(Review.objects, Max("ticket__updated_at")),
+            answered_author_updated_at=_per_user(
+                Review.objects, Max("ticket__user__updated_at")
+            ),
+        )
+        .values_list(
+            "tickets",
+            "tickets_updated_at",
+            "reviews",
+            "reviews_updated_at",
+            "answered_updated_at",
+            "answered_author_updated_at",
+        )
+        .afirst()
+    )
+    return await _etag(request, stamp)
+
+
+async def ticket_etag(request, pk):
+    """Empreinte du détail d'un ticket : le ticket, ses critiques et leurs auteurs."""
+    stamp = await Ticket.objects.filter(pk=pk).aaggregate(
+        updated_at=Max("updated_at"),
+        author_updated_at=Max("user__updated_at"),
+        reviews=Count("review"),
+        reviews_updated_at=Max("review__updated_at"),
+        reviewers_updated_at=Max("review__user__updated_at"),
+    )
+    return await _etag(request, *stamp.values())
+
+
+async def review_etag(request, pk):
+    """Empreinte du détail d'une critique : la critique, son ticket et leurs auteurs."""
+    stamp = await Review.objects.filter(pk=pk).aaggregate(
+        updated_at=Max("updated_at"),
+        author_updated_at=Max("user__updated_at"),
+        ticket_updated_at=Max("ticket__updated_at"),
+        ticket_author_updated_at=Max("ticket__user__updated_at"),
+    )
+    return await _etag(request, *stamp.values())
+
+
+def conditional(etag_func):
+    """Décorateur de vue asynchrone : répond ``304 Not Modified`` si l'empreinte
+    n'a pas changé, et impose au navigateur de revalider la page à chaque visite.
+
+    Équivalent de ``django.views.decorators.http.condition``, qui appelle la
+    fonction d'empreinte de manière synchrone.
+
+    Args:
+        etag_func (callable): Fonction asynchrone calculant l'empreinte de la page
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if etag and request.method in ("GET", "HEAD"):
+                response.headers.setdefault("ETag", etag)
+            return response
+
+        return cache_control(private=True, no_cache=True)(inner)
+
+    return decorator
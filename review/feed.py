@@ -0,0 +1,403 @@
+"""
+Moteur du flux d'activité de la page d'accueil.
+
+Le flux est matérialisé dans la table :class:`~review.models.FeedEntry` (fan-out à
+l'écriture) : chaque ticket sans critique et chaque critique est recopié dans le
+flux de son auteur et de ses abonnés au moment où il est publié, et les
+abonnements/désabonnements ajoutent ou retirent les entrées correspondantes.
+La lecture d'une page est alors un simple parcours de l'index
+``(owner, created_at, item_type, item_id)``, découpé en pages de taille fixe avec
+un curseur opaque ``(created_at, type, pk)``.
+"""
+
+import asyncio
+import base64
+import binascii
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import follows
+from .models import FeedEntry, Review, Ticket, UserFollows
+
+PAGE_SIZE = 20
+BATCH_SIZE = 1000
+
+TICKET = FeedEntry.TICKET
+REVIEW = FeedEntry.REVIEW
+
+
+class InvalidCursor(ValueError):
+    """Levée lorsqu'un curseur de pagination ne peut pas être décodé."""
+
+
+def encode_cursor(created_at, item_type, pk):
+    """Encode la position d'un élément du flux en curseur opaque.
+
+    Args:
+        created_at (datetime): Date de création de l'élément
+        item_type (str): Type de l'élément (``"ticket"`` ou ``"review"``)
+        pk (int): Clé primaire de l'élément
+
+    Returns:
+        str: Curseur utilisable dans une URL
+    """
+    raw = f"{created_at.isoformat()}|{item_type}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Décode un curseur produit par :func:`encode_cursor`.
+
+    Args:
+        cursor (str): Curseur opaque
+
+    Returns:
+        tuple: ``(created_at, item_type, pk)``
+
+    Raises:
+        InvalidCursor: Si le curseur est mal formé
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, item_type, pk = raw.split("|")
+        if item_type not in (TICKET, REVIEW):
+            raise ValueError(item_type)
+        return datetime.fromisoformat(created_at), item_type, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise InvalidCursor(cursor) from error
+
+
+def _after_cursor(cursor):
+    """Construit le filtre « après le curseur » dans l'ordre d'affichage du flux.
+
+    Le flux est trié par ``created_at``, type puis ``item_id`` décroissants.
+    """
+    if cursor is None:
+        return Q()
+    created_at, item_type, pk = cursor
+    return (
+        Q(created_at__lt=created_at)
+        | Q(created_at=created_at, item_type__lt=item_type)
+        | Q(created_at=created_at, item_type=item_type, item_id__lt=pk)
+    )
+
+
+def _before_cursor(cursor):
+    """Filtre « avant le curseur » : éléments plus récents que la position donnée."""
+    created_at, item_type, pk = cursor
+    return (
+        Q(created_at__gt=created_at)
+        | Q(created_at=created_at, item_type__gt=item_type)
+        | Q(created_at=created_at, item_type=item_type, item_id__gt=pk)
+    )
+
+
+def cursor_for(item):
+    """Curseur désignant la position d'un ticket ou d'une critique dans le flux."""
+    item_type = REVIEW if isinstance(item, Review) else TICKET
+    return encode_cursor(item.created_at, item_type, item.pk)
+
+
+async def aget_newer_rows(user_id, cursor, limit=PAGE_SIZE):
+    """Lignes du flux d'un utilisateur plus récentes qu'un curseur, de la plus
+    ancienne à la plus récente.
+
+    Args:
+        user_id (int): Clé primaire du propriétaire du flux
+        cursor (str): Curseur de la position de référence
+        limit (int): Nombre maximal de lignes
+
+    Returns:
+        list: Lignes ``(created_at, item_type, item_id)``
+
+    Raises:
+        InvalidCursor: Si le curseur est mal formé
+    """
+    rows = (
+        FeedEntry.objects.filter(
+            Q(owner_id=user_id), _before_cursor(decode_cursor(cursor))
+        )
+        .order_by("created_at", "item_type", "item_id")
+        .values_list("created_at", "item_type", "item_id")[:limit]
+    )
+    return [row async for row in rows]
+
+
+def get_feed_page(user, cursor=None, page_size=PAGE_SIZE):
+    """Retourne une page du flux d'activité d'un utilisateur.
+
+    Args:
+        user (User): Utilisateur dont on construit le flux
+        cursor (str): Curseur de la page précédente (optionnel)
+        page_size (int): Nombre d'éléments par page
+
+    Returns:
+        tuple: ``(items, next_cursor)`` où ``items`` est la liste des tickets et
+        critiques de la page et ``next_cursor`` le curseur de la page suivante
+        (``None`` s'il n'y en a plus)
+
+    Raises:
+        InvalidCursor: Si le curseur est mal formé
+    """
+    rows, next_cursor = _paginate(list(_page_rows(user, cursor, page_size)), page_size)
+    return _hydrate(rows), next_cursor
+
+
+async def aget_feed_page(user, cursor=None, page_size=PAGE_SIZE):
+    """Version asynchrone de :func:`get_feed_page` (ORM asynchrone).
+
+    Les tickets et les critiques de la page sont chargés simultanément.
+    """
+    rows, next_cursor = await aget_feed_rows(user, cursor, page_size)
+    return await ahydrate(rows), next_cursor
+
+
+async def aget_feed_rows(user, cursor=None, page_size=PAGE_SIZE):
+    """Lignes ``(created_at, type, pk)`` d'une page du flux, sans les objets.
+
+    Les objets sont ensuite chargés par :func:`ahydrate`, en une fois ou par
+    lots (page envoyée au fil du rendu).
+
+    Returns:
+        tuple: ``(rows, next_cursor)``
+
+    Raises:
+        InvalidCursor: Si le curseur est mal formé
+    """
+    rows = [row async for row in _page_rows(user, cursor, page_size)]
+    return _paginate(rows, page_size)
+
+
+def _page_rows(user, cursor, page_size):
+    """Lignes ``(created_at, type, pk)`` de la page, plus une pour la suite."""
+    position = decode_cursor(cursor) if cursor else None
+    return (
+        FeedEntry.objects.filter(Q(owner=user), _after_cursor(position))
+        .order_by("-created_at", "-item_type", "-item_id")
+        .values_list("created_at", "item_type", "item_id")[: page_size + 1]
+    )
+
+
+def _paginate(rows, page_size):
+    """Sépare les lignes de la page et calcule le curseur de la page suivante."""
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(*rows[-1])
+    return rows, next_cursor
+
+
+def _item_querysets(rows):
+    """Requêtes des tickets et des critiques de la page, avec leurs identifiants."""
+    return {
+        TICKET: (
+            Ticket.objects.select_related("user"),
+            [pk for _, item_type, pk in rows if item_type == TICKET],
+        ),
+        REVIEW: (
+            Review.objects.select_related("user", "ticket__user"),
+            [pk for _, item_type, pk in rows if item_type == REVIEW],
+        ),
+    }
+
+
+def _in_order(rows, objects):
+    return [
+        objects[item_type][pk] for _, item_type, pk in rows if pk in objects[item_type]
+    ]
+
+
+def _hydrate(rows):
+    """Charge les objets correspondant aux lignes du flux, dans l'ordre."""
+    objects = {
+        item_type: queryset.in_bulk(ids)
+        for item_type, (queryset, ids) in _item_querysets(rows).items()
+    }
+    return _in_order(rows, objects)
+
+
+async def ahydrate(rows):
+    """Charge les objets de lignes ``(created_at, type, pk)`` du flux, dans l'ordre.
+
+    Version asynchrone de :func:`_hydrate` : les requêtes des tickets et des
+    critiques sont lancées simultanément.
+    """
+    querysets = _item_querysets(rows)
+    loaded = await asyncio.gather(
+        *(queryset.ain_bulk(ids) for queryset, ids in querysets.values())
+    )
+    return _in_order(rows, dict(zip(querysets, loaded)))
+
+
+def _unanswered_tickets():
+    """Tickets sans critique, seuls tickets affichés dans le flux."""
+    return Ticket.objects.filter(has_review=False)
+
+
+def _audience(author_id):
+    """Identifiants des utilisateurs dont le flux contient les éléments d'un auteur."""
+    return [author_id, *follows.get_follower_ids(author_id)]
+
+
+def _bulk_insert(entries, ignore_conflicts=False):
+    """Insère des entrées de flux par lots de taille bornée."""
+    entries = iter(entries)
+    while batch := list(islice(entries, BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+
+
+def publish(item_type, item):
+    """Ajoute un ticket ou une critique au flux de son auteur et de ses abonnés.
+
+    Args:
+        item_type (str): Type de l'élément (``"ticket"`` ou ``"review"``)
+        item (Ticket | Review): Élément publié
+    """
+    _bulk_insert(
+        (
+            FeedEntry(
+                owner_id=owner_id,
+                author_id=item.user_id,
+                item_type=item_type,
+                item_id=item.pk,
+                created_at=item.created_at,
+            )
+            for owner_id in _audience(item.user_id)
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def retract(item_type, item_id):
+    """Retire un ticket ou une critique de tous les flux.
+
+    Args:
+        item_type (str): Type de l'élément (``"ticket"`` ou ``"review"``)
+        item_id (int): Clé primaire de l'élément
+    """
+    FeedEntry.objects.filter(item_type=item_type, item_id=item_id).delete()
+
+
+def touch_ticket(ticket_id):
+    """Date de maintenant les entrées affichant un ticket modifié (le ticket
+    lui-même et les critiques qui y répondent).
+
+    Args:
+        ticket_id (int): Clé primaire du ticket modifié
+    """
+    now = timezone.now()
+    FeedEntry.objects.filter(item_type=TICKET, item_id=ticket_id).update(updated_at=now)
+    FeedEntry.objects.filter(
+        item_type=REVIEW,
+        item_id__in=Review.objects.filter(ticket_id=ticket_id).values("pk"),
+    ).update(updated_at=now)
+
+
+def touch_review(review_id):
+    """Date de maintenant les entrées d'une critique modifiée.
+
+    Args:
+        review_id (int): Clé primaire de la critique modifiée
+    """
+    FeedEntry.objects.filter(item_type=REVIEW, item_id=review_id).update(
+        updated_at=timezone.now()
+    )
+
+
+def touch_author(user_id):
+    """Date de maintenant les entrées affichant le nom d'un utilisateur modifié
+    (ses tickets, ses critiques et les critiques répondant à ses tickets).
+
+    Args:
+        user_id (int): Clé primaire de l'utilisateur modifié
+    """
+    now = timezone.now()
+    FeedEntry.objects.filter(
+        item_type=TICKET,
+        item_id__in=Ticket.objects.filter(user_id=user_id).values("pk"),
+    ).update(updated_at=now)
+    FeedEntry.objects.filter(
+        item_type=REVIEW,
+        item_id__in=Review.objects.filter(
+            Q(user_id=user_id) | Q(ticket__user_id=user_id)
+        ).values("pk"),
+    ).update(updated_at=now)
+
+
+def follow(user_id, followed_ids):
+    """Ajoute au flux d'un utilisateur les éléments des auteurs qu'il suit désormais.
+
+    Args:
+        user_id (int): Utilisateur qui s'abonne
+        followed_ids (list): Identifiants des utilisateurs suivis
+    """
+    sources = (
+        (TICKET, _unanswered_tickets().filter(user_id__in=followed_ids)),
+        (REVIEW, Review.objects.filter(user_id__in=followed_ids)),
+    )
+    _bulk_insert(
+        (
+            FeedEntry(
+                owner_id=user_id,
+                author_id=author_id,
+                item_type=item_type,
+                item_id=pk,
+                created_at=created_at,
+            )
+            for item_type, queryset in sources
+            for pk, author_id, created_at in queryset.values_list(
+                "pk", "user_id", "created_at"
+            ).iterator()
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def unfollow(user_id, followed_id):
+    """Retire du flux d'un utilisateur les éléments d'un auteur qu'il ne suit plus.
+
+    Args:
+        user_id (int): Utilisateur qui se désabonne
+        followed_id (int): Utilisateur qui n'est plus suivi
+    """
+    FeedEntry.objects.filter(owner_id=user_id, author_id=followed_id).delete()
+
+
+def rebuild_feed():
+    """Reconstruit intégralement la table des flux à partir des données sources.
+
+    Returns:
+        int: Nombre d'entrées créées
+    """
+    audiences = defaultdict(list)
+    for user_id, followed_id in UserFollows.objects.values_list(
+        "user_id", "followed_user_id"
+    ).iterator():
+        audiences[followed_id].append(user_id)
+
+    sources = ((TICKET, _unanswered_tickets()), (REVIEW, Review.objects.all()))
+    entries = (
+        FeedEntry(
+            owner_id=owner_id,
+            author_id=author_id,
+            item_type=item_type,
+            item_id=pk,
+            created_at=created_at,
+        )
+        for item_type, queryset in sources
+        for pk, author_id, created_at in queryset.values_list(
+            "pk", "user_id", "created_at"
+        ).iterator()
+        for owner_id in (author_id, *audiences[author_id])
+    )
+
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        _bulk_insert(entries)
+    return FeedEntry.objects.count()
@@ -0,0 +1,360 @@
+"""
+Cache du graphe d'abonnements : utilisateurs suivis et abonnés de chaque utilisateur.
+
+Le graphe d'un utilisateur est conservé à deux niveaux : un dictionnaire propre au
+processus (de taille bornée, ``FOLLOW_CACHE_LOCAL_SIZE`` utilisateurs) et le cache
+partagé (``CACHES``). Chaque utilisateur possède dans le cache partagé une version,
+remplacée à chaque création ou suppression d'un abonnement le concernant (voir
+:mod:`review.signals`) ; une entrée n'est lue que si elle porte la version
+courante. Une consultation coûte donc une lecture du cache partagé, et une requête
+SQL seulement après une modification.
+"""
+
+import re
+import string
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from itertools import islice
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from authentication.models import User
+from . import feed
+from .models import UserFollows
+
+# Taille des lots de résolution des noms d'utilisateur et d'insertion
+BATCH_SIZE = 500
+
+# Nombre de suggestions d'utilisateurs par page (autocomplétion), et maximum
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+# Minuscules de la fonction lower() de SQLite, limitée aux lettres ASCII
+_ASCII_LOWERCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+VERSION_PREFIX = "follow-version"
+GRAPH_PREFIX = "follow-graph"
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+class FollowGraph(NamedTuple):
+    """Abonnements d'un utilisateur : identifiants suivis et identifiants abonnés."""
+
+    followed: frozenset
+    followers: frozenset
+
+
+def _version_key(user_id):
+    return f"{VERSION_PREFIX}:{user_id}"
+
+
+def _version(user_id):
+    """Retourne la version courante du graphe d'un utilisateur, créée au besoin."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _load(user_id):
+    """Lit les abonnements et les abonnés d'un utilisateur en une requête.
+
+    La lecture se fait toujours sur la base principale : un graphe lu sur un
+    réplica en retard serait conservé dans le cache sous la version courante.
+    """
+    rows = (
+        UserFollows.objects.using(router.db_for_write(UserFollows))
+        .filter(Q(user_id=user_id) | Q(followed_user_id=user_id))
+        .values_list("user_id", "followed_user_id")
+    )
+    return FollowGraph(
+        followed=frozenset(
+            followed for follower, followed in rows if follower == user_id
+        ),
+        followers=frozenset(
+            follower for follower, followed in rows if followed == user_id
+        ),
+    )
+
+
+def get_graph(user_id):
+    """Retourne le graphe d'abonnements d'un utilisateur.
+
+    Args:
+        user_id (int): Clé primaire de l'utilisateur
+
+    Returns:
+        FollowGraph: Identifiants des utilisateurs suivis et des abonnés
+    """
+    version = _version(user_id)
+    with _local_lock:
+        entry = _local.get(user_id)
+        if entry is not None and entry[0] == version:
+            _local.move_to_end(user_id)
+            return entry[1]
+
+    key = f"{GRAPH_PREFIX}:{user_id}:{version}"
+    graph = cache.get(key)
+    if graph is None:
+        graph = _load(user_id)
+        cache.set(key, graph, settings.FOLLOW_CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local[user_id] = (version, graph)
+        _local.move_to_end(user_id)
+        while len(_local) > settings.FOLLOW_CACHE_LOCAL_SIZE:
+            _local.popitem(last=False)
+    return graph
+
+
+def get_followed_ids(user_id):
+    """Identifiants des utilisateurs suivis par un utilisateur (``frozenset``)."""
+    return get_graph(user_id).followed
+
+
+def get_follower_ids(user_id):
+    """Identifiants des abonnés d'un utilisateur (``frozenset``)."""
+    return get_graph(user_id).followers
+
+
+def get_follower_count(user_id):
+    """Nombre d'abonnés d'un utilisateur."""
+    return len(get_graph(user_id).followers)
+
+
+def is_following(user_id, followed_id):
+    """Indique si un utilisateur en suit un autre."""
+    return followed_id in get_graph(user_id).followed
+
+
+def invalidate(*user_ids):
+    """Remplace la version du graphe des utilisateurs donnés.
+
+    La version est remplacée immédiatement (la transaction en cours voit ses
+    propres écritures) puis à nouveau après validation : un graphe relu par une
+    requête concurrente avant la validation n'est jamais réutilisé.
+
+    Args:
+        user_ids (int): Clés primaires des utilisateurs dont le graphe a changé
+    """
+
+    def bump():
+        cache.set_many(
+            {_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None
+        )
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def _fold_case(text):
+    """Met un texte en minuscules comme ``lower()`` de la base des utilisateurs.
+
+    Sous SQLite, ``lower()`` ne convertit que les lettres ASCII : le texte est
+    converti de même, pour être comparé à l'index ``lower(username)``.
+    """
+    if connections[router.db_for_read(User)].vendor == "sqlite":
+        return text.translate(_ASCII_LOWERCASE)
+    return text.lower()
+
+
+def _prefix_upper_bound(prefix):
+    """Plus petite chaîne supérieure à toutes celles commençant par ``prefix``.
+
+    Returns:
+        str: Borne exclue de la plage, ou None si aucune chaîne ne convient
+        (préfixe uniquement composé du dernier caractère Unicode)
+    """
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if code <= sys.maxunicode:
+            # Les demi-codets (U+D800 à U+DFFF) ne sont pas encodables en UTF-8
+            return prefix[:-1] + chr(0xE000 if 0xD800 <= code <= 0xDFFF else code)
+        prefix = prefix[:-1]
+    return None
+
+
+def find_user(username):
+    """Retrouve un utilisateur par son nom, à la casse près si besoin.
+
+    Le nom exact est prioritaire ; à défaut, le nom est recherché sans distinction
+    de casse (index ``lower(username)``), s'il ne désigne qu'un seul utilisateur.
+
+    Returns:
+        User: Utilisateur trouvé, ou None
+    """
+    user = User.objects.filter(username=username).first()
+    if user is None:
+        matches = list(
+            User.objects.annotate(username_lower=Lower("username")).filter(
+                username_lower=_fold_case(username)
+            )[:2]
+        )
+        if len(matches) == 1:
+            user = matches[0]
+    return user
+
+
+def suggest_users(user, prefix, after=None, limit=SUGGEST_LIMIT):
+    """Propose les utilisateurs dont le nom commence par un préfixe (autocomplétion).
+
+    La recherche est un parcours de plage de l'index ``lower(username)`` :
+    ``prefix <= lower(username) < borne``, sans ``LIKE``. Les utilisateurs déjà
+    suivis (lus dans le cache du graphe) et l'utilisateur lui-même sont exclus.
+    Sous SQLite, ``lower()`` ne convertit que les lettres ASCII : la casse des
+    lettres accentuées est alors distinguée.
+
+    Args:
+        user (User): Utilisateur qui recherche
+        prefix (str): Début du nom d'utilisateur, sans distinction de casse
+        after (str): Dernier nom de la page précédente (pagination par clé)
+        limit (int): Nombre maximal de résultats
+
+    Returns:
+        list: Couples ``(pk, username)`` triés sans distinction de casse
+    """
+    prefix = _fold_case(prefix)
+    if not prefix:
+        return []
+    users = (
+        User.objects.annotate(username_lower=Lower("username"))
+        .filter(username_lower__gte=prefix)
+        .exclude(pk__in=[user.pk, *get_followed_ids(user.pk)])
+        .order_by("username_lower", "username")
+    )
+    upper_bound = _prefix_upper_bound(prefix)
+    if upper_bound is not None:
+        users = users.filter(username_lower__lt=upper_bound)
+    if after:
+        users = users.filter(
+            Q(username_lower__gt=_fold_case(after))
+            | Q(username_lower=_fold_case(after), username__gt=after)
+        )
+    return list(users.values_list("pk", "username")[:limit])
+
+
+class BulkReport(NamedTuple):
+    """Résultat d'un abonnement (ou désabonnement) en masse, par nom d'utilisateur.
+
+    Attributes:
+        changed (list): Utilisateurs nouvellement suivis (ou qui ne le sont plus)
+        unchanged (list): Utilisateurs déjà suivis (ou déjà non suivis)
+        duplicates (list): Noms répétés dans la liste
+        unknown (list): Noms ne correspondant à aucun utilisateur
+        own (list): Nom de l'utilisateur lui-même
+    """
+
+    changed: list
+    unchanged: list
+    duplicates: list
+    unknown: list
+    own: list
+
+
+def parse_usernames(text):
+    """Découpe une liste de noms d'utilisateur (séparés par des espaces, des
+    virgules ou des retours à la ligne)."""
+    return [name for name in re.split(r"[\s,;]+", text) if name]
+
+
+def _resolve(usernames):
+    """Associe chaque nom d'utilisateur connu à sa clé primaire, par lots."""
+    names = iter(usernames)
+    resolved = {}
+    while batch := list(islice(names, BATCH_SIZE)):
+        resolved.update(
+            User.objects.filter(username__in=batch).values_list("username", "pk")
+        )
+    return resolved
+
+
+def _classify(user, usernames, is_target):
+    """Répartit une liste de noms selon qu'ils désignent une cible à traiter.
+
+    Args:
+        user (User): Utilisateur à l'origine de l'opération
+        usernames (list): Noms des utilisateurs visés
+        is_target (callable): Indique si un identifiant d'utilisateur est à traiter
+
+    Returns:
+        tuple: Rapport et identifiants des utilisateurs à traiter
+    """
+    counts = Counter(usernames)
+    report = BulkReport(
+        [], [], [name for name, count in counts.items() if count > 1], [], []
+    )
+    resolved = _resolve(name for name in counts if name != user.username)
+    ids = []
+    for name in counts:
+        if name == user.username:
+            report.own.append(name)
+        elif name not in resolved:
+            report.unknown.append(name)
+        elif is_target(resolved[name]):
+            report.changed.append(name)
+            ids.append(resolved[name])
+        else:
+            report.unchanged.append(name)
+    return report, ids
+
+
+def bulk_follow(user, usernames):
+    """Abonne un utilisateur à une liste d'utilisateurs en un minimum de requêtes.
+
+    Les noms sont résolus par lots et les abonnements insérés par ``bulk_create``
+    (un abonnement inséré entre-temps est ignoré grâce à la contrainte d'unicité).
+    ``bulk_create`` n'émettant pas de signaux, le flux et le cache du graphe sont
+    mis à jour ici, en une fois.
+
+    Args:
+        user (User): Utilisateur qui s'abonne
+        usernames (list): Noms des utilisateurs à suivre
+
+    Returns:
+        BulkReport: Répartition des noms selon le résultat
+    """
+    followed = get_followed_ids(user.pk)
+    report, ids = _classify(user, usernames, lambda pk: pk not in followed)
+    if ids:
+        with transaction.atomic():
+            UserFollows.objects.bulk_create(
+                (UserFollows(user=user, followed_user_id=pk) for pk in ids),
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            invalidate(user.pk, *ids)
+            feed.follow(user.pk, ids)
+    return report
+
+
+def bulk_unfollow(user, usernames):
+    """Désabonne un utilisateur d'une liste d'utilisateurs.
+
+    Les abonnements sont supprimés en une requête ; les signaux de suppression
+    mettent à jour le flux et le cache du graphe.
+
+    Args:
+        user (User): Utilisateur qui se désabonne
+        usernames (list): Noms des utilisateurs à ne plus suivre
+
+    Returns:
+        BulkReport: Répartition des noms selon le résultat
+    """
+    followed = get_followed_ids(user.pk)
+    report, ids = _classify(user, usernames, followed.__contains__)
+    if ids:
+        with transaction.atomic():
+            UserFollows.objects.filter(user=user, followed_user_id__in=ids).delete()
+    return report
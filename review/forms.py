@@ -1,12 +1,65 @@
 from django import forms
 from .models import Ticket, Review, UserFollows
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+
+class BoundedImageField(forms.ImageField):
+    """Champ image refusant les fichiers trop lourds ou trop grands avant décodage.
+
+    La taille du fichier et les dimensions déclarées dans l'en-tête de l'image
+    sont vérifiées avant la validation complète de Django, afin qu'aucune image
+    démesurée (bombe de décompression) ne soit décodée en mémoire.
+    """
+
+    default_error_messages = {
+        "file_too_large": "Le fichier ne doit pas dépasser %(max_size)s.",
+        "too_many_pixels": (
+            "L'image ne doit pas dépasser %(max_pixels)s millions de pixels."
+        ),
+    }
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return super().to_python(data)
+
+        max_bytes = settings.IMAGE_UPLOAD_MAX_BYTES
+        if data.size > max_bytes:
+            raise ValidationError(
+                self.error_messages["file_too_large"],
+                code="file_too_large",
+                params={"max_size": filesizeformat(max_bytes)},
+            )
+
+        max_pixels = settings.IMAGE_UPLOAD_MAX_PIXELS
+        try:
+            # Image.open ne lit que l'en-tête : les pixels ne sont pas décodés
+            with Image.open(data) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            width = height = max_pixels
+        except Exception as error:
+            raise ValidationError(
+                self.error_messages["invalid_image"], code="invalid_image"
+            ) from error
+        if width * height > max_pixels:
+            raise ValidationError(
+                self.error_messages["too_many_pixels"],
+                code="too_many_pixels",
+                params={"max_pixels": f"{max_pixels / 1_000_000:g}"},
+            )
+        data.seek(0)
+        return super().to_python(data)
 
 
 class TicketForm(forms.ModelForm):
     class Meta:
         model = Ticket
         fields = ["title", "description", "image"]
+        field_classes = {"image": BoundedImageField}
         labels = {
             "title": "Titre",
             "description": "Description",
@@ -44,7 +97,7 @@ class PostReviewAndTicketForm(forms.Form):
         label="Description",
         widget=forms.Textarea(attrs={"class": "form-control"}),
     )
-    image = forms.ImageField(
+    image = BoundedImageField(
         label="Image",
         required=False,
         widget=forms.ClearableFileInput(attrs={"class": "form-control"}),
@@ -0,0 +1,153 @@
+"""
+Traitements d'images exécutés par les processus de travail.
+
+Ce module ne dépend que de Pillow et de la bibliothèque standard (aucun import
+Django) afin de pouvoir être chargé tel quel par les processus du pool de
+traitement d'images.
+"""
+
+import hashlib
+import os
+
+from PIL import Image
+
+# Largeurs des images dérivées : vignette du flux, flux haute densité, détail
+DERIVATIVE_WIDTHS = (240, 480, 960)
+
+# Formats dérivés par ordre de préférence : (format Pillow, extension, type MIME)
+DERIVATIVE_FORMATS = (
+    ("AVIF", "avif", "image/avif"),
+    ("WEBP", "webp", "image/webp"),
+)
+
+DERIVATIVES_DIR = "derivatives"
+
+
+def available_formats():
+    """Formats dérivés pris en charge par l'installation de Pillow courante."""
+    Image.init()
+    return [entry for entry in DERIVATIVE_FORMATS if entry[0] in Image.SAVE]
+
+
+def derivative_key(path):
+    """Clé des dérivées d'une image : empreinte SHA-256 de son contenu.
+
+    Un nouveau traitement de la même image produit les mêmes noms de dérivées ;
+    un fichier réécrit sous le même nom en produit de nouveaux.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def derivative_name(key, width, extension):
+    """Nom (relatif au dossier média) d'une image dérivée."""
+    return f"{DERIVATIVES_DIR}/{key[:2]}/{key}-{width}.{extension}"
+
+
+def generate_derivatives(path, key, media_root, widths=DERIVATIVE_WIDTHS):
+    """Génère les images dérivées d'une image source.
+
+    Les fichiers sont nommés d'après le contenu de l'image source : une même image
+    téléversée plusieurs fois ne produit qu'un seul jeu de dérivées, et les
+    dérivées déjà présentes ne sont pas régénérées.
+
+    Args:
+        path (str): Chemin absolu de l'image source
+        key (str): Clé des dérivées (voir :func:`derivative_key`)
+        media_root (str): Dossier racine des fichiers média
+        widths (tuple): Largeurs à produire (sans agrandissement de la source)
+
+    Returns:
+        list: Dérivées produites, sous forme de dictionnaires
+        ``{"name", "width", "mime"}``
+    """
+    formats = available_formats()
+    derivatives = []
+    with Image.open(path) as source:
+        targets = sorted({min(width, source.width) for width in widths}, reverse=True)
+        # Décodage JPEG directement à une échelle réduite (1/2 à 1/8) lorsque la
+        # plus grande dérivée le permet : la mémoire utilisée suit la taille cible
+        source.draft(
+            None, (targets[0], max(1, source.height * targets[0] // source.width))
+        )
+        image = source
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        # Réductions successives de la plus grande à la plus petite largeur :
+        # l'image source n'est décodée qu'une seule fois
+        for width in targets:
+            image.thumbnail((width, image.height))
+            for image_format, extension, mime in formats:
+                variant = derivative_name(key, width, extension)
+                destination = os.path.join(media_root, variant)
+                if not os.path.exists(destination):
+                    _save_atomically(image, destination, image_format)
+                derivatives.append({"name": variant, "width": width, "mime": mime})
+    return sorted(derivatives, key=lambda derivative: derivative["width"])
+
+
+def _save_atomically(image, destination, image_format):
+    """Enregistre une image sans qu'un lecteur puisse voir un fichier partiel."""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temporary = f"{destination}.tmp"
+    image.save(temporary, image_format, quality=80)
+    os.replace(temporary, destination)
+
+
+def resize_image_file(path, destination, max_size):
+    """Écrit une copie de l'image réduite pour tenir dans ``max_size``.
+
+    L'original n'est jamais réécrit : son nom, adressé par contenu, doit rester
+    celui de ses octets, et un lecteur ne doit pas voir un fichier partiel. La
+    copie est écrite dans un fichier temporaire puis renommée.
+
+    Args:
+        path (str): Chemin absolu de l'image d'origine
+        destination (str): Chemin absolu de la copie réduite
+        max_size (tuple): Dimensions maximales ``(largeur, hauteur)``
+
+    Returns:
+        tuple: ``(largeur, type MIME)`` de la copie, ou None si l'image tient déjà
+        dans les dimensions maximales (aucune copie écrite)
+    """
+    with Image.open(path) as image:
+        if image.width <= max_size[0] and image.height <= max_size[1]:
+            return None
+        image_format = image.format
+        image.thumbnail(max_size)
+        if not os.path.exists(destination):
+            _save_atomically(image, destination, image_format)
+        return image.width, Image.MIME[image_format]
+
+
+def process_image_file(path, name, media_root, max_size=None):
+    """Traitement complet d'une image téléversée : dérivées et copie réduite.
+
+    Avec ``max_size``, une copie de l'image réduite à ces dimensions est ajoutée
+    aux dérivées (clé ``"master"``) : elle remplace l'original à l'affichage,
+    lorsque le navigateur ne prend en charge aucun format dérivé.
+
+    Args:
+        path (str): Chemin absolu de l'image
+        name (str): Nom de l'image dans le stockage
+        media_root (str): Dossier racine des fichiers média
+        max_size (tuple): Dimensions maximales de l'image affichée (optionnel)
+
+    Returns:
+        list: Dérivées produites (voir :func:`generate_derivatives`)
+    """
+    key = derivative_key(path)
+    derivatives = generate_derivatives(path, key, media_root)
+    if max_size:
+        extension = os.path.splitext(name)[1].lower().lstrip(".")
+        variant = derivative_name(key, "master", extension)
+        master = resize_image_file(path, os.path.join(media_root, variant), max_size)
+        if master:
+            width, mime = master
+            derivatives.append(
+                {"name": variant, "width": width, "mime": mime, "master": True}
+            )
+    return derivatives
@@ -0,0 +1,238 @@
+"""
+Diffusion en direct des nouveautés du flux d'activité (Server-Sent Events).
+
+Chaque ticket ou critique publié (voir :mod:`review.signals`) est annoncé aux
+pages d'accueil ouvertes de son auteur et de ses abonnés : la carte de l'élément
+est envoyée au navigateur, qui l'insère en tête du flux au lieu de recharger la
+page et de recalculer tout le flux.
+
+Les connexions ouvertes sont tenues par un courtier propre à chaque processus
+(réglage ``LIVE_BROKER``) :
+
+- ``local`` (par défaut) : les signaux du processus transmettent directement les
+  publications ; suffisant lorsqu'un seul processus sert l'application ;
+- ``database`` : chaque processus relit périodiquement les nouvelles entrées de
+  la table du flux (une requête par intervalle ``LIVE_POLL_INTERVAL``, quel que
+  soit le nombre de connexions). Tient lieu de courtier partagé lorsque plusieurs
+  processus servent l'application.
+
+L'identifiant de chaque événement est le curseur de l'entrée du flux : après une
+coupure, le navigateur le renvoie (en-tête ``Last-Event-ID``) et les entrées
+manquées sont relues dans la table du flux.
+
+Une connexion ouverte occuperait indéfiniment un thread d'un serveur WSGI (qui,
+de plus, attendrait la fin du flux pour l'envoyer) : le flux n'est proposé que
+sous un serveur ASGI, sauf réglage ``LIVE_FEED_ENABLED`` explicite.
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import feed, follows
+from .cards import awith_versions
+from .models import FeedEntry, Review
+
+# Délai de reconnexion demandé au navigateur, en millisecondes
+RETRY_MS = 3000
+
+
+class LocalBroker:
+    """Courtier en mémoire : relaie les publications du processus aux connexions
+    ouvertes de chaque utilisateur.
+
+    Les publications peuvent venir de n'importe quel thread (signaux des vues
+    synchrones) ; elles sont remises à la boucle d'événements de chaque connexion.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        """Ouvre une file recevant les événements destinés à un utilisateur."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+        self.listening(subscriber[0])
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers[user_id].discard(subscriber)
+                if not self._subscribers[user_id]:
+                    del self._subscribers[user_id]
+
+    def subscriber_ids(self, loop=None):
+        """Utilisateurs ayant une connexion ouverte (sur une boucle donnée)."""
+        with self._lock:
+            return [
+                user_id
+                for user_id, subscribers in self._subscribers.items()
+                if loop is None or any(sub_loop is loop for sub_loop, _ in subscribers)
+            ]
+
+    def listening(self, loop):
+        """Appelé à chaque nouvelle connexion, dans sa boucle d'événements."""
+
+    def publish(self, user_ids, row):
+        """Annonce une entrée de flux aux utilisateurs donnés.
+
+        Args:
+            user_ids (iterable): Propriétaires des flux concernés
+            row (tuple): Ligne ``(created_at, item_type, item_id)`` du flux
+        """
+        self.dispatch(user_ids, row)
+
+    def dispatch(self, user_ids, row):
+        """Remet un événement aux connexions ouvertes des utilisateurs donnés."""
+        with self._lock:
+            targets = [
+                subscriber
+                for user_id in user_ids
+                for subscriber in self._subscribers.get(user_id, ())
+            ]
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, row)
+            except RuntimeError:
+                # Boucle d'événements fermée : la connexion se termine
+                pass
+
+
+class DatabaseBroker(LocalBroker):
+    """Courtier lisant les nouvelles entrées dans la table du flux.
+
+    Une tâche par boucle d'événements interroge la table tant que des connexions
+    y sont ouvertes ; les publications locales sont ignorées, l'entrée du flux
+    étant elle-même l'événement. Chaque lecture porte sur les entrées datées des
+    ``LIVE_POLL_WINDOW`` dernières secondes : une entrée dont la transaction est
+    validée tardivement est relayée à la lecture suivante, et les entrées déjà
+    relayées sont écartées. L'historique inséré par un abonnement ou une
+    reconstruction du flux, plus ancien, n'est pas relayé.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._pollers = {}
+
+    def listening(self, loop):
+        with self._lock:
+            if loop not in self._pollers:
+                self._pollers[loop] = loop.create_task(self._poll(loop))
+
+    def publish(self, user_ids, row):
+        pass
+
+    async def _poll(self, loop):
+        window = timedelta(seconds=settings.LIVE_POLL_WINDOW)
+        # Entrées récentes déjà connues : date de création par clé primaire
+        seen = {}
+        try:
+            entries = FeedEntry.objects.filter(created_at__gt=timezone.now() - window)
+            async for pk, created_at in entries.values_list("pk", "created_at"):
+                seen[pk] = created_at
+            while owners := self.subscriber_ids(loop):
+                await asyncio.sleep(settings.LIVE_POLL_INTERVAL)
+                since = timezone.now() - window
+                seen = {pk: date for pk, date in seen.items() if date > since}
+                entries = (
+                    FeedEntry.objects.filter(owner_id__in=owners, created_at__gt=since)
+                    .order_by("created_at", "pk")
+                    .values_list("pk", "owner_id", "created_at", "item_type", "item_id")
+                )
+                async for pk, owner_id, *row in entries:
+                    if pk not in seen:
+                        seen[pk] = row[0]
+                        self.dispatch([owner_id], tuple(row))
+        finally:
+            with self._lock:
+                del self._pollers[loop]
+
+
+BROKERS = {"local": LocalBroker, "database": DatabaseBroker}
+
+broker = BROKERS[settings.LIVE_BROKER]()
+
+
+def enabled(request):
+    """Indique si le flux en direct est proposé pour une requête.
+
+    Args:
+        request: La requête HTTP
+
+    Returns:
+        bool: Valeur de ``LIVE_FEED_ENABLED``, ou à défaut vrai sous ASGI
+    """
+    if settings.LIVE_FEED_ENABLED is not None:
+        return settings.LIVE_FEED_ENABLED
+    return isinstance(request, ASGIRequest)
+
+
+def announce(item_type, item):
+    """Annonce un ticket ou une critique publié, une fois la transaction validée.
+
+    Args:
+        item_type (str): Type de l'élément (``"ticket"`` ou ``"review"``)
+        item (Ticket | Review): Élément publié
+    """
+    audience = {item.user_id, *follows.get_follower_ids(item.user_id)}
+    row = (item.created_at, item_type, item.pk)
+    transaction.on_commit(lambda: broker.publish(audience, row))
+
+
+async def _message(row):
+    """Événement SSE portant la carte d'une entrée du flux (vide si supprimée)."""
+    items = await feed.ahydrate([row])
+    if not items:
+        return ""
+    item = (await awith_versions(items))[0]
+    data = {"html": render_to_string("review/feedcard.html", {"item": item})}
+    if isinstance(item, Review) and item.ticket_id:
+        # La critique remplace dans le flux le ticket auquel elle répond
+        data["replaces"] = f"{feed.TICKET}-{item.ticket_id}"
+    return (
+        f"id: {feed.encode_cursor(*row)}\n"
+        f"event: card\n"
+        f"data: {json.dumps(data)}\n\n"
+    )
+
+
+async def stream(user, cursor=None):
+    """Flux SSE des nouveautés du flux d'un utilisateur.
+
+    Args:
+        user (User): Utilisateur connecté
+        cursor (str): Curseur du dernier élément reçu ou affiché : les entrées plus
+            récentes sont d'abord relues dans la table du flux
+
+    Yields:
+        str: Messages SSE (cartes, et commentaires de maintien de la connexion)
+    """
+    async with broker.subscribe(user.pk) as queue:
+        yield f"retry: {RETRY_MS}\n\n"
+        if cursor:
+            try:
+                rows = await feed.aget_newer_rows(user.pk, cursor)
+            except feed.InvalidCursor:
+                rows = []
+            for row in rows:
+                yield await _message(row)
+        while True:
+            try:
+                row = await asyncio.wait_for(queue.get(), settings.LIVE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # TimeoutError n'en est un alias qu'à partir de Python 3.11
+                yield ": ping\n\n"
+                continue
+            yield await _message(row)
@@ -0,0 +1,112 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from authentication.models import User
+from review.benchmarks import summarize, throwaway_database
+from review.feed import get_feed_page
+from review.models import Ticket
+from review.synthetic import seed_dataset
+
+# Réglages SQLite comparés : réglages par défaut de SQLite et de Django, puis
+# réglages du projet (mode WAL, pragmas, transactions IMMEDIATE)
+SQLITE_DEFAULTS = {"init_command": "PRAGMA journal_mode=DELETE"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge du flux : lecteurs et rédacteurs concurrents (threads) sur "
+        "une base jetable. Sous SQLite, compare les réglages par défaut et les "
+        "réglages du projet (WAL, pragmas) sur une base fichier."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=300)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--duration", type=float, default=10.0, help="secondes")
+        parser.add_argument("--json", action="store_true", help="Sortie JSON.")
+
+    def handle(self, *args, **options):
+        profiles = {"configuré": None}
+        if connection.vendor == "sqlite":
+            profiles = {"défaut": SQLITE_DEFAULTS, "configuré": None}
+
+        results = {}
+        for profile, profile_options in profiles.items():
+            with tempfile.TemporaryDirectory() as directory:
+                name = None
+                if connection.vendor == "sqlite":
+                    # Base fichier : la base de test en mémoire ne reflète ni la
+                    # journalisation ni les verrous du fichier
+                    name = os.path.join(directory, "load.sqlite3")
+                with throwaway_database(name=name, options=profile_options):
+                    seed_dataset(options["users"], 5, 3, 20)
+                    results[profile] = self.run_load(options)
+                    connection.close()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2, ensure_ascii=False))
+            return
+        for profile, result in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {profile} =="))
+            for operation, stats in result.items():
+                self.stdout.write(f"{operation} : {stats}")
+
+    def run_load(self, options):
+        """Lance lecteurs et rédacteurs pendant la durée demandée."""
+        user_ids = list(User.objects.values_list("pk", flat=True))
+        deadline = time.perf_counter() + options["duration"]
+        durations = {"lecture du flux": [], "publication d'un ticket": []}
+        errors = {name: 0 for name in durations}
+        lock = threading.Lock()
+
+        def read():
+            get_feed_page(random.choice(user_ids))
+
+        def write():
+            Ticket.objects.create(title="Charge", user_id=random.choice(user_ids))
+
+        def worker(name, operation):
+            local, failures = [], 0
+            try:
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        operation()
+                    except DatabaseError:
+                        failures += 1
+                        continue
+                    local.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                durations[name] += local
+                errors[name] += failures
+
+        threads = [
+            threading.Thread(target=worker, args=("lecture du flux", read))
+            for _ in range(options["readers"])
+        ] + [
+            threading.Thread(target=worker, args=("publication d'un ticket", write))
+            for _ in range(options["writers"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {
+            name: {
+                **(summarize(values) if values else {"count": 0}),
+                "per_second": round(len(values) / options["duration"], 1),
+                "errors": errors[name],
+            }
+            for name, values in durations.items()
+        }
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication.models import User
+from review.benchmarks import throwaway_database
+from review.follows import bulk_follow
+from review.models import UserFollows
+from review.synthetic import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit des abonnements un par un (recherche, vérification, "
+        "création) et des abonnements en masse, dans une base jetable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--follows", type=int, default=500, help="par import")
+        parser.add_argument("--tickets", type=int, default=2, help="par utilisateur")
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            seed_dataset(options["users"], options["tickets"], 0, 0)
+            users = list(User.objects.order_by("pk"))
+            count = min(options["follows"], len(users) - 2)
+            targets = [user.username for user in users[2 : count + 2]]
+
+            self.report(
+                "Un par un", count, lambda: self.follow_one_by_one(users[0], targets)
+            )
+            self.report("En masse", count, lambda: bulk_follow(users[1], targets))
+
+    def follow_one_by_one(self, user, usernames):
+        """Reproduit le parcours de la page d'abonnement pour chaque nom."""
+        for username in usernames:
+            followed = User.objects.get(username=username)
+            if not UserFollows.objects.filter(
+                user=user, followed_user=followed
+            ).exists():
+                UserFollows.objects.create(user=user, followed_user=followed)
+
+    def report(self, title, count, function):
+        start = time.perf_counter()
+        function()
+        duration = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{title} : {count} abonnements en {duration * 1000:.1f} ms "
+                f"({count / duration:.0f} abonnements/s)"
+            )
+        )
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from review.benchmarks import measure, summarize, throwaway_database
+from review.models import FeedEntry, Review, Ticket, UserFollows
+from review.synthetic import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare les plans d'exécution (EXPLAIN) et les temps des requêtes du flux, "
+        "des posts et des abonnés avec et sans les index composites, sur un jeu de "
+        "données synthétique dans une base jetable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tickets", type=int, default=10, help="par utilisateur")
+        parser.add_argument("--reviews", type=int, default=5, help="par utilisateur")
+        parser.add_argument("--follows", type=int, default=20, help="par utilisateur")
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            counts = seed_dataset(
+                options["users"],
+                options["tickets"],
+                options["reviews"],
+                options["follows"],
+            )
+            self.stdout.write(f"Jeu de données : {counts}")
+            queries = self.queries()
+
+            self.report("Avec index", queries, options["repeat"])
+            with connection.schema_editor() as editor:
+                for model in (Ticket, Review, UserFollows):
+                    for index in model._meta.indexes:
+                        editor.remove_index(model, index)
+            self.report("Sans index", queries, options["repeat"])
+
+    def queries(self):
+        """Requêtes représentatives des chemins d'accès des vues."""
+        user = UserFollows.objects.values_list("followed_user", flat=True).first()
+        followed = list(
+            UserFollows.objects.filter(user_id=user).values_list(
+                "followed_user", flat=True
+            )
+        )
+        ticket = (
+            Review.objects.exclude(ticket=None).values_list("ticket", flat=True).first()
+        )
+        return {
+            "flux (page)": FeedEntry.objects.filter(owner_id=user).order_by(
+                "-created_at", "-item_type", "-item_id"
+            )[:21],
+            "flux (abonnement)": Ticket.objects.filter(
+                user_id__in=followed, has_review=False
+            ).order_by("-created_at"),
+            "posts (tickets)": Ticket.objects.filter(user_id=user).order_by(
+                "-created_at"
+            ),
+            "posts (critiques)": Review.objects.filter(user_id=user).order_by(
+                "-created_at"
+            ),
+            "détail ticket (critiques)": Review.objects.filter(
+                ticket_id=ticket
+            ).order_by("-created_at"),
+            "abonnés": UserFollows.objects.filter(followed_user_id=user).values_list(
+                "user_id", flat=True
+            ),
+        }
+
+    def report(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {title} =="))
+        for name, queryset in queries.items():
+            stats = summarize(measure(lambda: list(queryset.all()), repeat))
+            self.stdout.write(self.style.SUCCESS(f"\n{name} : {stats}"))
+            self.stdout.write(queryset.explain())
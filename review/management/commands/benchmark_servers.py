@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from authentication.models import User
+from review.benchmarks import summarize, throwaway_database
+from review.models import Review, Ticket
+from review.synthetic import seed_dataset
+
+HOST = "testserver"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit et la latence (p50, p95, p99) des pages de lecture servies "
+        "par le gestionnaire WSGI (un thread par requête) et par le gestionnaire "
+        "ASGI (vues asynchrones), sous charge concurrente, dans une base jetable. "
+        "Les gestionnaires sont appelés dans le processus, sans serveur HTTP."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--sessions", type=int, default=20)
+        parser.add_argument(
+            "--concurrency", type=int, default=16, help="requêtes simultanées"
+        )
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--json", action="store_true", help="Sortie JSON.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            ALLOWED_HOSTS=[HOST]
+        ):
+            name = None
+            if connection.vendor == "sqlite":
+                # Base fichier, comme en production (voir benchmark_database)
+                name = os.path.join(directory, "servers.sqlite3")
+            with throwaway_database(name=name):
+                seed_dataset(options["users"], 5, 3, 20)
+                requests = self.build_requests(options)
+                connection.close()
+                results = {
+                    "wsgi": self.run_wsgi(requests, options["concurrency"]),
+                    "asgi": asyncio.run(
+                        self.run_asgi(requests, options["concurrency"])
+                    ),
+                }
+                connection.close()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for server, stats in results.items():
+            self.stdout.write(f"{server} : {stats}")
+
+    def build_requests(self, options):
+        """Liste des requêtes à rejouer : ``(chemin, cookie de session)``.
+
+        Chaque session connectée consulte à tour de rôle son flux, ses posts et
+        le détail d'un ticket et d'une critique.
+        """
+        cookies = []
+        for user in User.objects.order_by("pk")[: options["sessions"]]:
+            client = Client()
+            client.force_login(user)
+            cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+            cookies.append(f"{settings.SESSION_COOKIE_NAME}={cookie}")
+        paths = [
+            reverse("home"),
+            reverse("user_posts"),
+            reverse("detail_ticket", args=[Ticket.objects.values("pk").first()["pk"]]),
+            reverse("detail_review", args=[Review.objects.values("pk").first()["pk"]]),
+        ]
+        return [
+            (paths[index % len(paths)], cookies[index % len(cookies)])
+            for index in range(options["requests"])
+        ]
+
+    def run_wsgi(self, requests, concurrency):
+        """Rejoue les requêtes sur le gestionnaire WSGI, ``concurrency`` threads."""
+        handler = WSGIHandler()
+
+        def call(request):
+            path, cookie = request
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": "",
+                "SERVER_NAME": HOST,
+                "SERVER_PORT": "80",
+                "HTTP_HOST": HOST,
+                "HTTP_COOKIE": cookie,
+                "wsgi.url_scheme": "http",
+                "wsgi.input": BytesIO(),
+                "wsgi.errors": BytesIO(),
+            }
+            statuses = []
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers: statuses.append(status))
+            b"".join(response)
+            response.close()
+            return (time.perf_counter() - start) * 1000, statuses[0]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(call, requests))
+        return self.report(results, time.perf_counter() - start)
+
+    async def run_asgi(self, requests, concurrency):
+        """Rejoue les requêtes sur le gestionnaire ASGI, ``concurrency`` à la fois."""
+        handler = ASGIHandler()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(request):
+            path, cookie = request
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode(),
+                "query_string": b"",
+                "root_path": "",
+                "headers": [(b"host", HOST.encode()), (b"cookie", cookie.encode())],
+                "server": (HOST, 80),
+                "client": ("127.0.0.1", 50000),
+            }
+            messages = iter([{"type": "http.request", "body": b"", "more_body": False}])
+            statuses = []
+
+            async def receive():
+                # Après le corps de la requête, le client reste connecté
+                return next(messages, None) or await asyncio.Future()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            async with semaphore:
+                start = time.perf_counter()
+                await handler(scope, receive, send)
+                return (time.perf_counter() - start) * 1000, statuses[0]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(call(request) for request in requests))
+        return self.report(results, time.perf_counter() - start)
+
+    def report(self, results, elapsed):
+        durations = [duration for duration, status in results]
+        errors = sum(
+            1 for duration, status in results if not str(status).startswith("200")
+        )
+        return {
+            **summarize(durations),
+            "per_second": round(len(results) / elapsed, 1),
+            "errors": errors,
+        }
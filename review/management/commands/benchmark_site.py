@@ -0,0 +1,213 @@
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from authentication.models import User
+from review.benchmarks import (
+    add_dataset_arguments,
+    dataset_arguments,
+    summarize,
+    throwaway_database,
+)
+from review.models import Review, Ticket
+from review.synthetic import seed_dataset
+
+# Répartition par défaut des pages consultées (poids relatifs)
+DEFAULT_MIX = "home=40,user_posts=15,detail_ticket=20,detail_review=15,follow_users=10"
+VIEWS = ("home", "user_posts", "detail_ticket", "detail_review", "follow_users")
+
+
+def parse_mix(value):
+    """Analyse une répartition ``vue=poids,…`` des pages consultées.
+
+    Args:
+        value (str): Répartition, par exemple ``home=3,follow_users=1``
+
+    Returns:
+        dict: Poids par nom de vue
+    """
+    mix = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        view, _, weight = item.partition("=")
+        if view not in VIEWS:
+            raise CommandError(f"Vue inconnue : {view} (vues : {', '.join(VIEWS)})")
+        try:
+            mix[view] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"Poids invalide pour {view} : {weight}")
+    if not mix or sum(mix.values()) <= 0:
+        raise CommandError("La répartition des pages est vide.")
+    return mix
+
+
+def git_commit():
+    """Commit courant du dépôt, s'il est disponible (comparaison entre commits)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure de bout en bout des pages du site dans une base jetable remplie "
+        "d'un jeu de données synthétique reproductible : rejoue un mélange de "
+        "requêtes (flux, posts, détails, abonnements) de sessions connectées par le "
+        "client de test de Django, et produit en JSON le débit, la latence (p50, "
+        "p95, p99) et le nombre de requêtes SQL par page."
+    )
+
+    def add_arguments(self, parser):
+        add_dataset_arguments(parser)
+        parser.add_argument("--sessions", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument(
+            "--warmup", type=int, default=100, help="requêtes non mesurées"
+        )
+        parser.add_argument(
+            "--mix", default=DEFAULT_MIX, help=f"poids des pages ({DEFAULT_MIX})"
+        )
+        parser.add_argument("--output", help="Fichier JSON du rapport.")
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options["mix"])
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            ALLOWED_HOSTS=["testserver"]
+        ):
+            name = None
+            if connection.vendor == "sqlite":
+                # Base fichier, comme en production (voir benchmark_database)
+                name = os.path.join(directory, "site.sqlite3")
+            with throwaway_database(name=name):
+                cache.clear()
+                dataset = seed_dataset(**dataset_arguments(options))
+                plan = self.build_plan(mix, options)
+                warmup = options["warmup"]
+                self.replay(plan[:warmup])
+                start = time.perf_counter()
+                results = self.replay(plan[warmup:])
+                elapsed = time.perf_counter() - start
+                connection.close()
+            cache.clear()
+
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "dataset": dataset,
+                "options": {
+                    key: options[key]
+                    for key in (
+                        "users",
+                        "tickets",
+                        "reviews",
+                        "follows",
+                        "days",
+                        "images",
+                        "seed",
+                        "sessions",
+                        "requests",
+                        "warmup",
+                    )
+                },
+                "mix": mix,
+            },
+            "total": {
+                **self.summary(results),
+                "per_second": round(len(results) / elapsed, 1),
+            },
+            "views": {
+                view: self.summary([result for result in results if result[0] == view])
+                for view in mix
+            },
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output + "\n")
+            self.stderr.write(f"Rapport écrit dans {options['output']}")
+        self.stdout.write(output)
+
+    def build_plan(self, mix, options):
+        """Liste reproductible des requêtes : ``(vue, client, chemin)``.
+
+        Chaque session connectée est un client de test ; les pages de détail
+        portent sur des tickets et critiques tirés au hasard.
+        """
+        rng = random.Random(options["seed"])
+        users = list(User.objects.order_by("pk"))
+        clients = []
+        for user in rng.sample(users, min(options["sessions"], len(users))):
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+        if not clients:
+            raise CommandError("Aucun utilisateur : augmentez --users.")
+        ticket_ids = list(Ticket.objects.values_list("pk", flat=True))
+        review_ids = list(Review.objects.values_list("pk", flat=True))
+
+        def path(view):
+            if view == "detail_ticket":
+                return reverse(view, args=[rng.choice(ticket_ids)])
+            if view == "detail_review":
+                return reverse(view, args=[rng.choice(review_ids)])
+            return reverse(view)
+
+        views = rng.choices(
+            list(mix),
+            weights=list(mix.values()),
+            k=options["warmup"] + options["requests"],
+        )
+        return [(view, rng.choice(clients), path(view)) for view in views]
+
+    def replay(self, plan):
+        """Rejoue les requêtes une à une.
+
+        Returns:
+            list: ``(vue, durée en ms, requêtes SQL, statut)`` par requête
+        """
+        results = []
+        for view, client, path in plan:
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(path)
+                duration = (time.perf_counter() - start) * 1000
+            results.append((view, duration, len(queries), response.status_code))
+        return results
+
+    def summary(self, results):
+        if not results:
+            return {"count": 0}
+        return {
+            **summarize([duration for view, duration, queries, status in results]),
+            "queries_mean": round(
+                sum(queries for view, duration, queries, status in results)
+                / len(results),
+                2,
+            ),
+            "queries_max": max(queries for view, duration, queries, status in results),
+            "errors": sum(1 for *_, status in results if status != 200),
+        }
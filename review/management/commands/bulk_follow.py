@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import User
+from review.follows import bulk_follow, bulk_unfollow, parse_usernames
+
+
+class Command(BaseCommand):
+    help = (
+        "Abonne un utilisateur à une liste d'utilisateurs (ou l'en désabonne), "
+        "donnée en arguments ou dans un fichier."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Utilisateur qui s'abonne")
+        parser.add_argument("usernames", nargs="*", help="Utilisateurs à suivre")
+        parser.add_argument(
+            "--file", help="Fichier de noms d'utilisateur (« - » : entrée standard)"
+        )
+        parser.add_argument(
+            "--unfollow", action="store_true", help="Désabonne au lieu d'abonner."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"L'utilisateur '{options['username']}' n'existe pas.")
+
+        usernames = list(options["usernames"])
+        if options["file"] == "-":
+            usernames += parse_usernames(sys.stdin.read())
+        elif options["file"]:
+            with open(options["file"], encoding="utf-8") as file:
+                usernames += parse_usernames(file.read())
+
+        operation = bulk_unfollow if options["unfollow"] else bulk_follow
+        report = operation(user, usernames)
+        self.stdout.write(self.style.SUCCESS(f"Traités : {len(report.changed)}"))
+        for field in ("unchanged", "duplicates", "unknown", "own"):
+            names = getattr(report, field)
+            if names:
+                self.stdout.write(self.style.WARNING(f"{field} : {', '.join(names)}"))
@@ -0,0 +1,125 @@
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from review.imaging import DERIVATIVES_DIR
+from review.models import Ticket
+
+# Nom adressé par contenu : <dossier>/<xx>/<empreinte SHA-256>.<ext>
+CONTENT_ADDRESSED = re.compile(r"(?:^|/)([0-9a-f]{2})/(\1[0-9a-f]{62})\.\w+$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Déduplique les images de tickets téléversées avant le stockage adressé "
+        "par contenu, puis supprime les images et les dérivées qui ne sont plus "
+        "référencées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=float,
+            default=None,
+            help="Âge minimal (secondes) des fichiers supprimés "
+            "(par défaut IMAGE_RELEASE_GRACE).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Affiche les fichiers concernés sans rien modifier.",
+        )
+
+    def handle(self, *args, **options):
+        grace = options["grace"]
+        if grace is None:
+            grace = settings.IMAGE_RELEASE_GRACE
+        dry_run = options["dry_run"]
+        field = Ticket._meta.get_field("image")
+        storage = field.storage
+
+        moved = self.deduplicate(storage, field.upload_to, dry_run)
+
+        images = set(Ticket.objects.exclude(image="").values_list("image", flat=True))
+        removed = 0
+        for name in self.walk(storage, field.upload_to):
+            if name in images or self.is_recent(storage, name, grace):
+                continue
+            self.stdout.write(f"{name} : orpheline")
+            if dry_run or storage.delete_unused(name, grace):
+                removed += 1
+
+        variants = {
+            variant["name"]
+            for values in Ticket.objects.values_list("image_variants", flat=True)
+            for variant in values or ()
+        }
+        for name in self.walk(default_storage, DERIVATIVES_DIR):
+            if name in variants or self.is_recent(default_storage, name, grace):
+                continue
+            self.stdout.write(f"{name} : dérivée orpheline")
+            if not dry_run:
+                default_storage.delete(name)
+            removed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{moved} images dédupliquées, {removed} fichiers supprimés."
+            )
+        )
+
+    def deduplicate(self, storage, directory, dry_run):
+        """Enregistre sous leur nom adressé par contenu les images d'avant ce stockage.
+
+        Les tickets sont mis à jour sans être sauvegardés : leurs dérivées restent
+        valables. L'ancien fichier, devenu orphelin, est supprimé ensuite.
+
+        Args:
+            storage (ContentAddressedStorage): Stockage des images de tickets
+            directory (str): Dossier des images de tickets
+            dry_run (bool): N'enregistre rien
+
+        Returns:
+            int: Nombre d'anciens noms remplacés
+        """
+        legacy = (
+            Ticket.objects.exclude(image="")
+            .exclude(image=None)
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        moved = 0
+        for name in legacy:
+            if CONTENT_ADDRESSED.search(name) or not storage.exists(name):
+                continue
+            if dry_run:
+                self.stdout.write(f"{name} : à dédupliquer")
+            else:
+                with storage.open(name) as file:
+                    hashed_name = storage.save(
+                        os.path.join(directory, os.path.basename(name)), file
+                    )
+                Ticket.objects.filter(image=name).update(image=hashed_name)
+                self.stdout.write(f"{name} -> {hashed_name}")
+            moved += 1
+        return moved
+
+    @staticmethod
+    def walk(storage, directory):
+        """Noms de tous les fichiers d'un dossier du stockage, sous-dossiers compris."""
+        if not storage.exists(directory):
+            return
+        directories, files = storage.listdir(directory)
+        for file_name in files:
+            yield f"{directory.rstrip('/')}/{file_name}"
+        for subdirectory in directories:
+            yield from Command.walk(storage, f"{directory.rstrip('/')}/{subdirectory}")
+
+    @staticmethod
+    def is_recent(storage, name, grace):
+        """Indique si un fichier a été écrit ou réutilisé depuis moins de ``grace``."""
+        return time.time() - os.path.getmtime(storage.path(name)) < grace
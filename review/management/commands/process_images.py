@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from review.models import Ticket
+from review.tasks import image_job, run_image_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Traite les images de tickets restées en attente (par exemple après un arrêt "
+        "du serveur pendant leur traitement)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--failed", action="store_true", help="Retraite aussi les images en échec."
+        )
+
+    def handle(self, *args, **options):
+        statuses = [Ticket.IMAGE_PROCESSING]
+        if options["failed"]:
+            statuses.append(Ticket.IMAGE_FAILED)
+        tickets = Ticket.objects.filter(image_status__in=statuses).exclude(image="")
+        for ticket in tickets.iterator():
+            status = run_image_job(image_job(ticket, "image"))
+            self.stdout.write(f"{ticket.image.name} : {status}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from review.feed import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit la table des flux d'activité (FeedEntry) à partir des tickets, "
+        "critiques et abonnements."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_feed()
+        self.stdout.write(self.style.SUCCESS(f"{count} entrées de flux créées."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from review.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les index plein texte (FTS5) des tickets et des critiques."
+
+    def handle(self, *args, **options):
+        if rebuild_index():
+            self.stdout.write(self.style.SUCCESS("Index de recherche reconstruits."))
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Aucun index plein texte : la base de données n'est pas SQLite."
+                )
+            )
@@ -0,0 +1,52 @@
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from review.imaging import process_image_file
+from review.models import Ticket
+from review.tasks import FAILED, READY, finish_image_job, get_executor, image_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Régénère en parallèle les images dérivées (tailles et formats) des images "
+        "de tickets existantes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Nombre de processus (par défaut IMAGE_PROCESSING_WORKERS).",
+        )
+
+    def handle(self, *args, **options):
+        jobs = [
+            image_job(ticket, "image")
+            for ticket in Ticket.objects.exclude(image="").exclude(image=None)
+        ]
+        executor = get_executor(
+            options["workers"] or settings.IMAGE_PROCESSING_WORKERS or 1
+        )
+        futures = {
+            executor.submit(
+                process_image_file,
+                job["path"],
+                job["name"],
+                str(settings.MEDIA_ROOT),
+                job["max_size"],
+            ): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            error = future.exception()
+            if error:
+                finish_image_job(job, FAILED)
+                self.stderr.write(f"{job['name']} : {error}")
+            else:
+                finish_image_job(job, READY, future.result())
+                self.stdout.write(f"{job['name']} : {len(future.result())} dérivées")
+        self.stdout.write(self.style.SUCCESS(f"{len(jobs)} images traitées."))
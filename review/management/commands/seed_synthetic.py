@@ -0,0 +1,43 @@
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from authentication.models import User
+from review.benchmarks import add_dataset_arguments, dataset_arguments
+from review.synthetic import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Remplit la base configurée avec un jeu de données synthétique reproductible "
+        "(utilisateurs bench<graine>_N, abonnements en loi de puissance, tickets, "
+        "critiques, copies dans media/synthetic des images de media/tickets), par "
+        "insertions groupées."
+    )
+
+    def add_arguments(self, parser):
+        add_dataset_arguments(parser, users=1000)
+        parser.add_argument(
+            "--password",
+            help="Mot de passe des utilisateurs créés (sans : connexion impossible)",
+        )
+
+    def handle(self, *args, **options):
+        prefix = f"bench{options['seed']}_"
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Des utilisateurs « {prefix}… » existent déjà : "
+                "choisissez une autre graine (--seed)."
+            )
+
+        with transaction.atomic():
+            counts = seed_dataset(**dataset_arguments(options))
+            if options["password"]:
+                # Un seul hachage pour tous les utilisateurs synthétiques
+                User.objects.filter(username__startswith=prefix).update(
+                    password=make_password(options["password"])
+                )
+
+        for model, count in counts.items():
+            self.stdout.write(f"{model} : {count}")
+        self.stdout.write(self.style.SUCCESS(f"Utilisateurs créés : {prefix}0…"))
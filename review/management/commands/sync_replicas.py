@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from litrevu.routers import PRIMARY
+
+
+class Command(BaseCommand):
+    help = (
+        "Copie la base principale SQLite vers les réplicas déclarés (DB_REPLICAS), "
+        "par l'API de sauvegarde de SQLite. Tient lieu de réplication en "
+        "développement ; sous PostgreSQL, la réplication est assurée par le serveur."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Répète la copie toutes les N secondes (0 : une seule copie).",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("Aucun réplica déclaré (variable DB_REPLICAS).")
+        if connections[PRIMARY].vendor != "sqlite":
+            raise CommandError("La copie des réplicas n'est prévue que pour SQLite.")
+
+        while True:
+            start = time.perf_counter()
+            for alias in settings.DATABASE_REPLICAS:
+                self.copy(alias)
+            elapsed = (time.perf_counter() - start) * 1000
+            count = len(settings.DATABASE_REPLICAS)
+            self.stdout.write(f"{count} réplica(s) à jour en {elapsed:.0f} ms")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+
+    def copy(self, alias):
+        """Copie la base principale dans le fichier du réplica ``alias``."""
+        primary = connections[PRIMARY]
+        primary.ensure_connection()
+        # Les connexions ouvertes sur le réplica relisent la base après la copie
+        connections[alias].close()
+        target = sqlite3.connect(settings.DATABASES[alias]["NAME"])
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
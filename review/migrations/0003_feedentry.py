@@ -0,0 +1,108 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_feed(apps, schema_editor):
+    """Remplit les flux matérialisés à partir des données existantes."""
+    FeedEntry = apps.get_model("review", "FeedEntry")
+    Review = apps.get_model("review", "Review")
+    Ticket = apps.get_model("review", "Ticket")
+    UserFollows = apps.get_model("review", "UserFollows")
+
+    audiences = {}
+    for user_id, followed_id in UserFollows.objects.values_list(
+        "user_id", "followed_user_id"
+    ):
+        audiences.setdefault(followed_id, []).append(user_id)
+
+    answered = Review.objects.exclude(ticket=None).values("ticket_id")
+    sources = (
+        ("ticket", Ticket.objects.exclude(pk__in=answered)),
+        ("review", Review.objects.all()),
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                owner_id=owner_id,
+                author_id=author_id,
+                item_type=item_type,
+                item_id=pk,
+                created_at=created_at,
+            )
+            for item_type, queryset in sources
+            for pk, author_id, created_at in queryset.values_list(
+                "pk", "user_id", "created_at"
+            )
+            for owner_id in (author_id, *audiences.get(author_id, ()))
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("review", "0002_alter_review_rating_alter_userfollows_followed_user"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "item_type",
+                    models.CharField(
+                        choices=[("ticket", "Ticket"), ("review", "Critique")],
+                        max_length=6,
+                    ),
+                ),
+                ("item_id", models.PositiveBigIntegerField()),
+                ("created_at", models.DateTimeField()),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["owner", "-created_at", "-item_type", "-item_id"],
+                        name="review_feed_owner_page_idx",
+                    ),
+                    models.Index(
+                        fields=["item_type", "item_id"], name="review_feed_item_idx"
+                    ),
+                    models.Index(
+                        fields=["owner", "author"], name="review_feed_owner_author_idx"
+                    ),
+                ],
+                "unique_together": {("owner", "item_type", "item_id")},
+            },
+        ),
+        migrations.RunPython(populate_feed, migrations.RunPython.noop),
+    ]
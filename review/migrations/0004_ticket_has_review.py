@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:44
+
+from django.db import migrations, models
+
+
+def backfill_has_review(apps, schema_editor):
+    """Marque les tickets existants ayant déjà reçu une critique."""
+    Review = apps.get_model("review", "Review")
+    Ticket = apps.get_model("review", "Ticket")
+    Ticket.objects.filter(
+        pk__in=Review.objects.exclude(ticket=None).values("ticket_id")
+    ).update(has_review=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("review", "0003_feedentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="has_review",
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_has_review, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("review", "0005_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("processing", "En cours de traitement"),
+                    ("ready", "Prête"),
+                    ("failed", "Échec du traitement"),
+                ],
+                default="ready",
+                editable=False,
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("review", "0006_ticket_image_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
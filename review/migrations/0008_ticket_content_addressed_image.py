@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:49
+
+import review.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("review", "0007_ticket_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ticket",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                db_index=True,
+                null=True,
+                storage=review.storage.ContentAddressedStorage(),
+                upload_to="tickets/",
+            ),
+        ),
+    ]
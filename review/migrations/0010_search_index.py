@@ -0,0 +1,62 @@
+from django.db import migrations
+
+# Index plein texte FTS5 (SQLite uniquement) des tickets et des critiques.
+# Tables à contenu externe : le texte n'est pas dupliqué, seul l'index est stocké.
+# Les déclencheurs maintiennent l'index quelle que soit l'origine de l'écriture
+# (ORM, bulk_create, update, suppression en cascade).
+# Tokenisation unicode61 sans diacritiques : « éléphant » et « elephant » sont
+# indexés de la même manière.
+SOURCES = (
+    ("review_ticket_fts", "review_ticket", ("title", "description")),
+    ("review_review_fts", "review_review", ("headline", "body")),
+)
+
+
+def _statements(fts_table, table, columns):
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    insert = f"INSERT INTO {fts_table}(rowid, {names}) VALUES (new.id, {new});"
+    delete = (
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({names}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {names} ON {table} "
+        f"BEGIN {delete} {insert} END",
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    """Crée et remplit l'index plein texte (SQLite uniquement)."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for source in SOURCES:
+        for statement in _statements(*source):
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    """Supprime l'index plein texte et ses déclencheurs."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for fts_table, table, columns in SOURCES:
+        for suffix in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("review", "0009_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,8 +1,11 @@
 from django.db import models
 from authentication.models import User
 from django.conf import settings
-from PIL import Image
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .storage import ContentAddressedStorage
 
 
 class Ticket(models.Model):
@@ -16,29 +19,143 @@ class Ticket(models.Model):
         created_at (datetime): Date et heure de création (automatique)
         updated_at (datetime): Date et heure de dernière modification (automatique)
         user (User): Utilisateur ayant créé le ticket
-        image (ImageField): Image optionnelle du livre/article
+        image (ImageField): Image optionnelle du livre/article, stockée une seule fois
+            par contenu et partagée entre les tickets qui la référencent
+        has_review (bool): Indique si le ticket a reçu au moins une critique
+            (dénormalisé, maintenu par les signaux de Review)
+        image_status (str): État du traitement de l'image (en cours, prête, échec)
+        image_variants (list): Images dérivées (tailles et formats) de l'image
     """
 
+    IMAGE_PROCESSING = "processing"
+    IMAGE_READY = "ready"
+    IMAGE_FAILED = "failed"
+    IMAGE_STATUS_CHOICES = [
+        (IMAGE_PROCESSING, "En cours de traitement"),
+        (IMAGE_READY, "Prête"),
+        (IMAGE_FAILED, "Échec du traitement"),
+    ]
+
     title = models.CharField(max_length=128)
     description = models.TextField(max_length=2048, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    image = models.ImageField(upload_to="tickets/", null=True, blank=True)
+    image = models.ImageField(
+        upload_to="tickets/",
+        storage=ContentAddressedStorage(),
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    has_review = models.BooleanField(default=False, db_index=True, editable=False)
+    image_status = models.CharField(
+        max_length=10, choices=IMAGE_STATUS_CHOICES, default=IMAGE_READY, editable=False
+    )
+    image_variants = models.JSONField(default=list, blank=True, editable=False)
 
     IMAGE_MAX_SIZE = (500, 500)
 
-    def resize_image(self):
-        """Redimensionne l'image téléchargée aux dimensions maximales définies"""
-        if self.image:
-            image = Image.open(self.image)
-            image.thumbnail(self.IMAGE_MAX_SIZE)
-            image.save(self.image.path)
+    class Meta:
+        indexes = [
+            # Tickets d'un utilisateur du plus récent au plus ancien (posts, flux)
+            models.Index(
+                fields=["user", "-created_at"], name="review_ticket_user_date_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Mémorise l'image chargée pour détecter son remplacement"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image = instance.__dict__.get("image")
+        return instance
+
+    @classmethod
+    def release_image(cls, name, variants=()):
+        """Supprime une image et ses dérivées si plus aucun ticket ne la référence.
+
+        Une image réutilisée depuis moins de ``IMAGE_RELEASE_GRACE`` secondes est
+        conservée : le ticket qui la réutilise n'est peut-être pas encore validé.
+        La commande ``clean_images`` supprime plus tard les fichiers restés orphelins.
+        Les dérivées, nommées d'après le contenu, sont conservées si une autre image
+        de même contenu les référence.
+
+        Args:
+            name (str): Nom de l'image dans le stockage
+            variants (list): Dérivées de l'image
+        """
+        if not name or cls.objects.filter(image=name).exists():
+            return
+        storage = cls._meta.get_field("image").storage
+        names = [variant["name"] for variant in variants or ()]
+        if not storage.delete_unused(name, settings.IMAGE_RELEASE_GRACE) or not names:
+            return
+        shared = Q()
+        for variant_name in names:
+            shared |= Q(image_variants__icontains=variant_name)
+        if not cls.objects.filter(shared).exists():
+            for variant_name in names:
+                storage.delete(variant_name)
+
+    @property
+    def image_processing(self):
+        """Indique si l'image est en attente de traitement"""
+        return self.image_status == self.IMAGE_PROCESSING
 
     def save(self, *args, **kwargs):
-        """Surcharge de la méthode save pour redimensionner l'image avant sauvegarde"""
+        """Surcharge de la méthode save pour planifier le traitement de l'image.
+
+        Le traitement (dérivées et redimensionnement) n'est planifié que si
+        l'image a changé ; il est exécuté hors de la requête par :mod:`review.tasks`.
+        """
+        loaded_image = getattr(self, "_loaded_image", None)
+        image_changed = bool(self.image) and self.image.name != loaded_image
+        image_replaced = bool(loaded_image) and loaded_image != self.image.name
+        if image_replaced:
+            # Dérivées enregistrées par le traitement, peut-être après le
+            # chargement de l'instance : elles sont libérées avec l'ancienne image
+            loaded_variants = (
+                Ticket.objects.filter(pk=self.pk)
+                .values_list("image_variants", flat=True)
+                .first()
+            )
+        if image_changed or image_replaced:
+            self.image_variants = []
+            self.image_status = (
+                self.IMAGE_PROCESSING if image_changed else self.IMAGE_READY
+            )
         super().save(*args, **kwargs)
-        self.resize_image()
+        self._loaded_image = self.image.name
+
+        if image_replaced:
+            # L'ancienne image n'est peut-être plus référencée
+            transaction.on_commit(
+                lambda: Ticket.release_image(loaded_image, loaded_variants)
+            )
+        if image_changed:
+            self.reuse_or_schedule_image()
+
+    def reuse_or_schedule_image(self):
+        """Réutilise le traitement d'une image identique ou planifie le traitement"""
+        twin = (
+            Ticket.objects.filter(image=self.image.name, image_status=self.IMAGE_READY)
+            .exclude(pk=self.pk)
+            .values_list("image_variants", flat=True)
+            .first()
+        )
+        from .tasks import image_processed, schedule_image
+
+        if twin is not None:
+            self.image_status = self.IMAGE_READY
+            self.image_variants = twin
+            Ticket.objects.filter(pk=self.pk).update(
+                image_status=self.image_status, image_variants=twin
+            )
+            image_processed.send(sender=Ticket, pk=self.pk)
+            return
+
+        schedule_image(self, "image")
 
     def __str__(self):
         return f"{self.title}"
@@ -56,6 +173,7 @@ class Review(models.Model):
         body (str): Corps de la critique (max 8192 caractères)
         user (User): Utilisateur ayant créé la critique
         created_at (datetime): Date et heure de création (automatique)
+        updated_at (datetime): Date et heure de dernière modification (automatique)
     """
 
     RATING_CHOICES = [(1, "1"), (2, "2"), (3, "3"), (4, "4"), (5, "5")]
@@ -68,6 +186,19 @@ class Review(models.Model):
     body = models.TextField(max_length=8192, blank=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Critiques d'un utilisateur du plus récent au plus ancien (posts, flux)
+            models.Index(
+                fields=["user", "-created_at"], name="review_review_user_date_idx"
+            ),
+            # Critiques d'un ticket dans l'ordre d'affichage (détail du ticket)
+            models.Index(
+                fields=["ticket", "-created_at"], name="review_review_ticket_date_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.headline}"
@@ -96,6 +227,69 @@ class UserFollows(models.Model):
     class Meta:
         # Garantit qu'un utilisateur ne peut suivre un autre utilisateur qu'une seule fois
         unique_together = ("user", "followed_user")
+        indexes = [
+            # Liste des abonnés d'un utilisateur, couverte par l'index
+            models.Index(
+                fields=["followed_user", "user"], name="review_follows_followed_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} suit {self.followed_user}"
+
+
+class FeedEntry(models.Model):
+    """
+    Entrée matérialisée du flux d'activité d'un utilisateur (fan-out à l'écriture).
+    Chaque ticket sans critique et chaque critique est recopié dans le flux de son
+    auteur et de ses abonnés, afin que la page d'accueil se lise par un simple
+    parcours d'index sur les entrées du propriétaire.
+
+    Attributes:
+        owner (User): Utilisateur à qui appartient le flux
+        author (User): Auteur de l'élément référencé
+        item_type (str): Type de l'élément (ticket ou critique)
+        item_id (int): Clé primaire de l'élément référencé
+        created_at (datetime): Date de création de l'élément référencé
+        updated_at (datetime): Date de la dernière modification de l'entrée ou de
+            ce qu'elle affiche (élément, ticket de la critique, auteurs)
+    """
+
+    TICKET = "ticket"
+    REVIEW = "review"
+    ITEM_TYPE_CHOICES = [(TICKET, "Ticket"), (REVIEW, "Critique")]
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    item_type = models.CharField(max_length=6, choices=ITEM_TYPE_CHOICES)
+    item_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # Un élément n'apparaît qu'une seule fois dans le flux d'un utilisateur
+        unique_together = ("owner", "item_type", "item_id")
+        indexes = [
+            # Lecture paginée du flux : parcours d'index dans l'ordre d'affichage
+            models.Index(
+                fields=["owner", "-created_at", "-item_type", "-item_id"],
+                name="review_feed_owner_page_idx",
+            ),
+            # Retrait d'un élément de tous les flux
+            models.Index(fields=["item_type", "item_id"], name="review_feed_item_idx"),
+            # Retrait des éléments d'un auteur lors d'un désabonnement
+            models.Index(
+                fields=["owner", "author"], name="review_feed_owner_author_idx"
+            ),
+            # Empreinte du flux d'un utilisateur (ETag de la page d'accueil)
+            models.Index(
+                fields=["owner", "updated_at"], name="review_feed_owner_updated_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item_type} {self.item_id} dans le flux de {self.owner}"
@@ -0,0 +1,174 @@
+"""
+Recherche plein texte dans les tickets et les critiques.
+
+Sous SQLite, la recherche interroge les index FTS5 ``review_ticket_fts`` et
+``review_review_fts`` (migration ``0010_search_index``), tenus à jour par des
+déclencheurs : les résultats sont classés par pertinence (BM25, titre pondéré)
+et accompagnés d'un extrait où les termes trouvés sont surlignés. Les accents
+sont ignorés (« eleve » trouve « élève »). Sur les autres bases de données, une
+recherche ``icontains`` non classée, du plus récent au plus ancien, prend le relais.
+"""
+
+import re
+from functools import reduce
+from operator import or_
+from typing import NamedTuple
+
+from django.db import connection, connections, router
+from django.db.models import Model, Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import Review, Ticket
+
+PAGE_SIZE = 20
+SNIPPET_WORDS = 16
+# Poids de BM25 : le titre compte davantage que le texte
+TITLE_WEIGHT = 10.0
+
+TICKET = "ticket"
+REVIEW = "review"
+
+# (type, modèle, table FTS5, colonne titre, colonne texte)
+SOURCES = (
+    (TICKET, Ticket, "review_ticket_fts", "title", "description"),
+    (REVIEW, Review, "review_review_fts", "headline", "body"),
+)
+
+# Délimiteurs des termes trouvés dans les extraits : caractères de contrôle
+# absents du texte, remplacés par <mark> après échappement du HTML
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+
+class SearchResult(NamedTuple):
+    """Résultat de recherche : élément trouvé et extrait HTML échappé."""
+
+    item_type: str
+    item: Model
+    snippet: str
+
+
+def build_query(text):
+    """Convertit une saisie libre en requête FTS5.
+
+    Chaque mot devient un terme entre guillemets (les opérateurs FTS5 éventuels
+    ne sont pas interprétés) ; tous les termes sont requis et le dernier est
+    recherché comme préfixe, la saisie pouvant être incomplète.
+
+    Returns:
+        str: Requête FTS5, vide si la saisie ne contient aucun mot
+    """
+    terms = [f'"{word}"' for word in re.findall(r"\w+", text)]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_items(text, page=1, page_size=PAGE_SIZE):
+    """Recherche les tickets et les critiques correspondant à une saisie.
+
+    Args:
+        text (str): Saisie de l'utilisateur
+        page (int): Numéro de page (à partir de 1)
+        page_size (int): Nombre de résultats par page
+
+    Returns:
+        tuple: Résultats de la page (:class:`SearchResult`) et indicateur
+        d'existence d'une page suivante
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return [], False
+    offset = (page - 1) * page_size
+    # Requête SQL brute : la base est choisie comme pour une lecture de l'ORM
+    # (réplica éventuel, voir litrevu.routers)
+    connection = connections[router.db_for_read(Ticket)]
+    if connection.vendor == "sqlite":
+        rows = _search_fts(connection, build_query(text), page_size + 1, offset)
+    else:
+        rows = _search_icontains(words, page_size + 1, offset)
+    return _hydrate(rows[:page_size]), len(rows) > page_size
+
+
+def _search_fts(connection, query, limit, offset):
+    """Interroge les index FTS5, classés ensemble par score BM25 croissant."""
+    selects = " UNION ALL ".join(
+        f"SELECT '{item_type}', rowid, bm25({table}, {TITLE_WEIGHT}, 1.0) AS score, "
+        f"snippet({table}, -1, %s, %s, '…', {SNIPPET_WORDS}) "
+        f"FROM {table} WHERE {table} MATCH %s"
+        for item_type, model, table, title, text in SOURCES
+    )
+    params = [_MARK_START, _MARK_END, query] * len(SOURCES)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"{selects} ORDER BY score LIMIT %s OFFSET %s", [*params, limit, offset]
+        )
+        return [(item_type, pk, snippet) for item_type, pk, score, snippet in cursor]
+
+
+def _search_icontains(words, limit, offset):
+    """Recherche de repli sans index plein texte, du plus récent au plus ancien."""
+    rows = []
+    for item_type, model, table, title, text in SOURCES:
+        condition = Q()
+        for word in words:
+            condition &= reduce(
+                or_, (Q(**{f"{field}__icontains": word}) for field in (title, text))
+            )
+        rows += [
+            (created_at, item_type, pk)
+            for pk, created_at in model.objects.filter(condition)
+            .order_by("-created_at")
+            .values_list("pk", "created_at")[: offset + limit]
+        ]
+    rows.sort(reverse=True)
+    return [
+        (item_type, pk, None) for created_at, item_type, pk in rows[offset:][:limit]
+    ]
+
+
+def _highlight(snippet):
+    """Échappe un extrait FTS5 puis surligne les termes trouvés."""
+    html = escape(snippet).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+    return mark_safe(html)
+
+
+def _hydrate(rows):
+    """Charge les éléments trouvés (deux requêtes au plus), dans l'ordre du tri."""
+    items = {
+        TICKET: Ticket.objects.select_related("user").in_bulk(
+            [pk for item_type, pk, snippet in rows if item_type == TICKET]
+        ),
+        REVIEW: Review.objects.select_related("user", "ticket").in_bulk(
+            [pk for item_type, pk, snippet in rows if item_type == REVIEW]
+        ),
+    }
+    results = []
+    for item_type, pk, snippet in rows:
+        item = items[item_type].get(pk)
+        if item is None:
+            # Supprimé entre la recherche et le chargement
+            continue
+        if snippet is None:
+            text = item.description if item_type == TICKET else item.body
+            snippet = escape(Truncator(text).words(SNIPPET_WORDS))
+        else:
+            snippet = _highlight(snippet)
+        results.append(SearchResult(item_type, item, snippet))
+    return results
+
+
+def rebuild_index():
+    """Reconstruit les index FTS5 à partir des tables des tickets et critiques.
+
+    Returns:
+        bool: False si la base de données n'est pas SQLite (aucun index)
+    """
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        for item_type, model, table, title, text in SOURCES:
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+    return True
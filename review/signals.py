@@ -0,0 +1,124 @@
+"""
+Récepteurs de signaux maintenant les données dérivées de l'application review.
+
+Le flux matérialisé (:mod:`review.feed`) est tenu à jour à chaque création ou
+suppression de ticket, de critique ou d'abonnement, quelle que soit la vue
+d'origine (création combinée ticket + critique, suppression, page d'abonnement…),
+de même que le cache du graphe d'abonnements (:mod:`review.follows`).
+Les images de tickets supprimés sont libérées du stockage si plus aucun ticket ne
+les référence. Toute modification d'un
+ticket, d'une critique ou d'un utilisateur invalide les cartes mises en cache qui
+l'affichent (:mod:`review.cards`) et date de maintenant les entrées de flux
+correspondantes (empreintes des pages, :mod:`review.etags`). Les nouveaux tickets
+et critiques sont enfin annoncés aux pages d'accueil ouvertes (:mod:`review.live`).
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from authentication.models import User
+from . import cards, feed, follows, live, tasks
+from .models import Review, Ticket, UserFollows
+
+
+@receiver(post_save, sender=Ticket)
+def publish_ticket(sender, instance, created, **kwargs):
+    """Ajoute un nouveau ticket au flux de son auteur et de ses abonnés."""
+    if created:
+        feed.publish(feed.TICKET, instance)
+        live.announce(feed.TICKET, instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def retract_ticket(sender, instance, **kwargs):
+    """Retire un ticket supprimé de tous les flux et libère son image."""
+    feed.retract(feed.TICKET, instance.pk)
+    if instance.image:
+        name, variants = instance.image.name, instance.image_variants
+        transaction.on_commit(lambda: Ticket.release_image(name, variants))
+
+
+@receiver(post_save, sender=Review)
+def publish_review(sender, instance, created, **kwargs):
+    """Ajoute une nouvelle critique aux flux et retire le ticket auquel elle répond."""
+    if created:
+        feed.publish(feed.REVIEW, instance)
+        live.announce(feed.REVIEW, instance)
+        if instance.ticket_id:
+            Ticket.objects.filter(pk=instance.ticket_id).update(has_review=True)
+            feed.retract(feed.TICKET, instance.ticket_id)
+
+
+@receiver(post_delete, sender=Review)
+def retract_review(sender, instance, origin=None, **kwargs):
+    """Retire une critique supprimée ; republie son ticket s'il reste sans critique."""
+    feed.retract(feed.REVIEW, instance.pk)
+    if not instance.ticket_id or isinstance(origin, Ticket):
+        # Le ticket est lui-même en cours de suppression
+        return
+    if Review.objects.filter(ticket_id=instance.ticket_id).exists():
+        return
+    Ticket.objects.filter(pk=instance.ticket_id).update(has_review=False)
+    ticket = Ticket.objects.filter(pk=instance.ticket_id).first()
+    if ticket:
+        feed.publish(feed.TICKET, ticket)
+
+
+@receiver(post_save, sender=UserFollows)
+def follow_user(sender, instance, created, **kwargs):
+    """Ajoute au flux de l'abonné les éléments de l'utilisateur suivi."""
+    if created:
+        follows.invalidate(instance.user_id, instance.followed_user_id)
+        feed.follow(instance.user_id, [instance.followed_user_id])
+
+
+@receiver(post_delete, sender=UserFollows)
+def unfollow_user(sender, instance, **kwargs):
+    """Retire du flux de l'abonné les éléments de l'utilisateur qui n'est plus suivi."""
+    follows.invalidate(instance.user_id, instance.followed_user_id)
+    feed.unfollow(instance.user_id, instance.followed_user_id)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_card(sender, instance, **kwargs):
+    """Invalide les cartes affichant un ticket ou une critique modifié."""
+    cards.invalidate(sender, instance.pk)
+
+
+@receiver(post_save, sender=Ticket)
+def touch_ticket(sender, instance, created, **kwargs):
+    """Signale la modification d'un ticket aux flux qui l'affichent."""
+    if not created:
+        feed.touch_ticket(instance.pk)
+
+
+@receiver(post_save, sender=Review)
+def touch_review(sender, instance, created, **kwargs):
+    """Signale la modification d'une critique aux flux qui l'affichent."""
+    if not created:
+        feed.touch_review(instance.pk)
+
+
+@receiver(tasks.image_processed, sender=Ticket)
+def ticket_image_processed(sender, pk, **kwargs):
+    """Répercute la fin du traitement de l'image d'un ticket sur son affichage."""
+    Ticket.objects.filter(pk=pk).update(updated_at=timezone.now())
+    feed.touch_ticket(pk)
+    cards.invalidate(Ticket, pk)
+
+
+@receiver(post_save, sender=User)
+def update_author(sender, instance, created, update_fields=None, **kwargs):
+    """Invalide les cartes et les flux affichant un utilisateur modifié.
+
+    La mise à jour de la date de dernière connexion, seule, est ignorée.
+    """
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    cards.invalidate(sender, instance.pk)
+    feed.touch_author(instance.pk)
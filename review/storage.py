@@ -0,0 +1,89 @@
+"""
+Stockage adressé par contenu des images téléversées.
+
+Chaque fichier est enregistré sous un nom dérivé de l'empreinte SHA-256 de son
+contenu : une même image téléversée plusieurs fois n'est stockée qu'une seule
+fois et partagée par les tickets qui la référencent.
+
+Un fichier réutilisé voit sa date de modification renouvelée : sa suppression,
+lorsque plus aucun ticket ne le référence, est différée tant qu'un téléversement
+concurrent du même contenu a pu le réutiliser sans être encore validé.
+"""
+
+import hashlib
+import os
+import time
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Stockage sur disque nommant les fichiers d'après l'empreinte de leur contenu.
+
+    Le nom ``<dossier>/<nom>.<ext>`` proposé par le champ devient
+    ``<dossier>/<xx>/<empreinte>.<ext>``. Si ce fichier existe déjà, rien n'est
+    écrit et le nom existant est réutilisé (sa date de modification renouvelée).
+    """
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        hexdigest = digest.hexdigest()
+        hashed_name = os.path.join(directory, hexdigest[:2], hexdigest + extension)
+        if self.touch(hashed_name):
+            return hashed_name
+
+        saved_name = super()._save(hashed_name, content)
+        if saved_name != hashed_name:
+            # Écriture concurrente du même contenu : on garde le premier exemplaire
+            self.delete(saved_name)
+        return hashed_name
+
+    def touch(self, name):
+        """Renouvelle la date de modification d'un fichier existant.
+
+        Args:
+            name (str): Nom du fichier dans le stockage
+
+        Returns:
+            bool: False si le fichier n'existe pas (ou vient d'être supprimé)
+        """
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete_unused(self, name, grace):
+        """Supprime un fichier qui n'a pas été réutilisé depuis ``grace`` secondes.
+
+        Le fichier est d'abord mis à l'écart par un renommage atomique : un
+        téléversement concurrent du même contenu l'a touché avant (le fichier est
+        alors remis en place) ou ne le trouve plus et l'écrit de nouveau.
+
+        Args:
+            name (str): Nom du fichier dans le stockage
+            grace (float): Délai (secondes) depuis la dernière réutilisation
+
+        Returns:
+            bool: True si le fichier a été supprimé
+        """
+        path = self.path(name)
+        discarded = f"{path}.{uuid.uuid4().hex}.deleted"
+        try:
+            os.replace(path, discarded)
+        except FileNotFoundError:
+            return False
+        if time.time() - os.stat(discarded).st_mtime < grace:
+            os.replace(discarded, path)
+            return False
+        os.remove(discarded)
+        return True
@@ -0,0 +1,254 @@
+"""
+Génération d'un jeu de données synthétique pour les mesures de performance.
+
+Les objets sont insérés par ``bulk_create`` : les signaux ne sont donc pas émis
+et les données dérivées (drapeau ``has_review``, flux matérialisés) sont
+recalculées en fin de génération.
+
+Le jeu se veut proche d'un usage réel :
+
+- graphe d'abonnements en loi de puissance : quelques utilisateurs très suivis,
+  la plupart peu suivis, et un nombre d'abonnements par utilisateur variable ;
+- dates de création réparties sur une période (``days`` jours), chaque critique
+  étant postérieure au ticket auquel elle répond ;
+- images de tickets copiées depuis les fichiers existants de ``media/tickets``
+  dans un dossier propre au jeu synthétique (``media/synthetic``), avec leurs
+  dérivées : supprimer des tickets synthétiques ne libère jamais les images ou
+  les dérivées de tickets réels.
+"""
+
+import posixpath
+import random
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from authentication.models import User
+from .feed import rebuild_feed
+from .imaging import process_image_file
+from .models import Review, Ticket, UserFollows
+
+BATCH_SIZE = 1000
+
+# Exposant de la loi de puissance de la popularité (nombre d'abonnés)
+FOLLOW_EXPONENT = 1.0
+# Forme de la loi de Pareto du nombre d'abonnements d'un utilisateur (moyenne 2)
+FOLLOWING_SHAPE = 2.0
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+# Dossier des images synthétiques, distinct de celui des images téléversées
+SYNTHETIC_IMAGES_DIR = "synthetic"
+
+
+def _bulk_create(model, objects):
+    """Insère des objets par lots de taille bornée."""
+    objects = iter(objects)
+    while batch := list(islice(objects, BATCH_SIZE)):
+        model.objects.bulk_create(batch)
+
+
+def _set_dates(model, dates):
+    """Applique des dates de création aux objets (``auto_now_add`` les ignore à
+    l'insertion).
+
+    Args:
+        model (type): Modèle des objets
+        dates (dict): Date de création par clé primaire
+    """
+    objects = [
+        model(pk=pk, created_at=created_at, updated_at=created_at)
+        for pk, created_at in dates.items()
+    ]
+    model.objects.bulk_update(
+        objects, ["created_at", "updated_at"], batch_size=BATCH_SIZE
+    )
+
+
+def _follow_graph(rng, user_ids, follows_per_user, exponent):
+    """Abonnements en loi de puissance : ``(abonné, suivi)``.
+
+    La popularité de l'utilisateur de rang ``r`` est proportionnelle à
+    ``1 / r ** exponent`` ; le nombre d'abonnements de chacun suit une loi de
+    Pareto de moyenne ``follows_per_user``.
+    """
+    if follows_per_user <= 0 or len(user_ids) < 2:
+        return
+    ranked = rng.sample(user_ids, len(user_ids))
+    cum_weights = list(
+        accumulate(1 / rank**exponent for rank in range(1, len(ranked) + 1))
+    )
+    mean = FOLLOWING_SHAPE / (FOLLOWING_SHAPE - 1)
+    for user_id in user_ids:
+        wanted = rng.paretovariate(FOLLOWING_SHAPE) * follows_per_user / mean
+        wanted = min(len(user_ids) - 1, max(1, round(wanted)))
+        followed = set()
+        # Tirages pondérés jusqu'à obtenir assez d'utilisateurs distincts
+        for _ in range(10):
+            for followed_id in rng.choices(ranked, cum_weights=cum_weights, k=wanted):
+                if followed_id != user_id:
+                    followed.add(followed_id)
+            if len(followed) >= wanted:
+                break
+        for followed_id in islice(followed, wanted):
+            yield user_id, followed_id
+
+
+def _list_files(storage, directory):
+    """Noms de tous les fichiers d'un dossier du stockage et de ses sous-dossiers."""
+    try:
+        directories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return []
+    names = [posixpath.join(directory, name) for name in files]
+    for subdirectory in directories:
+        names += _list_files(storage, posixpath.join(directory, subdirectory))
+    return names
+
+
+def _available_images():
+    """Copies synthétiques des images de tickets présentes dans le stockage.
+
+    Chaque image de ``tickets`` (sous-dossiers compris) est copiée une fois dans
+    ``SYNTHETIC_IMAGES_DIR`` et ses dérivées sont produites à partir de la copie.
+
+    Returns:
+        dict: Dérivées de chaque copie, par nom de copie
+    """
+    storage = Ticket._meta.get_field("image").storage
+    images = {}
+    for name in sorted(_list_files(storage, "tickets")):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        copy = posixpath.join(SYNTHETIC_IMAGES_DIR, posixpath.basename(name))
+        if not default_storage.exists(copy):
+            # Stockage par défaut : le stockage des tickets, adressé par contenu,
+            # nommerait la copie comme l'original
+            with storage.open(name) as file:
+                copy = default_storage.save(copy, file)
+        images[copy] = process_image_file(
+            default_storage.path(copy),
+            copy,
+            str(settings.MEDIA_ROOT),
+            Ticket.IMAGE_MAX_SIZE,
+        )
+    return images
+
+
+def seed_dataset(
+    users,
+    tickets_per_user,
+    reviews_per_user,
+    follows_per_user,
+    seed=0,
+    days=180,
+    image_ratio=0.0,
+    follow_exponent=FOLLOW_EXPONENT,
+):
+    """Remplit la base avec un jeu de données synthétique.
+
+    Args:
+        users (int): Nombre d'utilisateurs à créer
+        tickets_per_user (int): Nombre de tickets par utilisateur
+        reviews_per_user (int): Nombre de critiques par utilisateur
+        follows_per_user (int): Nombre moyen d'abonnements par utilisateur
+        seed (int): Graine du générateur aléatoire (jeu reproductible)
+        days (int): Période couverte par les dates de création, jusqu'à maintenant
+        image_ratio (float): Proportion de tickets illustrés (0 à 1)
+        follow_exponent (float): Exposant de la loi de puissance des abonnements
+
+    Returns:
+        dict: Nombre d'objets créés par modèle
+    """
+    rng = random.Random(seed)
+    prefix = f"bench{seed}_"
+    now = timezone.now()
+    period = timedelta(days=days).total_seconds()
+
+    def moment(after=None):
+        """Date aléatoire de la période, postérieure à ``after`` le cas échéant."""
+        start = now - timedelta(seconds=period) if after is None else after
+        return start + (now - start) * rng.random()
+
+    _bulk_create(
+        User,
+        (User(username=f"{prefix}{index}", password="!") for index in range(users)),
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith=prefix).values_list("pk", flat=True)
+    )
+
+    _bulk_create(
+        UserFollows,
+        (
+            UserFollows(user_id=user_id, followed_user_id=followed_id)
+            for user_id, followed_id in _follow_graph(
+                rng, user_ids, follows_per_user, follow_exponent
+            )
+        ),
+    )
+
+    variants = _available_images() if image_ratio > 0 else {}
+    images = sorted(variants)
+    illustrated = 0
+
+    def ticket(user_id, index):
+        nonlocal illustrated
+        image = rng.choice(images) if images and rng.random() < image_ratio else None
+        illustrated += image is not None
+        return Ticket(
+            title=f"Livre {index}",
+            description="Description",
+            user_id=user_id,
+            image=image,
+            image_variants=variants.get(image, []),
+        )
+
+    _bulk_create(
+        Ticket,
+        (
+            ticket(user_id, index)
+            for user_id in user_ids
+            for index in range(tickets_per_user)
+        ),
+    )
+    ticket_ids = list(
+        Ticket.objects.filter(user_id__in=user_ids).values_list("pk", flat=True)
+    )
+    ticket_dates = {pk: moment() for pk in ticket_ids}
+    _set_dates(Ticket, ticket_dates)
+
+    answered = set()
+    reviews = []
+    review_dates = []
+    for user_id in user_ids:
+        for index in range(reviews_per_user):
+            ticket_id = rng.choice(ticket_ids) if rng.random() < 0.7 else None
+            if ticket_id in answered:
+                ticket_id = None
+            answered.add(ticket_id)
+            review_dates.append(moment(ticket_dates.get(ticket_id)))
+            reviews.append(
+                Review(
+                    ticket_id=ticket_id,
+                    rating=rng.randint(0, 5),
+                    headline=f"Critique {index}",
+                    body="Commentaire",
+                    user_id=user_id,
+                )
+            )
+    _bulk_create(Review, reviews)
+    review_ids = Review.objects.filter(user_id__in=user_ids).order_by("pk")
+    _set_dates(Review, dict(zip(review_ids.values_list("pk", flat=True), review_dates)))
+    answered.discard(None)
+    Ticket.objects.filter(pk__in=answered).update(has_review=True)
+
+    return {
+        "users": len(user_ids),
+        "follows": UserFollows.objects.filter(user_id__in=user_ids).count(),
+        "tickets": len(ticket_ids),
+        "images": illustrated,
+        "reviews": len(reviews),
+        "feed_entries": rebuild_feed(),
+    }
@@ -0,0 +1,185 @@
+"""
+File de traitement des images téléversées, exécutée hors du cycle de requête.
+
+Les images de tickets sont traitées par un pool de
+processus local (``IMAGE_PROCESSING_WORKERS`` processus) : production des images
+dérivées (:mod:`review.imaging`) et copie réduite de l'original. Un ticket
+passe à l'état « en cours de traitement » à l'enregistrement et revient à l'état
+« prête » lorsque le processus de travail a terminé. Avec
+``IMAGE_PROCESSING_WORKERS = 0``, le traitement est exécuté immédiatement dans le
+processus courant.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.dispatch import Signal
+
+from .imaging import process_image_file
+
+logger = logging.getLogger(__name__)
+
+# Suffixes des champs associés à un champ image : dérivées et état du traitement
+VARIANTS_SUFFIX = "_variants"
+STATUS_SUFFIX = "_status"
+
+READY = "ready"
+FAILED = "failed"
+
+# Émis (avec la clé primaire ``pk``) lorsque le résultat d'un traitement a été
+# enregistré sur l'instance ; ``sender`` est le modèle de l'instance
+image_processed = Signal()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers=None):
+    """Retourne le pool de processus de traitement, créé au premier usage."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers or settings.IMAGE_PROCESSING_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def image_job(instance, field_name):
+    """Décrit le traitement de l'image d'une instance, sous forme sérialisable.
+
+    Args:
+        instance (Model): Instance possédant le champ image
+        field_name (str): Nom du champ image
+
+    Returns:
+        dict: Paramètres du traitement (modèle, clé primaire, champ, fichier)
+    """
+    field_file = getattr(instance, field_name)
+    return {
+        "label": instance._meta.label,
+        "pk": instance.pk,
+        "field_name": field_name,
+        "name": field_file.name,
+        "path": field_file.path,
+        "max_size": getattr(instance, "IMAGE_MAX_SIZE", None),
+    }
+
+
+def schedule_image(instance, field_name):
+    """Planifie le traitement d'une image après validation de la transaction.
+
+    Args:
+        instance (Model): Instance dont l'image vient d'être enregistrée
+        field_name (str): Nom du champ image
+    """
+    transaction.on_commit(partial(process_image, image_job(instance, field_name)))
+
+
+def process_image(job):
+    """Lance le traitement d'une image, dans le pool ou immédiatement.
+
+    Args:
+        job (dict): Traitement décrit par :func:`image_job`
+    """
+    if not settings.IMAGE_PROCESSING_WORKERS:
+        run_image_job(job)
+        return
+
+    future = get_executor().submit(
+        process_image_file,
+        job["path"],
+        job["name"],
+        str(settings.MEDIA_ROOT),
+        job["max_size"],
+    )
+    future.add_done_callback(partial(_on_done, job))
+
+
+def run_image_job(job):
+    """Traite une image dans le processus courant et enregistre le résultat.
+
+    Returns:
+        str: Nouvel état de l'image
+    """
+    try:
+        variants = process_image_file(
+            job["path"], job["name"], str(settings.MEDIA_ROOT), job["max_size"]
+        )
+    except Exception:
+        logger.exception("Échec du traitement de l'image %s", job["name"])
+        return finish_image_job(job, FAILED)
+    return finish_image_job(job, READY, variants)
+
+
+def _on_done(job, future):
+    """Enregistre le résultat d'un traitement terminé dans le pool."""
+    try:
+        error = future.exception()
+        if error:
+            logger.error(
+                "Échec du traitement de l'image %s", job["name"], exc_info=error
+            )
+            finish_image_job(job, FAILED)
+        else:
+            finish_image_job(job, READY, future.result())
+    finally:
+        # Le rappel s'exécute dans un thread du pool : sa connexion lui est propre
+        connection.close()
+
+
+def finish_image_job(job, status, variants=None):
+    """Enregistre le résultat d'un traitement si l'image n'a pas été remplacée.
+
+    Les dérivées appartiennent à l'image : elles sont enregistrées sur toutes les
+    instances qui la partagent, et les anciennes dérivées qui ne font plus partie
+    du nouveau jeu sont supprimées du stockage.
+
+    Args:
+        job (dict): Traitement décrit par :func:`image_job`
+        status (str): État final du traitement
+        variants (list): Dérivées produites (optionnel)
+
+    Returns:
+        str: État enregistré
+    """
+    model = apps.get_model(job["label"])
+    field_name = job["field_name"]
+    variants_field = field_name + VARIANTS_SUFFIX
+    fields = {field.name for field in model._meta.get_fields()}
+    updates = {}
+    if variants is not None:
+        updates[variants_field] = variants
+    if field_name + STATUS_SUFFIX in fields:
+        updates[field_name + STATUS_SUFFIX] = status
+    if not updates:
+        return status
+    instances = model.objects.filter(**{field_name: job["name"]})
+    if variants is None:
+        instances = instances.filter(pk=job["pk"])
+    previous = dict(instances.values_list("pk", variants_field))
+    if job["pk"] not in previous:
+        # Image remplacée ou instance supprimée entre-temps
+        return status
+    instances.filter(pk__in=previous).update(**updates)
+    if variants is not None:
+        current = {variant["name"] for variant in variants}
+        stale = {
+            variant["name"]
+            for old in previous.values()
+            for variant in old or ()
+            if variant["name"] not in current
+        }
+        for name in stale:
+            default_storage.delete(name)
+    for pk in previous:
+        image_processed.send(sender=model, pk=pk)
+    return status
@@ -0,0 +1,45 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+register = template.Library()
+
+
+class CardCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, item):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.item = item
+
+    def render(self, context):
+        version = getattr(self.item.resolve(context), "card_version", None)
+        if version is None:
+            # Élément non annoté par review.cards.with_versions : pas de cache
+            return self.nodelist.render(context)
+        key = make_template_fragment_key(self.fragment_name, [version])
+        value = cache.get(key)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, settings.CARD_CACHE_TIMEOUT)
+        return value
+
+
+@register.tag
+def cardcache(parser, token):
+    """Met en cache le rendu de la carte d'un ticket ou d'une critique.
+
+    Usage : ``{% cardcache "nom_du_fragment" element %} ... {% endcardcache %}``
+
+    La clé du fragment dépend de la version de la carte (``card_version``,
+    renseignée par :func:`review.cards.with_versions`) : le fragment est rendu à
+    nouveau dès que l'élément, son ticket ou l'un de leurs auteurs est modifié.
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' attend un nom de fragment et un élément."
+        )
+    nodelist = parser.parse(("endcardcache",))
+    parser.delete_first_token()
+    return CardCacheNode(nodelist, bits[1].strip("\"'"), parser.compile_filter(bits[2]))
@@ -0,0 +1,37 @@
+from django import template
+from django.core.files.storage import default_storage
+
+register = template.Library()
+
+
+@register.inclusion_tag("review/responsiveimage.html")
+def responsive_image(field_file, variants, *alt_parts, sizes="100vw"):
+    """Affiche une image avec ses dérivées (``<picture>``, ``srcset`` et ``sizes``).
+
+    Args:
+        field_file (FieldFile): Image d'origine, utilisée en repli
+        variants (list): Dérivées produites par :mod:`review.imaging`
+        alt_parts (str): Fragments du texte alternatif, joints par des espaces
+        sizes (str): Largeurs d'affichage selon la fenêtre (attribut ``sizes``)
+
+    Returns:
+        dict: Contexte du gabarit ``review/responsiveimage.html``
+    """
+    src = field_file.url
+    sources = {}
+    for variant in variants or ():
+        url = default_storage.url(variant["name"])
+        if variant.get("master"):
+            # Copie réduite de l'original, affichée en repli
+            src = url
+            continue
+        sources.setdefault(variant["mime"], []).append(f"{url} {variant['width']}w")
+    return {
+        "src": src,
+        "sources": [
+            {"mime": mime, "srcset": ", ".join(srcset)}
+            for mime, srcset in sources.items()
+        ],
+        "alt": " ".join(str(part) for part in alt_parts),
+        "sizes": sizes,
+    }
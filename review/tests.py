@@ -1,3 +1,1238 @@
-from django.test import TestCase
+import asyncio
+import base64
+import gzip
+import os
+import tempfile
+import time
+import zlib
+from datetime import timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db.models import Count, F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.templatetags.static import static
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from authentication.backends import CachedModelBackend
+from authentication.models import User
+from litrevu.compression import CompressionMiddleware, compress_stream, negotiate
+from litrevu.perf import registry
+from litrevu.routers import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter
+from litrevu.staticfiles import StaticFilesMiddleware
+from . import feed, follows, live
+from .imaging import process_image_file
+from .models import FeedEntry, Ticket, Review, UserFollows
+from .search import search_items
+from .synthetic import seed_dataset
+from .tasks import image_job, run_image_job
+
+
+class QueryBudgetTests(TestCase):
+    """Vérifie que chaque page de liste exécute un nombre fixe de requêtes SQL,
+    quel que soit le nombre de lignes affichées (absence de requêtes N+1).
+
+    Chaque vue est appelée sur un petit puis sur un grand jeu de données : le
+    budget doit être identique dans les deux cas.
+    """
+
+    SMALL = 1
+    LARGE = 8
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.client.force_login(self.user)
+        # Session et utilisateur connecté en cache, comme après la première page
+        CachedModelBackend().get_user(self.user.pk)
+
+    def populate(self, count):
+        """Crée `count` auteurs suivis mutuellement, avec leurs tickets et critiques."""
+        for index in range(count):
+            author = User.objects.create_user(username=f"auteur{User.objects.count()}")
+            UserFollows.objects.create(user=self.user, followed_user=author)
+            UserFollows.objects.create(user=author, followed_user=self.user)
+            Ticket.objects.create(title=f"Sans critique {index}", user=author)
+            answered = Ticket.objects.create(
+                title=f"Avec critique {index}", user=author
+            )
+            Review.objects.create(
+                ticket=answered, rating=4, headline=f"Critique {index}", user=self.user
+            )
+            Review.objects.create(
+                ticket=answered, rating=2, headline=f"Réponse {index}", user=author
+            )
+            Ticket.objects.create(title=f"Mon ticket {index}", user=self.user)
+
+    def assertBudget(self, budget, url):
+        """Vérifie le budget de requêtes d'une page sur deux volumes de données."""
+        for count in (self.SMALL, self.LARGE):
+            with self.subTest(rows=count):
+                self.populate(count)
+                with self.assertNumQueries(budget):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_home(self):
+        # empreinte, page du flux, tickets, critiques
+        self.assertBudget(4, reverse("home"))
+
+    def test_user_posts(self):
+        # empreinte, tickets, critiques
+        self.assertBudget(3, reverse("user_posts"))
+
+    def test_ticket_detail(self):
+        ticket = Ticket.objects.create(title="Détail", user=self.user)
+        for count in (self.SMALL, self.LARGE):
+            with self.subTest(rows=count):
+                for index in range(count):
+                    author = User.objects.create_user(
+                        username=f"critique{ticket.review_set.count()}"
+                    )
+                    Review.objects.create(
+                        ticket=ticket, rating=3, headline="Avis", user=author
+                    )
+                # empreinte, ticket, critiques
+                with self.assertNumQueries(3):
+                    response = self.client.get(
+                        reverse("detail_ticket", args=[ticket.pk])
+                    )
+                self.assertEqual(response.status_code, 200)
+
+    def test_review_detail(self):
+        ticket = Ticket.objects.create(title="Détail", user=self.user)
+        review = Review.objects.create(
+            ticket=ticket, rating=5, headline="Avis", user=self.user
+        )
+        # empreinte, critique avec son ticket et leurs auteurs
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("detail_review", args=[review.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_page(self):
+        # abonnements, abonnés
+        self.assertBudget(2, reverse("follow_users"))
+
+
+class FeedTests(TestCase):
+    """Vérifie la pagination par curseur et la mise à jour du flux matérialisé."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.author = User.objects.create_user(username="auteur")
+        UserFollows.objects.create(user=self.user, followed_user=self.author)
+
+    def keys(self, items):
+        return [(type(item).__name__, item.pk) for item in items]
+
+    def all_pages(self, page_size):
+        """Parcourt tout le flux du lecteur, page par page."""
+        items, cursor = feed.get_feed_page(self.user, page_size=page_size)
+        while cursor:
+            page, cursor = feed.get_feed_page(self.user, cursor, page_size)
+            items += page
+        return items
+
+    def test_pages_have_no_gaps_or_duplicates(self):
+        tickets = [
+            Ticket.objects.create(title=f"Ticket {index}", user=self.author)
+            for index in range(6)
+        ]
+        reviews = [
+            Review.objects.create(rating=3, headline=f"Critique {index}", user=user)
+            for index, user in enumerate([self.author, self.user] * 2)
+        ]
+        # Plusieurs éléments de même date : départagés par type puis clé
+        same = timezone.now() - timedelta(hours=1)
+        for model, items in ((Ticket, tickets[:3]), (Review, reviews[:2])):
+            model.objects.filter(pk__in=[item.pk for item in items]).update(
+                created_at=same
+            )
+        feed.rebuild_feed()
+
+        expected = self.keys(feed.get_feed_page(self.user, page_size=100)[0])
+        self.assertEqual(len(expected), 10)
+        for page_size in (1, 2, 3, 4):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.keys(self.all_pages(page_size)), expected)
+
+        tied = expected[-5:]
+        self.assertEqual(
+            tied,
+            [("Ticket", ticket.pk) for ticket in reversed(tickets[:3])]
+            + [("Review", review.pk) for review in reversed(reviews[:2])],
+        )
+
+    def test_invalid_cursor_is_rejected(self):
+        bogus = base64.urlsafe_b64encode(b"2024-01-01T00:00:00|livre|1").decode()
+        for cursor in ("pas-un-curseur", "%%%", bogus):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(feed.InvalidCursor):
+                    feed.get_feed_page(self.user, cursor)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("home"), {"cursor": bogus})
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_and_unfollow_update_feed(self):
+        stranger = User.objects.create_user(username="inconnu")
+        ticket = Ticket.objects.create(title="Ancien", user=stranger)
+        review = Review.objects.create(rating=4, headline="Avis", user=stranger)
+        self.assertEqual(self.all_pages(10), [])
+
+        follow = UserFollows.objects.create(user=self.user, followed_user=stranger)
+        self.assertEqual(
+            self.keys(self.all_pages(10)),
+            [("Review", review.pk), ("Ticket", ticket.pk)],
+        )
+        # Les entrées gardent la date de création des éléments
+        self.assertEqual(
+            FeedEntry.objects.get(
+                owner=self.user, item_type=feed.TICKET, item_id=ticket.pk
+            ).created_at,
+            ticket.created_at,
+        )
+
+        follow.delete()
+        self.assertEqual(self.all_pages(10), [])
+        self.assertTrue(FeedEntry.objects.filter(owner=stranger).exists())
+
+    def test_deleting_last_review_republishes_ticket(self):
+        ticket = Ticket.objects.create(title="Question", user=self.author)
+        first = Review.objects.create(
+            ticket=ticket, rating=4, headline="Première", user=self.user
+        )
+        second = Review.objects.create(
+            ticket=ticket, rating=2, headline="Seconde", user=self.author
+        )
+        self.assertNotIn(("Ticket", ticket.pk), self.keys(self.all_pages(10)))
+
+        first.delete()
+        self.assertNotIn(("Ticket", ticket.pk), self.keys(self.all_pages(10)))
+        second.delete()
+        for owner in (self.user, self.author):
+            self.assertTrue(
+                FeedEntry.objects.filter(
+                    owner=owner, item_type=feed.TICKET, item_id=ticket.pk
+                ).exists()
+            )
+        self.assertEqual(self.keys(self.all_pages(10)), [("Ticket", ticket.pk)])
+
+
+class HasReviewTests(TestCase):
+    """Vérifie le drapeau dénormalisé ``Ticket.has_review``."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+
+    def test_flag_follows_reviews(self):
+        ticket = Ticket.objects.create(title="Question", user=self.user)
+        self.assertFalse(ticket.has_review)
+        first = Review.objects.create(
+            ticket=ticket, rating=4, headline="Première", user=self.user
+        )
+        second = Review.objects.create(
+            ticket=ticket, rating=2, headline="Seconde", user=self.user
+        )
+        ticket.refresh_from_db()
+        self.assertTrue(ticket.has_review)
+
+        first.delete()
+        ticket.refresh_from_db()
+        self.assertTrue(ticket.has_review)
+        second.delete()
+        ticket.refresh_from_db()
+        self.assertFalse(ticket.has_review)
+
+    def test_migration_backfills_flag(self):
+        migration = import_module("review.migrations.0004_ticket_has_review")
+        answered = Ticket.objects.create(title="Avec critique", user=self.user)
+        unanswered = Ticket.objects.create(title="Sans critique", user=self.user)
+        Review.objects.create(ticket=answered, rating=5, headline="Oui", user=self.user)
+        Review.objects.create(rating=1, headline="Seule", user=self.user)
+        # État antérieur à la migration : drapeau à sa valeur par défaut
+        Ticket.objects.update(has_review=False)
+
+        migration.backfill_has_review(django_apps, None)
+        self.assertEqual(set(Ticket.objects.filter(has_review=True)), {answered})
+        unanswered.refresh_from_db()
+        self.assertFalse(unanswered.has_review)
+
+
+class CardCacheTests(TestCase):
+    """Vérifie que les cartes mises en cache sont invalidées par les modifications."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.client.force_login(self.user)
+        self.ticket = Ticket.objects.create(title="Titre initial", user=self.user)
+        self.review = Review.objects.create(
+            ticket=self.ticket, rating=3, headline="Avis initial", user=self.user
+        )
+
+    def assertPagesContain(self, text):
+        for url in (
+            reverse("home"),
+            reverse("user_posts"),
+            reverse("detail_ticket", args=[self.ticket.pk]),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), text)
+
+    def test_ticket_update(self):
+        self.assertPagesContain("Titre initial")
+        self.ticket.title = "Titre modifié"
+        self.ticket.save()
+        self.assertPagesContain("Titre modifié")
+
+    def test_review_update(self):
+        self.assertPagesContain("Avis initial")
+        self.review.headline = "Avis modifié"
+        self.review.save()
+        self.assertPagesContain("Avis modifié")
+
+    def test_user_update(self):
+        self.assertPagesContain("Par lecteur")
+        self.client.post(reverse("update_user"), {"username": "relecteur"})
+        self.assertPagesContain("Par relecteur")
+
+
+class ConditionalGetTests(TestCase):
+    """Vérifie les réponses 304 des pages de lecture et leur invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.author = User.objects.create_user(username="auteur")
+        UserFollows.objects.create(user=self.user, followed_user=self.author)
+        self.client.force_login(self.user)
+        self.ticket = Ticket.objects.create(title="Ticket", user=self.author)
+        self.review = Review.objects.create(
+            ticket=self.ticket, rating=3, headline="Avis", user=self.user
+        )
+        self.urls = [
+            reverse("home"),
+            reverse("user_posts"),
+            reverse("detail_ticket", args=[self.ticket.pk]),
+            reverse("detail_review", args=[self.review.pk]),
+        ]
+
+    def etags(self):
+        """Retourne l'empreinte de chaque page, en vérifiant qu'elle est stable."""
+        etags = {}
+        # Première visite : dépôt du cookie CSRF, qui fait partie de l'empreinte
+        self.client.get(self.urls[0])
+        for url in self.urls:
+            etag = self.client.get(url).headers["ETag"]
+            # empreinte (session et utilisateur en cache)
+            with self.assertNumQueries(1):
+                response = self.client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+            etags[url] = etag
+        return etags
+
+    def assertAllChanged(self, before):
+        for url, etag in self.etags().items():
+            with self.subTest(url=url):
+                self.assertNotEqual(before[url], etag)
+
+    def test_ticket_update(self):
+        before = self.etags()
+        self.ticket.title = "Ticket modifié"
+        self.ticket.save()
+        self.assertAllChanged(before)
+
+    def test_author_update(self):
+        before = self.etags()
+        self.author.username = "autrice"
+        self.author.save()
+        self.assertAllChanged(before)
+
+    def test_new_review(self):
+        before = self.etags()
+        Review.objects.create(
+            ticket=self.ticket, rating=1, headline="Autre", user=self.author
+        )
+        self.assertNotEqual(before[self.urls[0]], self.etags()[self.urls[0]])
+
+    def test_pending_messages(self):
+        self.client.post(reverse("follow_users"), {"search_user": "inconnu"})
+        self.assertNotIn("ETag", self.client.get(reverse("home")).headers)
+
+    async def test_async_client(self):
+        # Vues asynchrones servies sans passer par un thread (ASGI)
+        await self.async_client.aforce_login(self.user)
+        await self.async_client.get(self.urls[0])
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertContains(response, "Ticket")
+                response = await self.async_client.get(
+                    url, headers={"If-None-Match": response.headers["ETag"]}
+                )
+                self.assertEqual(response.status_code, 304)
+
+
+class FollowCacheTests(TestCase):
+    """Vérifie le cache du graphe d'abonnements et son invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.other = User.objects.create_user(username="auteur")
+
+    def test_lookups_hit_cache(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(follows.is_following(self.user.pk, self.other.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(follows.get_follower_count(self.user.pk), 0)
+            self.assertEqual(follows.get_followed_ids(self.user.pk), frozenset())
+
+    def test_invalidation(self):
+        follows.get_graph(self.user.pk)
+        follows.get_graph(self.other.pk)
+        relation = UserFollows.objects.create(user=self.user, followed_user=self.other)
+        self.assertTrue(follows.is_following(self.user.pk, self.other.pk))
+        self.assertEqual(follows.get_follower_ids(self.other.pk), {self.user.pk})
+        relation.delete()
+        self.assertFalse(follows.is_following(self.user.pk, self.other.pk))
+        self.assertEqual(follows.get_follower_count(self.other.pk), 0)
+
+
+class BulkFollowTests(TestCase):
+    """Vérifie les abonnements en masse et le rapport produit."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.authors = [
+            User.objects.create_user(username=f"auteur{index}") for index in range(3)
+        ]
+        Ticket.objects.create(title="Ticket", user=self.authors[0])
+        UserFollows.objects.create(user=self.user, followed_user=self.authors[2])
+
+    def test_bulk_follow(self):
+        report = follows.bulk_follow(
+            self.user,
+            ["auteur0", "auteur1", "auteur1", "auteur2", "inconnu", "lecteur"],
+        )
+        self.assertEqual(report.changed, ["auteur0", "auteur1"])
+        self.assertEqual(report.unchanged, ["auteur2"])
+        self.assertEqual(report.duplicates, ["auteur1"])
+        self.assertEqual(report.unknown, ["inconnu"])
+        self.assertEqual(report.own, ["lecteur"])
+        self.assertEqual(
+            follows.get_followed_ids(self.user.pk),
+            {author.pk for author in self.authors},
+        )
+        self.assertTrue(self.user.feed_entries.filter(author=self.authors[0]).exists())
+
+    def test_bulk_unfollow_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("bulk_follow"),
+            {"usernames": "auteur1, auteur2", "action": "unfollow"},
+        )
+        self.assertRedirects(response, reverse("follow_users"))
+        self.assertFalse(UserFollows.objects.filter(user=self.user).exists())
+
+
+class UserSearchTests(TestCase):
+    """Vérifie l'autocomplétion des noms d'utilisateur de la page d'abonnement."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="Lecteur")
+        for username in ("Alice", "alix", "Albert", "bob", "ALINE"):
+            User.objects.create_user(username=username)
+        UserFollows.objects.create(
+            user=self.user, followed_user=User.objects.get(username="Albert")
+        )
+        self.client.force_login(self.user)
+
+    def search(self, **params):
+        return self.client.get(reverse("search_users"), params).json()
+
+    def test_prefix_is_case_insensitive_and_excludes_followed(self):
+        data = self.search(q="AL")
+        self.assertEqual(
+            [user["username"] for user in data["results"]], ["Alice", "ALINE", "alix"]
+        )
+        self.assertIsNone(data["next"])
+        self.assertEqual(self.search(q="lec")["results"], [])
+
+    def test_keyset_pagination(self):
+        first = self.search(q="al", limit=2)
+        self.assertEqual(
+            [user["username"] for user in first["results"]], ["Alice", "ALINE"]
+        )
+        second = self.search(q="al", limit=2, after=first["next"])
+        self.assertEqual([user["username"] for user in second["results"]], ["alix"])
+
+    def test_query_budget(self):
+        self.search(q="a")
+        # parcours de l'index (session, utilisateur et graphe d'abonnements en cache)
+        with self.assertNumQueries(1):
+            self.search(q="al")
+
+    def test_accented_prefix(self):
+        User.objects.create_user(username="Émile")
+        # lower() de SQLite ne convertit que les lettres ASCII
+        self.assertEqual(
+            [user["username"] for user in self.search(q="ÉM")["results"]], ["Émile"]
+        )
+        self.assertEqual(self.search(q="\U0010ffff")["results"], [])
+        self.assertEqual(follows.find_user("ÉMILE").username, "Émile")
+
+    def test_follow_ignores_case(self):
+        self.client.post(reverse("follow_users"), {"search_user": "BOB"})
+        self.assertTrue(
+            follows.is_following(self.user.pk, User.objects.get(username="bob").pk)
+        )
+
+
+class SearchTests(TestCase):
+    """Vérifie la recherche plein texte : synchronisation, classement, extraits."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.client.force_login(self.user)
+        self.ticket = Ticket.objects.create(
+            title="Éléphants d'Afrique",
+            description="Un livre <b>illustré</b>",
+            user=self.user,
+        )
+        self.review = Review.objects.create(
+            ticket=self.ticket,
+            rating=4,
+            headline="Superbe",
+            body="Les éléphants y sont magnifiques",
+            user=self.user,
+        )
+
+    def search(self, text):
+        return [(result.item_type, result.item.pk) for result in search_items(text)[0]]
+
+    def test_accents_prefix_and_ranking(self):
+        # Le titre pèse davantage que le texte
+        self.assertEqual(
+            self.search("elephant"),
+            [("ticket", self.ticket.pk), ("review", self.review.pk)],
+        )
+        self.assertEqual(self.search("magnif"), [("review", self.review.pk)])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.ticket.title = "Girafes"
+        self.ticket.save()
+        self.assertEqual(self.search("girafes"), [("ticket", self.ticket.pk)])
+        self.assertEqual(self.search("elephant afrique"), [])
+        self.review.delete()
+        self.assertEqual(self.search("magnifiques"), [])
+
+    def test_snippet_is_escaped(self):
+        response = self.client.get(reverse("search"), {"q": "illustre"})
+        self.assertContains(response, "&lt;b&gt;<mark>illustré</mark>&lt;/b&gt;")
+
+    def test_operators_are_literal(self):
+        self.assertEqual(self.search('NOT "( *'), [])
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+class ReplicaRoutingTests(TestCase):
+    """Vérifie le choix de la base par le middleware et le routeur des réplicas."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.databases_used = []
+
+        def view(request):
+            self.databases_used.append(ReplicaRouter().db_for_read(Ticket))
+            return HttpResponse()
+
+        self.middleware = ReplicaMiddleware(view)
+
+    def database_for(self, request):
+        response = self.middleware(request)
+        return self.databases_used.pop(), response
+
+    def test_marked_views_read_from_replicas(self):
+        for name in ("home", "user_posts", "search", "follow_users"):
+            database, response = self.database_for(self.factory.get(reverse(name)))
+            self.assertIn(database, ["replica1", "replica2"])
+        # Hors de la requête, les lectures reviennent à la base principale
+        self.assertEqual(ReplicaRouter().db_for_read(Ticket), "default")
+
+    def test_other_views_and_writes_use_primary(self):
+        database, response = self.database_for(
+            self.factory.get(reverse("create_ticket"))
+        )
+        self.assertEqual(database, "default")
+        self.assertEqual(ReplicaRouter().db_for_write(Ticket), "default")
+
+    def test_write_keeps_browser_on_primary(self):
+        database, response = self.database_for(self.factory.post(reverse("home")))
+        self.assertEqual(database, "default")
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        request = self.factory.get(reverse("home"))
+        request.COOKIES[STICKY_COOKIE] = "1"
+        database, response = self.database_for(request)
+        self.assertEqual(database, "default")
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        database, response = self.database_for(self.factory.get(reverse("home")))
+        self.assertEqual(database, "default")
+
+
+class LiveFeedTests(TestCase):
+    """Vérifie la diffusion en direct des nouveaux éléments du flux."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.author = User.objects.create_user(username="auteur")
+        self.stranger = User.objects.create_user(username="inconnu")
+        UserFollows.objects.create(user=self.user, followed_user=self.author)
+
+    def publish(self, title):
+        """Crée un ticket de l'auteur et valide la transaction (annonces)."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return Ticket.objects.create(title=title, user=self.author)
+
+    async def test_followers_receive_new_items(self):
+        async with live.broker.subscribe(self.user.pk) as queue, live.broker.subscribe(
+            self.stranger.pk
+        ) as other:
+            ticket = await sync_to_async(self.publish)("En direct")
+            row = await asyncio.wait_for(queue.get(), 1)
+            self.assertEqual(row, (ticket.created_at, feed.TICKET, ticket.pk))
+            self.assertTrue(other.empty())
+
+            message = await live._message(row)
+            self.assertIn("event: card", message)
+            self.assertIn(f'data-item=\\"ticket-{ticket.pk}\\"', message)
+
+    @override_settings(LIVE_POLL_INTERVAL=0.05)
+    async def test_database_broker_skips_backfilled_history(self):
+        old = await Ticket.objects.acreate(title="Ancien", user=self.stranger)
+        await Ticket.objects.filter(pk=old.pk).aupdate(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        broker = live.DatabaseBroker()
+        async with broker.subscribe(self.user.pk) as queue:
+            await asyncio.sleep(0.1)
+            # Abonnement : l'historique de l'auteur suivi est ajouté au flux
+            await sync_to_async(feed.follow)(self.user.pk, [self.stranger.pk])
+            ticket = await sync_to_async(self.publish)("En direct")
+            row = await asyncio.wait_for(queue.get(), 1)
+            self.assertEqual(row, (ticket.created_at, feed.TICKET, ticket.pk))
+            await asyncio.sleep(0.15)
+            self.assertTrue(queue.empty())
+
+    @override_settings(LIVE_POLL_INTERVAL=0.05)
+    async def test_database_broker_relays_late_commits(self):
+        ticket = await Ticket.objects.acreate(title="Tardif", user=self.stranger)
+        broker = live.DatabaseBroker()
+        async with broker.subscribe(self.user.pk) as queue:
+            await asyncio.sleep(0.1)
+            # Transaction validée bien après la date de création de l'entrée
+            created_at = timezone.now() - timedelta(seconds=30)
+            await FeedEntry.objects.acreate(
+                owner=self.user,
+                author=self.stranger,
+                item_type=feed.TICKET,
+                item_id=ticket.pk,
+                created_at=created_at,
+            )
+            row = await asyncio.wait_for(queue.get(), 1)
+            self.assertEqual(row, (created_at, feed.TICKET, ticket.pk))
+            await asyncio.sleep(0.15)
+            self.assertTrue(queue.empty())
+
+    @override_settings(LIVE_HEARTBEAT=0.01)
+    async def test_stream_heartbeat(self):
+        stream = live.stream(self.user)
+        self.assertTrue((await anext(stream)).startswith("retry:"))
+        self.assertEqual(await anext(stream), ": ping\n\n")
+        self.assertEqual(await anext(stream), ": ping\n\n")
+        await stream.aclose()
+
+    async def test_stream_replays_missed_items(self):
+        older = await Ticket.objects.acreate(title="Ancien", user=self.author)
+        newer = await Ticket.objects.acreate(title="Manqu\u00e9", user=self.author)
+        stream = live.stream(self.user, feed.cursor_for(older))
+        self.assertTrue((await anext(stream)).startswith("retry:"))
+        message = await anext(stream)
+        self.assertIn(f"id: {feed.cursor_for(newer)}", message)
+        self.assertIn("Manqu\\u00e9", message)
+        await stream.aclose()
+
+    async def test_stream_endpoint(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("feed_stream"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(response.streaming)
+
+    def test_stream_disabled_under_wsgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("feed_stream"))
+        # 204 : le navigateur cesse de se reconnecter
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+        self.assertNotContains(self.client.get(reverse("home")), "data-stream-url=")
+
+    async def test_stream_disabled_by_setting(self):
+        await self.async_client.aforce_login(self.user)
+        with self.settings(LIVE_FEED_ENABLED=False):
+            response = await self.async_client.get(reverse("feed_stream"))
+        self.assertEqual(response.status_code, 204)
+
+    @override_settings(LIVE_FEED_ENABLED=True)
+    def test_home_links_stream(self):
+        Ticket.objects.create(title="Affich\u00e9", user=self.author)
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse("home")), "data-stream-url=")
+
+
+class PerformanceMiddlewareTests(TestCase):
+    """Vérifie les mesures par vue et leur export."""
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.user = User.objects.create_user(username="lecteur")
+        self.client.force_login(self.user)
+
+    @override_settings(PERF_SERVER_TIMING=True)
+    def test_measures_are_recorded(self):
+        ticket = Ticket.objects.create(title="Mesuré", user=self.user)
+        response = self.client.get(reverse("detail_ticket", args=[ticket.pk]))
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="SQL \(4\)", tpl',
+        )
+        stats = registry.as_dict()["detail_ticket"]
+        self.assertEqual(stats["count"], 1)
+        # utilisateur (première page après la connexion), empreinte, ticket, critiques
+        self.assertEqual(stats["queries_mean"], 4)
+        self.assertGreater(stats["template_ms_mean"], 0)
+        self.assertEqual(stats["response_bytes_mean"], len(response.content))
+
+    def test_server_timing_is_opt_in(self):
+        response = self.client.get(reverse("home"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(registry.as_dict()["home"]["count"], 1)
+
+    def test_report_is_staff_only(self):
+        self.client.get(reverse("home"))
+        self.assertEqual(self.client.get(reverse("perf")).status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIn("home", self.client.get(reverse("perf")).json())
+        text = self.client.get(
+            reverse("perf"), {"format": "prometheus"}
+        ).content.decode()
+        self.assertIn('litrevu_request_duration_seconds_count{view="home"} 1', text)
+        self.assertIn('litrevu_db_queries_total{view="home"}', text)
+
+
+@override_settings(IMAGE_PROCESSING_WORKERS=0, IMAGE_RELEASE_GRACE=0)
+class SyntheticDatasetTests(TestCase):
+    """Vérifie le jeu de données synthétique des mesures de performance."""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+
+    def test_dataset_is_realistic(self):
+        counts = seed_dataset(50, 2, 2, 5, seed=3, days=30)
+        self.assertEqual(counts["users"], 50)
+        self.assertEqual(counts["tickets"], 100)
+        self.assertFalse(UserFollows.objects.filter(user=F("followed_user")).exists())
+        # Loi de puissance : les plus suivis concentrent une bonne part des abonnements
+        followers = sorted(
+            User.objects.annotate(count=Count("followed_by")).values_list(
+                "count", flat=True
+            ),
+            reverse=True,
+        )
+        self.assertGreater(sum(followers[:5]), counts["follows"] / 4)
+        self.assertFalse(
+            Review.objects.filter(created_at__lt=F("ticket__created_at")).exists()
+        )
+        oldest = Ticket.objects.earliest("created_at").created_at
+        self.assertLess(oldest, timezone.now() - timedelta(days=7))
+
+    def test_images_are_copied(self):
+        author = User.objects.create_user(username="auteur")
+        with self.captureOnCommitCallbacks(execute=True):
+            real = Ticket.objects.create(
+                title="Réel", user=author, image=image_upload()
+            )
+        real.refresh_from_db()
+        real_files = [real.image.name, *(v["name"] for v in real.image_variants)]
+
+        counts = seed_dataset(5, 4, 0, 1, seed=2, image_ratio=1.0)
+        self.assertEqual(counts["images"], 20)
+        synthetic = Ticket.objects.exclude(pk=real.pk)
+        for ticket in synthetic:
+            self.assertTrue(ticket.image.name.startswith("synthetic/"))
+            self.assertTrue(ticket.image_variants)
+            # Dérivées nommées d'après le contenu : partagées avec l'original
+            self.assertEqual(ticket.image_variants, real.image_variants)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for ticket in synthetic:
+                ticket.delete()
+        self.assertTrue(all(default_storage.exists(name) for name in real_files))
+        self.assertEqual(default_storage.listdir("synthetic"), ([], []))
+
+    def test_seed_command(self):
+        call_command(
+            "seed_synthetic", users=3, seed=7, password="motdepasse", stdout=StringIO()
+        )
+        self.assertTrue(self.client.login(username="bench7_0", password="motdepasse"))
+        with self.assertRaises(CommandError):
+            call_command("seed_synthetic", users=3, seed=7, stdout=StringIO())
+
+
+class StaticFilesTests(TestCase):
+    """Vérifie la construction et le service des fichiers statiques."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(STATIC_ROOT=directory.name))
+        call_command("collectstatic", interactive=False, verbosity=0)
+        self.middleware = StaticFilesMiddleware(lambda request: HttpResponse("vue"))
+        self.hashed = static("css/styles.css")
+
+    def get(self, path, **headers):
+        response = self.middleware(RequestFactory().get(path, headers=headers))
+        self.addCleanup(response.close)
+        return response
+
+    def test_hashed_name_is_immutable(self):
+        self.assertRegex(self.hashed, r"^/static/css/styles\.[0-9a-f]{12}\.css$")
+        response = self.get(self.hashed)
+        self.assertEqual(
+            response["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+        self.assertEqual(response["Content-Type"], "text/css; charset=utf-8")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(b"".join(response.streaming_content).decode(), self.read())
+
+        response = self.get("/static/css/styles.css")
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+
+    def test_precompressed_variant(self):
+        response = self.get(self.hashed, accept_encoding="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        body = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertEqual(body, self.read())
+        self.assertLess(int(response["Content-Length"]), len(body))
+
+    def test_refused_encoding(self):
+        for accept_encoding in ("gzip;q=0", "br, gzip;q=0", "*;q=0", "identity"):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(self.hashed, accept_encoding=accept_encoding)
+                self.assertNotIn("Content-Encoding", response)
+                self.assertEqual(
+                    b"".join(response.streaming_content).decode(), self.read()
+                )
+        response = self.get(self.hashed, accept_encoding="*;q=0.5")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_not_modified(self):
+        etag = self.get(self.hashed)["ETag"]
+        self.assertEqual(self.get(self.hashed, if_none_match=etag).status_code, 304)
+
+    def test_other_paths_reach_views(self):
+        self.assertEqual(self.get("/home/").content, b"vue")
+        self.assertEqual(self.get("/static/inconnu.css").content, b"vue")
+
+    def read(self):
+        name = self.hashed.removeprefix("/static/")
+        with open(os.path.join(settings.STATIC_ROOT, name), encoding="utf-8") as file:
+            return file.read()
+
+
+class CompressionTests(TestCase):
+    """Vérifie la compression négociée des réponses."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.client.force_login(self.user)
+        Ticket.objects.create(title="Compressé", description="x" * 500, user=self.user)
+
+    def test_gzip(self):
+        response = self.client.get(reverse("home"), headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertIn("Compressé", gzip.decompress(response.content).decode())
+
+    def test_not_accepted(self):
+        for accept_encoding in ("", "identity", "gzip;q=0, deflate"):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.client.get(
+                    reverse("home"), headers={"Accept-Encoding": accept_encoding}
+                )
+                self.assertNotIn("Content-Encoding", response)
+                self.assertContains(response, "Compressé")
+
+    def test_negotiation_honours_quality(self):
+        cases = {
+            "gzip": "gzip",
+            "GZip;Q=0.5": "gzip",
+            "br;q=0, gzip": "gzip",
+            "br, gzip;q=0": "br",
+            "br;q=0.5, gzip": "gzip",
+            "br;q=1, gzip;q=0.8": "br",
+            "*": "br",
+            "*;q=0, gzip;q=0.1": "gzip",
+            "gzip;q=abc": None,
+            "": None,
+        }
+        for accept_encoding, expected in cases.items():
+            with self.subTest(accept_encoding=accept_encoding):
+                encoding = negotiate(accept_encoding, ("br", "gzip"))
+                self.assertEqual(encoding, expected)
+
+    def test_event_stream_is_not_compressed(self):
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(
+                iter([b"data: x\n\n"] * 100), content_type="text/event-stream"
+            )
+        )
+        request = RequestFactory().get("/", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", middleware(request))
+
+    def test_stream_chunks_are_flushed(self):
+        chunks = compress_stream(iter([b"a" * 300, b"b" * 300]), "gzip")
+        decompressor = zlib.decompressobj(31)
+        # Chaque morceau est décompressable dès sa réception
+        self.assertEqual(decompressor.decompress(next(chunks)), b"a" * 300)
+        self.assertEqual(decompressor.decompress(next(chunks)), b"b" * 300)
+        decompressor.decompress(b"".join(chunks))
+        self.assertTrue(decompressor.eof)
+
+    def test_streamed_gzip_is_padded(self):
+        sizes = set()
+        for _ in range(10):
+            data = b"".join(compress_stream(iter([b"a" * 300]), "gzip"))
+            # Nom de fichier aléatoire dans l'en-tête (atténuation BREACH)
+            self.assertTrue(data[3] & gzip.FNAME)
+            self.assertEqual(gzip.decompress(data), b"a" * 300)
+            sizes.add(len(data))
+        self.assertGreater(len(sizes), 1)
+
+
+@override_settings(FEED_STREAMING=True, FEED_STREAM_CHUNK_SIZE=2)
+class StreamedFeedTests(TestCase):
+    """Vérifie l'envoi de la page d'accueil au fil du rendu des cartes."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.tickets = [
+            Ticket.objects.create(title=f"Ticket {index}", user=self.user)
+            for index in range(5)
+        ]
+
+    async def get_home(self, **headers):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("home"), headers=headers)
+        self.assertTrue(response.streaming)
+        chunks = [chunk async for chunk in response.streaming_content]
+        return chunks, response
+
+    async def test_cards_are_streamed_in_order(self):
+        chunks, response = await self.get_home()
+        # Début de page, trois lots de cartes, fin de page
+        self.assertEqual(len(chunks), 5)
+        page = b"".join(chunks).decode()
+        positions = [page.index(f"Ticket {index}<") for index in range(5)]
+        self.assertEqual(positions, sorted(positions, reverse=True))
+        self.assertIn("data-stream-url=", page)
+        self.assertTrue(page.rstrip().endswith("</html>"))
+
+    async def test_streamed_page_is_compressed(self):
+        chunks, response = await self.get_home(**{"Accept-Encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Ticket 4<", gzip.decompress(b"".join(chunks)).decode())
+
+
+def image_upload(size=(800, 600), color="red", name="couverture.jpg"):
+    """Fichier JPEG téléversé, généré en mémoire."""
+    data = BytesIO()
+    Image.new("RGB", size, color).save(data, "JPEG")
+    return SimpleUploadedFile(name, data.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(IMAGE_PROCESSING_WORKERS=0, IMAGE_RELEASE_GRACE=0)
+class ImageProcessingTests(TestCase):
+    """Vérifie le traitement des images de tickets (dérivées, copie réduite)."""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+        self.user = User.objects.create_user(username="lecteur")
+
+    def create_ticket(self, image, title="Illustré"):
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = Ticket.objects.create(title=title, user=self.user, image=image)
+        ticket.refresh_from_db()
+        return ticket
+
+    def test_original_is_kept_and_master_written(self):
+        upload = image_upload()
+        ticket = self.create_ticket(upload)
+        self.assertEqual(ticket.image_status, Ticket.IMAGE_READY)
+        # L'original reste celui téléversé : son nom correspond à son contenu
+        with ticket.image.open("rb") as file:
+            self.assertEqual(file.read(), upload.open().read())
+
+        masters = [
+            variant for variant in ticket.image_variants if variant.get("master")
+        ]
+        self.assertEqual(len(masters), 1)
+        self.assertEqual(masters[0]["width"], 500)
+        self.assertEqual(masters[0]["mime"], "image/jpeg")
+        with Image.open(os.path.join(settings.MEDIA_ROOT, masters[0]["name"])) as image:
+            self.assertEqual(image.size, (500, 375))
+        # Copie réduite affichée en repli de l'élément <picture>
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("detail_ticket", args=[ticket.pk]))
+        url = settings.MEDIA_URL + masters[0]["name"]
+        self.assertContains(response, f'src="{url}"')
+
+    def test_small_image_has_no_master(self):
+        ticket = self.create_ticket(image_upload((300, 200)))
+        self.assertFalse(
+            any(variant.get("master") for variant in ticket.image_variants)
+        )
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), settings.MEDIA_ROOT)
+            for directory, _, names in os.walk(settings.MEDIA_ROOT)
+            for name in names
+        )
+
+    def age_files(self, seconds):
+        """Vieillit la date de modification de tous les fichiers média."""
+        timestamp = time.time() - seconds
+        for name in self.stored_files():
+            os.utime(os.path.join(settings.MEDIA_ROOT, name), (timestamp, timestamp))
+
+    def test_reprocessing_keeps_derivative_names(self):
+        ticket = self.create_ticket(image_upload())
+        variants = ticket.image_variants
+        files = self.stored_files()
+        self.assertEqual(
+            sorted({variant["width"] for variant in variants}), [240, 480, 500, 800]
+        )
+
+        call_command("regenerate_derivatives", workers=1, stdout=StringIO())
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.image_variants, variants)
+        self.assertEqual(self.stored_files(), files)
+
+        # Même image téléversée de nouveau : même nom, mêmes dérivées
+        other = self.create_ticket(image_upload(), title="Doublon")
+        self.assertEqual(other.image.name, ticket.image.name)
+        self.assertEqual(other.image_variants, variants)
+        self.assertEqual(self.stored_files(), files)
+
+    def test_derivatives_follow_content(self):
+        name = default_storage.save("autres/photo.jpg", image_upload())
+        path = default_storage.path(name)
+        first = process_image_file(path, name, settings.MEDIA_ROOT)
+        # Fichier réécrit sous le même nom : nouvelles dérivées
+        with open(path, "wb") as file:
+            file.write(image_upload(color="blue").read())
+        second = process_image_file(path, name, settings.MEDIA_ROOT)
+        self.assertFalse(
+            {variant["name"] for variant in first}
+            & {variant["name"] for variant in second}
+        )
+
+    def test_stale_derivatives_are_released(self):
+        ticket = self.create_ticket(image_upload())
+        stale = {"name": "derivatives/00/ancienne-240.webp", "width": 240}
+        default_storage.save(stale["name"], ContentFile(b"ancienne"))
+        Ticket.objects.filter(pk=ticket.pk).update(
+            image_variants=[*ticket.image_variants, stale]
+        )
+        run_image_job(image_job(ticket, "image"))
+        ticket.refresh_from_db()
+        self.assertNotIn(stale, ticket.image_variants)
+        self.assertFalse(default_storage.exists(stale["name"]))
+
+    def test_clearing_image_resets_variants(self):
+        ticket = self.create_ticket(image_upload())
+        ticket.image = None
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.image_variants, [])
+        self.assertEqual(ticket.image_status, Ticket.IMAGE_READY)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_shared_image_released_with_last_ticket(self):
+        first = self.create_ticket(image_upload())
+        second = self.create_ticket(image_upload(), title="Doublon")
+        variants = [variant["name"] for variant in first.image_variants]
+        storage = first.image.storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(second.image.name))
+        self.assertTrue(all(storage.exists(name) for name in variants))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(second.image.name))
+        self.assertFalse(any(storage.exists(name) for name in variants))
+        self.assertEqual(self.stored_files(), [])
+
+    @override_settings(IMAGE_RELEASE_GRACE=60)
+    def test_reused_image_outlives_release(self):
+        ticket = self.create_ticket(image_upload())
+        storage = ticket.image.storage
+        self.age_files(120)
+        # Même contenu téléversé par un ticket pas encore validé
+        self.assertEqual(
+            storage.save("tickets/copie.jpg", image_upload()), ticket.image.name
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+        self.assertTrue(storage.exists(ticket.image.name))
+
+        # Jamais validé : le fichier orphelin est supprimé par clean_images
+        call_command("clean_images", stdout=StringIO())
+        self.assertTrue(storage.exists(ticket.image.name))
+        self.age_files(120)
+        call_command("clean_images", stdout=StringIO())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_clean_images_deduplicates_legacy_uploads(self):
+        legacy = FileSystemStorage()
+        names = [legacy.save("tickets/couverture.jpg", image_upload()) for _ in "ab"]
+        self.assertNotEqual(*names)
+        tickets = [
+            Ticket.objects.create(title=name, user=self.user, image=name)
+            for name in names
+        ]
+        kept = self.create_ticket(image_upload(color="blue"))
+        orphan = default_storage.save(
+            "derivatives/00/orpheline-240.webp", ContentFile(b"x")
+        )
+
+        call_command("clean_images", grace=0, stdout=StringIO())
+        for ticket in tickets:
+            ticket.refresh_from_db()
+        self.assertEqual(tickets[0].image.name, tickets[1].image.name)
+        self.assertRegex(
+            tickets[0].image.name, r"^tickets/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$"
+        )
+        self.assertFalse(any(legacy.exists(name) for name in names))
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(kept.image.storage.exists(kept.image.name))
+        self.assertTrue(
+            all(
+                default_storage.exists(variant["name"])
+                for variant in kept.image_variants
+            )
+        )
+
+    def test_replaced_image_is_released(self):
+        ticket = self.create_ticket(image_upload())
+        old_files = self.stored_files()
+        ticket.image = image_upload(color="blue", name="nouvelle.jpg")
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+        ticket.refresh_from_db()
+        self.assertTrue(ticket.image_variants)
+        self.assertFalse(set(old_files) & set(self.stored_files()))
+
+
+@override_settings(IMAGE_UPLOAD_MAX_BYTES=2048)
+class UploadLimitTests(TestCase):
+    """Vérifie les limites des images téléversées avec un ticket."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="lecteur")
+        self.client.force_login(self.user)
+
+    def test_other_views_receive_whole_files(self):
+        request = RequestFactory().post(
+            "/", {"fichier": SimpleUploadedFile("gros.bin", b"x" * 5000)}
+        )
+        self.assertEqual(len(request.FILES["fichier"].read()), 5000)
+
+    def test_ticket_views_check_csrf(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(reverse("create_ticket"), {"title": "Sans jeton"})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Ticket.objects.exists())
+
+    def post_ticket(self, image, url="create_ticket"):
+        data = {"title": "Illustré", "description": "", "image": image}
+        if url == "create_review_and_ticket":
+            data.update(rating=4, headline="Critique", body="")
+        response = self.client.post(reverse(url), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Ticket.objects.exists())
+        return response.context["form"].errors["image"]
+
+    def noisy_upload(self):
+        data = BytesIO()
+        Image.frombytes("RGB", (100, 100), os.urandom(30_000)).save(data, "JPEG")
+        self.assertGreater(len(data.getvalue()), 2048)
+        return SimpleUploadedFile("bruit.jpg", data.getvalue(), "image/jpeg")
+
+    def test_oversized_file_is_rejected(self):
+        for url in ("create_ticket", "create_review_and_ticket"):
+            with self.subTest(url=url):
+                errors = self.post_ticket(self.noisy_upload(), url)
+                self.assertEqual(len(errors), 1)
+                self.assertRegex(errors[0], r"^Le fichier ne doit pas dépasser")
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=10_000)
+    def test_image_over_pixel_limit_is_rejected(self):
+        errors = self.post_ticket(image_upload((200, 100), name="large.jpg"))
+        self.assertEqual(
+            errors, ["L'image ne doit pas dépasser 0.01 millions de pixels."]
+        )
+
+    def test_invalid_image_is_rejected(self):
+        errors = self.post_ticket(SimpleUploadedFile("faux.jpg", b"pas une image"))
+        self.assertEqual(len(errors), 1)
+        self.assertNotIn("dépasser", errors[0])
@@ -0,0 +1,42 @@
+"""
+Gestion des images de tickets téléversées à mémoire et disque bornés.
+
+Les vues qui reçoivent une image de ticket (:class:`BoundedUploadMixin`) écrivent
+les fichiers au fil de l'eau dans un fichier temporaire, jamais chargés
+entièrement en mémoire, et l'écriture s'arrête au-delà de
+``IMAGE_UPLOAD_MAX_BYTES`` : le formulaire refuse ensuite le fichier d'après sa
+taille réelle (voir :class:`review.forms.BoundedImageField`). Les autres vues
+(administration, photos de profil) gardent les gestionnaires de Django : un
+fichier n'y est jamais tronqué.
+"""
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+
+class BoundedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Écrit les fichiers téléversés sur disque, dans la limite de taille autorisée."""
+
+    def receive_data_chunk(self, raw_data, start):
+        # Au-delà de la limite, les données reçues sont ignorées : le fichier
+        # temporaire reste borné et la taille réelle est conservée par
+        # file_complete() pour que la validation le refuse.
+        if start + len(raw_data) <= settings.IMAGE_UPLOAD_MAX_BYTES:
+            self.file.write(raw_data)
+
+
+class BoundedUploadMixin:
+    """Vue dont les fichiers téléversés passent par
+    :class:`BoundedTemporaryFileUploadHandler`.
+
+    Les gestionnaires doivent être remplacés avant la lecture du corps de la
+    requête, que ``CsrfViewMiddleware`` effectue avant la vue : la vérification
+    CSRF est donc faite ici, une fois les gestionnaires en place.
+    """
+
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        request.upload_handlers = [BoundedTemporaryFileUploadHandler(request)]
+        return csrf_protect(super().dispatch)(request, *args, **kwargs)
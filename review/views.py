@@ -1,8 +1,12 @@
-from django.shortcuts import render, get_object_or_404, redirect
+import asyncio
+import uuid
+
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
 from django.views.generic import (
     CreateView,
-    DetailView,
     UpdateView,
     DeleteView,
 )
@@ -10,16 +14,26 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from .models import Ticket, Review, UserFollows
 from .forms import TicketForm, PostReviewForm, FollowUsersForm, PostReviewAndTicketForm
-from django.http import HttpResponse
+from . import follows, live
+from .feed import aget_feed_rows, ahydrate, encode_cursor, InvalidCursor
+from .search import search_items
+from .uploads import BoundedUploadMixin
+from .cards import awith_versions
+from .etags import conditional, home_etag, review_etag, ticket_etag, user_posts_etag
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.views import View
-from django.db.models import Q, Count
-from itertools import chain
 from django.contrib import messages
-from authentication.models import User
+from django.conf import settings
+from litrevu.routers import replica_read
+
+
+async def _alist(queryset):
+    """Évalue une requête avec l'ORM asynchrone."""
+    return [item async for item in queryset]
 
 
 # Views pour Ticket
-class TicketCreateView(LoginRequiredMixin, CreateView):
+class TicketCreateView(BoundedUploadMixin, LoginRequiredMixin, CreateView):
     """Vue pour créer un nouveau ticket.
 
     Nécessite que l'utilisateur soit connecté.
@@ -44,29 +58,38 @@ class TicketCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class TicketDetailView(LoginRequiredMixin, DetailView):
-    """Vue pour afficher les détails d'un ticket.
+@replica_read
+@login_required
+@conditional(ticket_etag)
+async def ticket_detail(request, pk):
+    """Vue asynchrone pour afficher les détails d'un ticket.
 
-    Inclut également les critiques associées à ce ticket.
+    Inclut également les critiques associées à ce ticket, chargées en même
+    temps que le ticket.
     Nécessite que l'utilisateur soit connecté.
-    """
-
-    model = Ticket
-    template_name = "review/detailticket.html"
-    context_object_name = "ticket"
 
-    def get_context_data(self, **kwargs):
-        """Ajoute les critiques associées au contexte.
+    Args:
+        request: La requête HTTP
+        pk (int): Clé primaire du ticket
 
-        Returns:
-            dict: Contexte enrichi avec les critiques associées au ticket
-        """
-        context = super().get_context_data(**kwargs)
-        context["reviews"] = Review.objects.filter(ticket=self.object)
-        return context
+    Returns:
+        HttpResponse: Page de détail du ticket
+    """
+    request.user = await request.auser()
+    ticket, reviews = await asyncio.gather(
+        aget_object_or_404(Ticket.objects.select_related("user"), pk=pk),
+        _alist(
+            Review.objects.filter(ticket_id=pk)
+            .select_related("user")
+            .order_by("-created_at")
+        ),
+    )
+    await awith_versions([ticket])
+    context = {"ticket": ticket, "reviews": await awith_versions(reviews)}
+    return render(request, "review/detailticket.html", context)
 
 
-class TicketUpdateView(LoginRequiredMixin, UpdateView):
+class TicketUpdateView(BoundedUploadMixin, LoginRequiredMixin, UpdateView):
     """Vue pour modifier un ticket existant.
 
     Nécessite que l'utilisateur soit connecté.
@@ -111,7 +134,7 @@ class ReviewCreateView(LoginRequiredMixin, CreateView):
         Returns:
             HttpResponse: Redirection vers la page de succès ou message d'erreur
         """
-        if Review.objects.filter(ticket_id=self.kwargs["ticket_pk"]).exists():
+        if Ticket.objects.filter(pk=self.kwargs["ticket_pk"], has_review=True).exists():
             return HttpResponse("Une critique existe déjà pour ce ticket")
 
         form.instance.user = self.request.user
@@ -125,19 +148,32 @@ class ReviewCreateView(LoginRequiredMixin, CreateView):
             dict: Contexte enrichi avec le ticket associé
         """
         context = super().get_context_data(**kwargs)
-        context["ticket"] = get_object_or_404(Ticket, pk=self.kwargs["ticket_pk"])
+        context["ticket"] = get_object_or_404(
+            Ticket.objects.select_related("user"), pk=self.kwargs["ticket_pk"]
+        )
         return context
 
 
-class ReviewDetailView(LoginRequiredMixin, DetailView):
-    """Vue pour afficher les détails d'une critique.
+@replica_read
+@login_required
+@conditional(review_etag)
+async def review_detail(request, pk):
+    """Vue asynchrone pour afficher les détails d'une critique.
 
     Nécessite que l'utilisateur soit connecté.
-    """
 
-    model = Review
-    template_name = "review/detailreview.html"
-    context_object_name = "review"
+    Args:
+        request: La requête HTTP
+        pk (int): Clé primaire de la critique
+
+    Returns:
+        HttpResponse: Page de détail de la critique
+    """
+    request.user = await request.auser()
+    review = await aget_object_or_404(
+        Review.objects.select_related("user", "ticket__user"), pk=pk
+    )
+    return render(request, "review/detailreview.html", {"review": review})
 
 
 class ReviewUpdateView(LoginRequiredMixin, UpdateView):
@@ -163,7 +199,7 @@ class ReviewDeleteView(LoginRequiredMixin, DeleteView):
     template_name = "review/confirmdelete.html"
 
 
-class CreateReviewAndTicket(LoginRequiredMixin, View):
+class CreateReviewAndTicket(BoundedUploadMixin, LoginRequiredMixin, View):
     """
     Vue pour créer simultanément un ticket et une critique.
 
@@ -200,12 +236,14 @@ class CreateReviewAndTicket(LoginRequiredMixin, View):
                 request, "Votre ticket et votre critique ont été créés avec succès."
             )
             return redirect("home")
+        return render(request, "review/createreviewandticket.html", {"form": form})
 
     def get(self, request):
         form = PostReviewAndTicketForm()
         return render(request, "review/createreviewandticket.html", {"form": form})
 
 
+@replica_read
 class FollowUsersView(LoginRequiredMixin, CreateView):
     """Vue pour gérer les abonnements entre utilisateurs.
 
@@ -239,33 +277,28 @@ class FollowUsersView(LoginRequiredMixin, CreateView):
         Returns:
             HttpResponse: Redirection avec message approprié
         """
-        search_user = request.POST.get("search_user")
+        search_user = request.POST.get("search_user", "").strip()
         if search_user:
-            try:
-                user_to_follow = User.objects.get(username=search_user)
-                if user_to_follow == request.user:
-                    messages.error(request, "Vous ne pouvez pas vous suivre vous-même.")
-                    return redirect("follow_users")
-
-                # Vérifier si l'utilisateur est déjà suivi
-                if UserFollows.objects.filter(
-                    user=request.user, followed_user=user_to_follow
-                ).exists():
-                    messages.error(request, "Vous suivez déjà cet utilisateur.")
-                    return redirect("follow_users")
-
-                # Créer la relation de suivi
-                UserFollows.objects.create(
-                    user=request.user, followed_user=user_to_follow
-                )
-                messages.success(
-                    request, f"Vous suivez maintenant {user_to_follow.username}."
-                )
+            user_to_follow = follows.find_user(search_user)
+            if user_to_follow is None:
+                messages.error(request, f"L'utilisateur '{search_user}' n'existe pas.")
                 return redirect("follow_users")
 
-            except User.DoesNotExist:
-                messages.error(request, f"L'utilisateur '{search_user}' n'existe pas.")
+            if user_to_follow == request.user:
+                messages.error(request, "Vous ne pouvez pas vous suivre vous-même.")
                 return redirect("follow_users")
+
+            # Vérifier si l'utilisateur est déjà suivi
+            if follows.is_following(request.user.pk, user_to_follow.pk):
+                messages.error(request, "Vous suivez déjà cet utilisateur.")
+                return redirect("follow_users")
+
+            # Créer la relation de suivi
+            UserFollows.objects.create(user=request.user, followed_user=user_to_follow)
+            messages.success(
+                request, f"Vous suivez maintenant {user_to_follow.username}."
+            )
+            return redirect("follow_users")
         return super().post(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
@@ -275,13 +308,99 @@ class FollowUsersView(LoginRequiredMixin, CreateView):
             dict: Contexte enrichi avec les relations d'abonnement
         """
         context = super().get_context_data(**kwargs)
-        context["following"] = UserFollows.objects.filter(user=self.request.user)
+        context["following"] = UserFollows.objects.filter(
+            user=self.request.user
+        ).select_related("followed_user")
         context["followers"] = UserFollows.objects.filter(
             followed_user=self.request.user
-        )
+        ).select_related("user")
+        graph = follows.get_graph(self.request.user.pk)
+        context["following_count"] = len(graph.followed)
+        context["follower_count"] = len(graph.followers)
         return context
 
 
+@replica_read
+@login_required
+def search_users(request):
+    """Vue JSON d'autocomplétion des noms d'utilisateur de la page d'abonnement.
+
+    Paramètres de la requête : ``q`` (début du nom, sans distinction de casse),
+    ``after`` (dernier nom de la page précédente) et ``limit``. Les utilisateurs
+    déjà suivis sont exclus.
+
+    Args:
+        request: La requête HTTP
+
+    Returns:
+        JsonResponse: Utilisateurs trouvés (``results``) et valeur de ``after``
+        pour la page suivante (``next``, absente en fin de liste)
+    """
+    try:
+        limit = int(request.GET.get("limit", follows.SUGGEST_LIMIT))
+    except ValueError:
+        limit = follows.SUGGEST_LIMIT
+    limit = max(1, min(limit, follows.SUGGEST_MAX_LIMIT))
+    users = follows.suggest_users(
+        request.user,
+        request.GET.get("q", "").strip(),
+        after=request.GET.get("after"),
+        limit=limit,
+    )
+    return JsonResponse(
+        {
+            "results": [{"id": pk, "username": username} for pk, username in users],
+            "next": users[-1][1] if len(users) == limit else None,
+        }
+    )
+
+
+class BulkFollowView(LoginRequiredMixin, View):
+    """Vue pour s'abonner (ou se désabonner) à une liste d'utilisateurs.
+
+    Les noms sont saisis dans un seul champ, séparés par des espaces, des virgules
+    ou des retours à la ligne (``BULK_FOLLOW_MAX`` noms au plus).
+    Nécessite que l'utilisateur soit connecté.
+    """
+
+    def post(self, request):
+        """Traite la liste et résume le résultat par des messages.
+
+        Args:
+            request: La requête HTTP
+
+        Returns:
+            HttpResponse: Redirection vers la page d'abonnement
+        """
+        usernames = follows.parse_usernames(request.POST.get("usernames", ""))
+        if len(usernames) > settings.BULK_FOLLOW_MAX:
+            messages.error(
+                request,
+                f"La liste est limitée à {settings.BULK_FOLLOW_MAX} "
+                "noms d'utilisateur.",
+            )
+            return redirect("follow_users")
+
+        if request.POST.get("action") == "unfollow":
+            report = follows.bulk_unfollow(request.user, usernames)
+            changed, unchanged = "Désabonnements", "Déjà non suivis"
+        else:
+            report = follows.bulk_follow(request.user, usernames)
+            changed, unchanged = "Nouveaux abonnements", "Déjà suivis"
+
+        if report.changed:
+            messages.success(request, f"{changed} : {', '.join(report.changed)}.")
+        for label, names in (
+            (unchanged, report.unchanged),
+            ("Noms répétés", report.duplicates),
+            ("Utilisateurs inconnus", report.unknown),
+            ("Vous ne pouvez pas vous suivre vous-même", report.own),
+        ):
+            if names:
+                messages.error(request, f"{label} : {', '.join(names)}.")
+        return redirect("follow_users")
+
+
 class UnfollowUserView(LoginRequiredMixin, View):
     """Vue pour se désabonner d'un utilisateur.
 
@@ -298,21 +417,21 @@ class UnfollowUserView(LoginRequiredMixin, View):
         Returns:
             HttpResponse: Redirection ou message d'erreur
         """
-        try:
-            follow_relation = UserFollows.objects.get(
-                user=request.user, followed_user_id=user_id
-            )
-            follow_relation.delete()
-            return redirect("follow_users")
-        except UserFollows.DoesNotExist:
+        if not follows.is_following(request.user.pk, user_id):
             return HttpResponse("Vous ne suivez pas cet utilisateur")
+        UserFollows.objects.filter(user=request.user, followed_user_id=user_id).delete()
+        return redirect("follow_users")
 
 
+@replica_read
 @login_required
-def user_posts(request):
-    """Vue pour afficher les posts d'un utilisateur.
+@conditional(user_posts_etag)
+async def user_posts(request):
+    """Vue asynchrone pour afficher les posts d'un utilisateur.
 
-    Affiche les tickets et critiques créés par l'utilisateur connecté.
+    Affiche les tickets et critiques créés par l'utilisateur connecté,
+    du plus récent au plus ancien. Les tickets et les critiques sont chargés
+    simultanément.
 
     Args:
         request: La requête HTTP
@@ -320,24 +439,35 @@ def user_posts(request):
     Returns:
         HttpResponse: Page avec les posts de l'utilisateur
     """
-    tickets = Ticket.objects.filter(user=request.user)
-    reviews = Review.objects.filter(user=request.user)
+    request.user = user = await request.auser()
+    tickets, reviews = await asyncio.gather(
+        _alist(Ticket.objects.filter(user=user).order_by("-created_at")),
+        _alist(
+            Review.objects.filter(user=user)
+            .select_related("ticket__user")
+            .order_by("-created_at")
+        ),
+    )
     context = {
-        "tickets": tickets,
-        "reviews": reviews,
+        "tickets": await awith_versions(tickets),
+        "reviews": await awith_versions(reviews),
     }
     return render(request, "review/userposts.html", context)
 
 
 # Views pour la page d'accueil
+@replica_read
 @login_required
-def home(request):
-    """Vue de la page d'accueil.
+@conditional(home_etag)
+async def home(request):
+    """Vue asynchrone de la page d'accueil.
 
     Affiche un flux combiné des tickets et critiques :
     - De l'utilisateur connecté
     - Des utilisateurs qu'il suit
-    Les éléments sont triés par date de création décroissante.
+    Les éléments sont triés par date de création décroissante et paginés par
+    curseur (paramètre ``cursor`` de la requête), ``FEED_PAGE_SIZE`` par page.
+    Avec ``FEED_STREAMING``, la page est envoyée au fil du rendu des cartes.
 
     Args:
         request: La requête HTTP
@@ -345,31 +475,120 @@ def home(request):
     Returns:
         HttpResponse: Page d'accueil avec le flux d'activité
     """
-    # Obtenir les utilisateurs suivis
-    followed_users = UserFollows.objects.filter(user=request.user).values_list(
-        "followed_user", flat=True
-    )
+    request.user = user = await request.auser()
+    try:
+        rows, next_cursor = await aget_feed_rows(
+            user, request.GET.get("cursor"), settings.FEED_PAGE_SIZE
+        )
+    except InvalidCursor:
+        raise Http404("Curseur de pagination invalide")
+
+    context = {
+        "next_cursor": next_cursor,
+        "live_feed": live.enabled(request),
+        # Position du plus récent élément affiché, d'où reprend le flux en direct
+        "stream_cursor": encode_cursor(*rows[0]) if rows else "",
+    }
+    if settings.FEED_STREAMING:
+        return _streamed_page(request, "review/home.html", context, _feed_cards(rows))
+    context["flux"] = await awith_versions(await ahydrate(rows))
+    return render(request, "review/home.html", context)
+
+
+def _streamed_page(request, template_name, context, cards):
+    """Réponse envoyée au fil du rendu : la page, dont les cartes sont produites
+    par un itérateur asynchrone.
+
+    Le gabarit affiche la variable ``cards_marker`` à l'emplacement des cartes :
+    le début de la page est envoyé aussitôt, puis chaque lot de cartes, puis la
+    fin de la page.
+
+    Args:
+        request: La requête HTTP
+        template_name (str): Gabarit de la page
+        context (dict): Contexte du gabarit
+        cards: Itérateur asynchrone du HTML des cartes
 
-    # Récupérer les tickets de l'utilisateur et des personnes suivies
-    tickets = (
-        Ticket.objects.filter(Q(user=request.user) | Q(user__in=followed_users))
-        .annotate(review_count=Count("review"))
-        .filter(review_count=0)
+    Returns:
+        StreamingHttpResponse: Page en flux
+    """
+    marker = f"<!-- cards-{uuid.uuid4().hex} -->"
+    page = render_to_string(
+        template_name, {**context, "cards_marker": mark_safe(marker)}, request
     )
+    head, tail = page.split(marker)
+
+    async def content():
+        yield head
+        async for html in cards:
+            yield html
+        yield tail
+
+    return StreamingHttpResponse(content(), content_type="text/html; charset=utf-8")
+
+
+async def _feed_cards(rows):
+    """HTML des cartes du flux, par lots de ``FEED_STREAM_CHUNK_SIZE`` éléments
+    chargés à la demande."""
+    template = get_template("review/feedcard.html")
+    size = settings.FEED_STREAM_CHUNK_SIZE
+    for start in range(0, len(rows), size):
+        items = await awith_versions(await ahydrate(rows[start : start + size]))
+        yield "".join(template.render({"item": item}) for item in items)
 
-    # Récupérer les critiques associées aux tickets
-    reviews_with_ticket = Review.objects.filter(
-        Q(user=request.user) | Q(user__in=followed_users)
-    ).prefetch_related("ticket")
 
-    flux = sorted(
-        chain(tickets, reviews_with_ticket),
-        key=lambda instance: instance.created_at,
-        reverse=True,
+@login_required
+async def feed_stream(request):
+    """Flux en direct (Server-Sent Events) des nouveautés du flux d'accueil.
+
+    Paramètre de la requête : ``after`` (curseur du plus récent élément affiché).
+    À la reconnexion, le navigateur transmet le dernier événement reçu
+    (en-tête ``Last-Event-ID``). La connexion reste ouverte : hors d'un serveur
+    ASGI (sauf ``LIVE_FEED_ENABLED``), la vue répond 204, ce qui met fin aux
+    tentatives de reconnexion du navigateur.
+
+    Args:
+        request: La requête HTTP
+
+    Returns:
+        StreamingHttpResponse: Flux ``text/event-stream``, ou réponse vide
+    """
+    if not live.enabled(request):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    cursor = request.headers.get("Last-Event-ID") or request.GET.get("after")
+    response = StreamingHttpResponse(
+        live.stream(user, cursor), content_type="text/event-stream"
     )
+    response["Cache-Control"] = "no-cache"
+    # Pas de mise en mémoire tampon par un proxy (nginx)
+    response["X-Accel-Buffering"] = "no"
+    return response
 
+
+@replica_read
+@login_required
+def search(request):
+    """Vue de recherche plein texte dans les tickets et les critiques.
+
+    Paramètres de la requête : ``q`` (texte recherché) et ``page``.
+
+    Args:
+        request: La requête HTTP
+
+    Returns:
+        HttpResponse: Page des résultats, classés par pertinence
+    """
+    query = request.GET.get("q", "").strip()
+    try:
+        page = max(1, int(request.GET.get("page", 1)))
+    except ValueError:
+        page = 1
+    results, has_next = search_items(query, page)
     context = {
-        "flux": flux,
+        "query": query,
+        "results": results,
+        "page": page,
+        "has_next": has_next,
     }
-
-    return render(request, "review/home.html", context)
+    return render(request, "review/search.html", context)
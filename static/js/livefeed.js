@@ -0,0 +1,31 @@
+// Flux en direct de la page d'accueil : les nouveaux tickets et critiques sont
+// reçus par Server-Sent Events et insérés en tête du flux, sans recharger la page.
+(function () {
+    "use strict";
+
+    var container = document.querySelector("[data-stream-url]");
+    if (!container || !window.EventSource) {
+        return;
+    }
+    var template = document.createElement("template");
+    var source = new EventSource(container.dataset.streamUrl);
+
+    function remove(key) {
+        var card = container.querySelector('[data-item="' + key + '"]');
+        if (card) {
+            card.remove();
+        }
+    }
+
+    source.addEventListener("card", function (event) {
+        var data = JSON.parse(event.data);
+        template.innerHTML = data.html.trim();
+        var card = template.content.firstElementChild;
+        // Un élément déjà affiché (reconnexion, relecture) est remplacé
+        remove(card.dataset.item);
+        if (data.replaces) {
+            remove(data.replaces);
+        }
+        container.prepend(card);
+    });
+})();
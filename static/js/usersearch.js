@@ -0,0 +1,50 @@
+// Autocomplétion du champ de recherche de la page d'abonnement : les noms
+// d'utilisateur commençant par la saisie sont proposés dans une <datalist>.
+(function () {
+    "use strict";
+
+    var input = document.getElementById("search_user");
+    if (!input || !input.dataset.suggestUrl) {
+        return;
+    }
+    var list = document.getElementById(input.getAttribute("list"));
+    var timer = null;
+    var controller = null;
+
+    function render(results) {
+        list.replaceChildren.apply(
+            list,
+            results.map(function (user) {
+                var option = document.createElement("option");
+                option.value = user.username;
+                return option;
+            })
+        );
+    }
+
+    function suggest() {
+        var query = input.value.trim();
+        if (controller) {
+            controller.abort();
+        }
+        if (!query) {
+            render([]);
+            return;
+        }
+        controller = new AbortController();
+        var url = input.dataset.suggestUrl + "?q=" + encodeURIComponent(query);
+        fetch(url, { signal: controller.signal, credentials: "same-origin" })
+            .then(function (response) {
+                return response.ok ? response.json() : { results: [] };
+            })
+            .then(function (data) {
+                render(data.results);
+            })
+            .catch(function () {});
+    }
+
+    input.addEventListener("input", function () {
+        clearTimeout(timer);
+        timer = setTimeout(suggest, 150);
+    });
+})();